@@ -0,0 +1,311 @@
+"""
+================================================
+ARQUIVO DA ALOCAÇÃO EM LOTES (QUANTIDADES INTEIRAS)
+================================================
+
+O otimizador devolve pesos contínuos; o 'plot.py' apenas
+multiplica cada peso por VALOR_TOTAL_INVESTIMENTO. Na B3, porém,
+só se compram lotes inteiros (ver LOTES_POR_ATIVO no config.py).
+
+Este arquivo converte carteiras da fronteira em nº de lotes, aos
+preços mais recentes, minimizando o erro em relação aos pesos
+contínuos e sem gastar mais que o caixa disponível:
+
+    min  eᵀ M e,   e = pesos_reais - pesos_alvo
+    s.a. Σ lotes_i · lote_i · preço_i <= VALOR_TOTAL_INVESTIMENTO
+
+(M = I: erro quadrático dos pesos; M = Σ: tracking error).
+
+Métodos:
+- 'guloso': parte do arredondamento para baixo e compra, um lote
+  por vez, o que mais reduz o erro por real gasto. Vetorizado
+  sobre TODAS as carteiras da fronteira ao mesmo tempo.
+- 'exato':  branch-and-bound que escolhe, para cada ativo,
+  arredondar para baixo ou para cima (mochila 0-1), com o limite
+  da relaxação linear. Uma carteira por vez; só com M = I.
+
+Ativos com lote 0 (cripto) recebem exatamente o valor-alvo.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import config
+
+# --- 1. PARÂMETROS ---
+
+# Nº máximo de nós do branch-and-bound por carteira
+# (se atingido, fica com a melhor solução encontrada)
+LIMITE_NOS_BB = 200_000
+
+# Tolerância para comparar valores em R$
+TOLERANCIA_CAIXA = 1e-9
+
+ARQUIVO_ORDENS_CSV = 'ordens_lotes.csv'
+
+
+# --- 2. FUNÇÕES AUXILIARES ---
+
+def tamanhos_de_lote(nomes_dos_ativos):
+    """Lote de cada ativo, a partir do config.py (0 = fracionário)."""
+    return np.array([config.LOTES_POR_ATIVO.get(n, config.LOTE_PADRAO) for n in nomes_dos_ativos],
+                    dtype=np.float64)
+
+def ultimos_precos(nomes_dos_ativos, fonte=None, dias=10):
+    """Último preço de fechamento de cada ativo (Series), via 'preparar_dados'."""
+    import preparar_dados
+    fim = datetime.date.today() + datetime.timedelta(days=1)
+    inicio = fim - datetime.timedelta(days=dias)
+    precos = preparar_dados.baixar_dados_precos(list(nomes_dos_ativos), inicio.isoformat(),
+                                                fim.isoformat(), fonte=fonte)
+    if precos is None:
+        return None
+    return precos.ffill().iloc[-1].reindex(nomes_dos_ativos)
+
+
+# --- 3. HEURÍSTICA GULOSA (VETORIZADA SOBRE A FRONTEIRA) ---
+
+def _arredondar_guloso(valor_alvo, custo_lote, caixa, valor_total, matriz_cov=None):
+    """
+    valor_alvo: R$ desejados em cada ativo com lote (P x N);
+    custo_lote: R$ de um lote de cada ativo (N); caixa: R$ livres (P).
+    Retorna (lotes P x N, caixa restante P).
+    """
+    validos = np.isfinite(custo_lote) & (custo_lote > 0)
+    custo_seguro = np.where(validos, custo_lote, 1.0)
+    lotes = np.where(validos, np.floor(valor_alvo / custo_seguro), 0.0)
+    caixa = caixa - lotes @ np.where(validos, custo_lote, 0.0)
+
+    # Erro dos pesos (e) e quanto um lote a mais muda cada peso (c)
+    erro = (lotes * custo_seguro * validos - valor_alvo) / valor_total
+    c = np.where(validos, custo_lote, 0.0) / valor_total
+
+    if matriz_cov is None:
+        # Sem Σ os ganhos não mudam com as outras compras e cada ativo
+        # recebe no máximo 1 lote: basta percorrer os ativos na ordem
+        # de ganho por real e comprar quando couber (O(P) por posição)
+        ganhos = -(2.0 * c * erro + c ** 2)
+        razao = np.where(validos & (ganhos > 0), ganhos / np.where(c > 0, c, 1.0), -np.inf)
+        ordem = np.argsort(-razao, axis=1)
+        linhas = np.arange(len(lotes))
+        for posicao in range(lotes.shape[1]):
+            j = ordem[:, posicao]
+            comprar = np.isfinite(razao[linhas, j]) & (custo_seguro[j] <= caixa + TOLERANCIA_CAIXA)
+            lotes[linhas[comprar], j[comprar]] += 1
+            caixa[comprar] -= custo_seguro[j[comprar]]
+        return lotes, caixa
+
+    # Com Σ: a cada passo, recalcula os ganhos e compra o melhor lote.
+    # Carteiras que não podem comprar mais nada saem do laço.
+    gradiente = erro @ matriz_cov
+    diagonal = np.diag(matriz_cov)
+    ativas = np.arange(len(lotes))
+    # Os efeitos cruzados podem pedir mais de 1 lote por ativo: folga de 2N passos
+    for _ in range(2 * lotes.shape[1]):
+        # Redução de eᵀMe ao comprar 1 lote do ativo i: -(2·c_i·(Me)_i + c_i²·M_ii)
+        reducao = -(2.0 * c * gradiente[ativas] + c ** 2 * diagonal)
+        cabe = validos & (custo_lote[None, :] <= caixa[ativas, None] + TOLERANCIA_CAIXA)
+        razao = np.where(cabe & (reducao > 0), reducao / np.where(c > 0, c, 1.0), -np.inf)
+        melhor = np.argmax(razao, axis=1)
+        comprar = np.isfinite(razao[np.arange(len(ativas)), melhor])
+        ativas, j = ativas[comprar], melhor[comprar]
+        if len(ativas) == 0:
+            break
+        lotes[ativas, j] += 1
+        caixa[ativas] -= custo_lote[j]
+        gradiente[ativas] += c[j][:, None] * matriz_cov[j]
+    return lotes, caixa
+
+
+# --- 4. BRANCH-AND-BOUND (MOCHILA 0-1, UMA CARTEIRA) ---
+
+def _mochila_bb(ganhos, custos, capacidade, limite_nos=LIMITE_NOS_BB):
+    """
+    max Σ ganhos·x  s.a.  Σ custos·x <= capacidade, x ∈ {0, 1}.
+    Busca em profundidade, itens ordenados por ganho/custo e limite
+    superior da relaxação linear (Dantzig). Retorna (x, exato).
+    """
+    n = len(ganhos)
+    escolha = np.zeros(n, dtype=bool)
+    if n == 0:
+        return escolha, True
+    ordem = np.argsort(-ganhos / custos)
+    g, k = ganhos[ordem], custos[ordem]
+
+    def limite_superior(i, ganho, folga):
+        # Itens inteiros enquanto cabem; o primeiro que não cabe entra fracionado
+        acumulado = np.cumsum(k[i:])
+        cabem = np.searchsorted(acumulado, folga + TOLERANCIA_CAIXA, side='right')
+        limite = ganho + g[i:i + cabem].sum()
+        if i + cabem < n:
+            usado = acumulado[cabem - 1] if cabem > 0 else 0.0
+            limite += g[i + cabem] * (folga - usado) / k[i + cabem]
+        return limite
+
+    melhor_ganho, melhor_x = 0.0, np.zeros(n, dtype=bool)
+    pilha = [(0, 0.0, capacidade, np.zeros(n, dtype=bool))]
+    nos = 0
+    while pilha and nos < limite_nos:
+        i, ganho, folga, x = pilha.pop()
+        nos += 1
+        if ganho > melhor_ganho:
+            melhor_ganho, melhor_x = ganho, x
+        if i == n or limite_superior(i, ganho, folga) <= melhor_ganho + 1e-15:
+            continue
+        # Ramo "sem o item" primeiro na pilha: o ramo "com o item" é explorado antes
+        pilha.append((i + 1, ganho, folga, x))
+        if k[i] <= folga + TOLERANCIA_CAIXA:
+            com_item = x.copy()
+            com_item[i] = True
+            pilha.append((i + 1, ganho + g[i], folga - k[i], com_item))
+
+    escolha[ordem] = melhor_x
+    return escolha, not pilha
+
+def _arredondar_exato(valor_alvo, custo_lote, caixa, valor_total):
+    """Arredondamento ótimo (piso ou piso + 1 lote em cada ativo), carteira a carteira."""
+    validos = np.isfinite(custo_lote) & (custo_lote > 0)
+    custo_seguro = np.where(validos, custo_lote, 1.0)
+    lotes = np.where(validos, np.floor(valor_alvo / custo_seguro), 0.0)
+    caixa = caixa - lotes @ np.where(validos, custo_lote, 0.0)
+    exatos = np.ones(len(lotes), dtype=bool)
+
+    for p in range(len(lotes)):
+        e0 = (lotes[p] * custo_seguro - valor_alvo[p]) / valor_total
+        c = custo_seguro / valor_total
+        ganhos = e0 ** 2 - (e0 + c) ** 2
+        candidatos = np.flatnonzero(validos & (ganhos > 0))
+        x, exatos[p] = _mochila_bb(ganhos[candidatos], custo_lote[candidatos], caixa[p])
+        lotes[p, candidatos[x]] += 1
+        caixa[p] -= custo_lote[candidatos[x]].sum()
+    return lotes, caixa, exatos
+
+
+# --- 5. RESULTADO ---
+
+class ResultadoLotes:
+    """
+    Alocação em lotes de P carteiras (N ativos):
+    - quantidades: unidades de cada ativo (P x N; lotes x tamanho do lote)
+    - valores:     R$ em cada ativo (P x N)
+    - pesos_reais: valores / valor_total (P x N)
+    - caixa:       R$ que sobraram (P)
+    - erro:        sqrt(eᵀMe) em relação aos pesos contínuos (P)
+    - exato:       se o branch-and-bound provou a otimalidade (P)
+    """
+
+    def __init__(self, quantidades, valores, pesos_reais, caixa, erro, exato):
+        self.quantidades = quantidades
+        self.valores = valores
+        self.pesos_reais = pesos_reais
+        self.caixa = caixa
+        self.erro = erro
+        self.exato = exato
+
+
+# --- 6. FUNÇÃO PRINCIPAL ---
+
+def alocar_em_lotes(pesos, precos, valor_total=None, tamanhos_lote=None,
+                    nomes_dos_ativos=None, metodo='guloso', matriz_cov=None):
+    """
+    Converte as carteiras 'pesos' (P x N ou N) em quantidades inteiras de lotes.
+
+    - precos: último preço de cada ativo (N)
+    - tamanhos_lote: unidades por lote (N); padrão: config.py via 'nomes_dos_ativos'
+    - metodo: 'guloso' (vetorizado) ou 'exato' (branch-and-bound)
+    - matriz_cov: se dada, minimiza o tracking error (só no 'guloso')
+    """
+    pesos = np.atleast_2d(np.asarray(pesos, dtype=np.float64))
+    precos = np.asarray(precos, dtype=np.float64)
+    if valor_total is None:
+        valor_total = config.VALOR_TOTAL_INVESTIMENTO
+    if tamanhos_lote is None:
+        tamanhos_lote = tamanhos_de_lote(nomes_dos_ativos)
+    tamanhos_lote = np.asarray(tamanhos_lote, dtype=np.float64)
+    if matriz_cov is not None:
+        if metodo == 'exato':
+            raise ValueError("O método 'exato' só minimiza o erro quadrático dos pesos (matriz_cov=None).")
+        matriz_cov = np.asarray(matriz_cov, dtype=np.float64)
+
+    valor_alvo = pesos * valor_total
+    fracionarios = tamanhos_lote == 0
+
+    # Ativos fracionários recebem exatamente o valor-alvo
+    caixa = valor_total - valor_alvo[:, fracionarios].sum(axis=1)
+    custo_lote = np.where(fracionarios, np.nan, tamanhos_lote * precos)
+    alvo_lotes = np.where(fracionarios, 0.0, valor_alvo)
+
+    if metodo == 'guloso':
+        lotes, caixa = _arredondar_guloso(alvo_lotes, custo_lote, caixa, valor_total, matriz_cov)
+        exato = np.zeros(len(pesos), dtype=bool)
+    elif metodo == 'exato':
+        lotes, caixa, exato = _arredondar_exato(alvo_lotes, custo_lote, caixa, valor_total)
+    else:
+        raise ValueError(f"Método de alocação desconhecido: {metodo}")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quantidades = np.where(fracionarios, valor_alvo / precos, lotes * tamanhos_lote)
+    valores = np.where(fracionarios, valor_alvo, lotes * np.nan_to_num(custo_lote))
+    pesos_reais = valores / valor_total
+    e = pesos_reais - pesos
+    erro = np.sqrt(np.einsum('pi,pi->p', e @ matriz_cov, e) if matriz_cov is not None
+                   else np.einsum('pi,pi->p', e, e))
+    return ResultadoLotes(quantidades, valores, pesos_reais, caixa, erro, exato)
+
+
+# --- 7. ORDENS ---
+
+def gerar_ordens(quantidades_atuais, quantidades_alvo, precos, nomes_dos_ativos):
+    """
+    Ordens (compra/venda) para ir da carteira atual à carteira-alvo
+    de UMA carteira (vetores de N quantidades).
+    """
+    diferenca = np.asarray(quantidades_alvo, dtype=np.float64) - np.asarray(quantidades_atuais, dtype=np.float64)
+    ordens = pd.DataFrame({
+        'Ativo': list(nomes_dos_ativos),
+        'Operacao': np.where(diferenca > 0, 'COMPRA', 'VENDA'),
+        'Quantidade': np.abs(diferenca),
+        'Preco': np.asarray(precos, dtype=np.float64),
+    })
+    ordens['Valor'] = ordens['Quantidade'] * ordens['Preco']
+    return ordens[diferenca != 0].reset_index(drop=True)
+
+
+# --- 8. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+    import time
+    import artefato_inputs
+    import resultados_binarios
+
+    print("--- ALOCAÇÃO EM LOTES DA FRONTEIRA ---")
+    manifesto = resultados_binarios.ler_manifesto()
+    inputs = artefato_inputs.carregar_ou_calcular_inputs()
+    if manifesto is None or inputs is None:
+        print("Erro: execute o 'otimizar.py' primeiro.")
+        exit()
+
+    nomes = manifesto['nomes_dos_ativos']
+    objetivos = resultados_binarios.carregar_objetivos(manifesto=manifesto)
+    pesos = resultados_binarios.carregar_pesos(manifesto=manifesto)
+    precos = ultimos_precos(nomes)
+    if precos is None:
+        print("Erro: não foi possível obter os preços mais recentes.")
+        exit()
+
+    inicio = time.perf_counter()
+    resultado = alocar_em_lotes(pesos, precos.to_numpy(), nomes_dos_ativos=nomes)
+    print(f"{len(pesos)} carteiras convertidas em lotes em {(time.perf_counter() - inicio) * 1000:.1f} ms.")
+    print(f"Erro médio dos pesos: {resultado.erro.mean():.4%} | "
+          f"Caixa médio: R$ {resultado.caixa.mean():,.2f}")
+
+    # Ordens para montar a carteira de máximo Sharpe (partindo do zero)
+    volatilidades = np.sqrt(objetivos['Risco_Anual'].to_numpy())
+    sharpe = (objetivos['Retorno_Anual'].to_numpy() - inputs['taxa_livre_de_risco']) / volatilidades
+    i = int(np.argmax(sharpe))
+    ordens = gerar_ordens(np.zeros(len(nomes)), resultado.quantidades[i], precos.to_numpy(), nomes)
+    print(f"\nOrdens para a carteira de Máximo Sharpe (caixa restante: R$ {resultado.caixa[i]:,.2f}):")
+    print(ordens.to_string(index=False))
+    ordens.to_csv(ARQUIVO_ORDENS_CSV, index=False, sep=';', decimal=',')
+    print(f"\nOrdens salvas em '{ARQUIVO_ORDENS_CSV}'.")
@@ -0,0 +1,245 @@
+"""
+================================================
+ARQUIVO DAS CARTEIRAS ANALÍTICAS (CONSULTAS EXATAS)
+================================================
+
+O 'plot.py' escolhia as carteiras de destaque varrendo os
+pontos que o NSGA-II encontrou (idxmin/idxmax): o resultado
+é aproximado e depende de a fronteira ter pontos suficientes.
+
+Aqui as carteiras são calculadas direto de μ, Σ e rf:
+
+1. O Critical Line Algorithm ('fronteira_exata.py', método de
+   conjunto ativo) é resolvido UMA vez e os portfólios de canto
+   ficam guardados, junto com Σ·w de cada canto;
+2. Entre dois cantos vizinhos, w(t) = w_a + t·(w_b - w_a):
+   o retorno é linear em t e a variância é quadrática
+   (a·t² + b·t + c), com a, b, c pré-calculados por segmento.
+
+Com isso, cada consulta é exata e custa O(nº de cantos):
+- minima_variancia():      carteira de mínima variância global
+- maximo_retorno():        carteira de máximo retorno
+- tangente(rf):            máximo Sharpe sem venda a descoberto
+                           (máximo de (μ(t) - rf)/σ(t) em cada
+                           segmento, em forma fechada)
+- por_retorno(alvo):       menor risco para um retorno-alvo
+- por_volatilidade(alvo):  maior retorno para uma volatilidade-alvo
+
+'AnaliseFronteira.de_pontos' monta o mesmo índice sobre pontos
+já calculados (ex: a fronteira salva pelo NSGA-II), no lugar
+dos cantos do CLA (usado pelo 'servico_fronteira.py').
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+import fronteira_exata
+
+# Análises já resolvidas, por hash de (μ, Σ, limites)
+_CACHE_ANALISES = {}
+
+
+# --- 1. CLASSE PRINCIPAL ---
+
+class AnaliseFronteira:
+    """
+    Fronteira exata (cantos do CLA) pronta para consultas.
+    Os cantos ficam em ordem CRESCENTE de retorno (do mínimo
+    risco ao máximo retorno). 'cantos' (opcional) substitui o
+    CLA por pontos já calculados (ver 'de_pontos').
+    """
+
+    def __init__(self, retornos_medios, matriz_cov, taxa_livre_de_risco=0.0,
+                 limite_inferior=0.0, limite_superior=1.0, cantos=None, interpolar=True):
+        self.mu = np.asarray(retornos_medios, dtype=np.float64)
+        self.cov = np.asarray(matriz_cov, dtype=np.float64)
+        self.taxa_livre_de_risco = taxa_livre_de_risco
+        # interpolar=False: as consultas só devolvem os próprios pontos
+        # (ex: fronteira com cardinalidade, onde a mistura de dois
+        #  pontos pode ter mais ativos que o permitido)
+        self.interpolar = interpolar
+
+        if cantos is None:
+            cla = fronteira_exata.CriticalLineAlgorithm(self.mu, self.cov, limite_inferior, limite_superior)
+            pesos_cantos, _ = cla.resolver()
+            cantos = pesos_cantos[::-1]
+        self.cantos = np.array(cantos, dtype=np.float64)
+
+        # --- Pré-cálculo por canto e por segmento ---
+        cov_cantos = self.cantos @ self.cov                             # Σ·w de cada canto
+        self.retornos_cantos = self.cantos @ self.mu
+        self.variancias_cantos = np.einsum('ij,ij->i', self.cantos, cov_cantos)
+
+        # Segmento k: w(t) = cantos[k] + t·d_k, t em [0, 1]
+        d = np.diff(self.cantos, axis=0)
+        cov_d = np.diff(cov_cantos, axis=0)
+        self._a = np.einsum('ij,ij->i', d, cov_d)                       # dᵀΣd
+        self._b = 2.0 * np.einsum('ij,ij->i', self.cantos[:-1], cov_d)  # 2·w_aᵀΣd
+        self._c = self.variancias_cantos[:-1]                           # w_aᵀΣw_a
+        self._m0 = self.retornos_cantos[:-1]
+        self._m1 = np.diff(self.retornos_cantos)
+
+    @classmethod
+    def de_pontos(cls, pesos, retornos_medios, matriz_cov, taxa_livre_de_risco=0.0, interpolar=True):
+        """
+        Índice sobre pontos já calculados (pesos: P x N). Fica só com
+        os pontos eficientes (nenhum outro com retorno >= e risco <=),
+        em ordem crescente de retorno. Entre dois pontos vizinhos, as
+        consultas interpolam os pesos (se 'interpolar').
+        """
+        pesos = np.atleast_2d(np.asarray(pesos, dtype=np.float64))
+        mu = np.asarray(retornos_medios, dtype=np.float64)
+        cov = np.asarray(matriz_cov, dtype=np.float64)
+        retornos = pesos @ mu
+        variancias = np.einsum('ij,jk,ik->i', pesos, cov, pesos)
+
+        # Do maior retorno para o menor: eficiente se tem variância
+        # menor que a de todos os pontos de retorno maior
+        ordem = np.lexsort((variancias, -retornos))
+        menor_antes = np.minimum.accumulate(np.concatenate([[np.inf], variancias[ordem][:-1]]))
+        eficientes = ordem[variancias[ordem] < menor_antes][::-1]
+        return cls(mu, cov, taxa_livre_de_risco, cantos=pesos[eficientes], interpolar=interpolar)
+
+    @property
+    def n_cantos(self):
+        return len(self.cantos)
+
+    def _ponto(self, k, t):
+        """Pesos no segmento k, posição t (escalares ou arrays)."""
+        k = np.asarray(k)
+        t = np.asarray(t, dtype=np.float64)
+        if self.n_cantos == 1:
+            return np.broadcast_to(self.cantos[0], t.shape + (len(self.mu),)).copy()
+        return self.cantos[k] + t[..., None] * (self.cantos[k + 1] - self.cantos[k])
+
+    # --- Consultas ---
+
+    def minima_variancia(self):
+        """Carteira de mínima variância global (1º canto)."""
+        return self.cantos[0].copy()
+
+    def maximo_retorno(self):
+        """Carteira de máximo retorno (último canto)."""
+        return self.cantos[-1].copy()
+
+    def tangente(self, taxa_livre_de_risco=None):
+        """
+        Carteira de máximo Sharpe (sem venda a descoberto).
+
+        Em cada segmento, S(t) = (m0 - rf + m1·t) / sqrt(c + b·t + a·t²)
+        tem no máximo um ponto estacionário, em forma fechada:
+            t* = (m0'·b/2 - m1·c) / (m1·b/2 - m0'·a),  m0' = m0 - rf
+        Avalia os cantos e os t* dentro de [0, 1] e fica com o maior.
+        """
+        rf = self.taxa_livre_de_risco if taxa_livre_de_risco is None else taxa_livre_de_risco
+        if self.n_cantos == 1:
+            return self.cantos[0].copy()
+
+        if not self.interpolar:
+            sharpe = (self.retornos_cantos - rf) / np.sqrt(np.maximum(self.variancias_cantos, 1e-300))
+            return self.cantos[int(np.argmax(sharpe))].copy()
+
+        m0 = self._m0 - rf
+        numerador = m0 * self._b / 2.0 - self._m1 * self._c
+        denominador = self._m1 * self._b / 2.0 - m0 * self._a
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_estacionario = np.where(denominador != 0, numerador / denominador, 0.0)
+        t_estacionario = np.clip(np.nan_to_num(t_estacionario), 0.0, 1.0)
+
+        # Candidatos: início de cada segmento, o último canto e os t*
+        segmentos = np.arange(self.n_cantos - 1)
+        k = np.concatenate([segmentos, [self.n_cantos - 2], segmentos])
+        t = np.concatenate([np.zeros(len(segmentos)), [1.0], t_estacionario])
+        variancia = self._c[k] + self._b[k] * t + self._a[k] * t ** 2
+        retorno = self._m0[k] + self._m1[k] * t
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(variancia > 0, (retorno - rf) / np.sqrt(np.maximum(variancia, 0.0)), -np.inf)
+        melhor = int(np.argmax(sharpe))
+        return self._ponto(k[melhor], t[melhor])
+
+    def por_retorno(self, alvo):
+        """
+        Carteira eficiente (menor variância) com retorno = 'alvo'
+        (escalar -> N pesos; array -> len(alvo) x N).
+        """
+        alvo = np.asarray(alvo, dtype=np.float64)
+        minimo, maximo = self.retornos_cantos[0], self.retornos_cantos[-1]
+        if np.any(alvo < minimo - fronteira_exata.TOLERANCIA) or np.any(alvo > maximo + fronteira_exata.TOLERANCIA):
+            raise ValueError(f"Retorno-alvo fora da fronteira eficiente [{minimo:.4%}, {maximo:.4%}].")
+        if self.n_cantos == 1:
+            return self._ponto(0, np.zeros(alvo.shape))
+        k = np.clip(np.searchsorted(self.retornos_cantos, alvo, side='right') - 1, 0, self.n_cantos - 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(self._m1[k] > 0, (alvo - self._m0[k]) / self._m1[k], 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        if not self.interpolar:
+            t = np.ceil(t - fronteira_exata.TOLERANCIA)   # 1º ponto com retorno >= alvo
+        return self._ponto(k, t)
+
+    def por_volatilidade(self, alvo):
+        """
+        Carteira eficiente (maior retorno) com volatilidade = 'alvo'
+        (desvio padrão anual; escalar ou array).
+        Resolve a·t² + b·t + c = alvo² no segmento que contém o alvo.
+        """
+        alvo = np.asarray(alvo, dtype=np.float64)
+        vols = np.sqrt(self.variancias_cantos)
+        if np.any(alvo < vols[0] - fronteira_exata.TOLERANCIA) or np.any(alvo > vols[-1] + fronteira_exata.TOLERANCIA):
+            raise ValueError(f"Volatilidade-alvo fora da fronteira eficiente [{vols[0]:.4%}, {vols[-1]:.4%}].")
+        if self.n_cantos == 1:
+            return self._ponto(0, np.zeros(alvo.shape))
+        k = np.clip(np.searchsorted(vols, alvo, side='right') - 1, 0, self.n_cantos - 2)
+        a, b, c = self._a[k], self._b[k], self._c[k] - alvo ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raiz = (-b + np.sqrt(np.maximum(b ** 2 - 4.0 * a * c, 0.0))) / (2.0 * a)
+            t = np.where(a > 0, raiz, np.where(b != 0, -c / b, 0.0))
+        t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+        if not self.interpolar:
+            t = np.floor(t + fronteira_exata.TOLERANCIA)  # Último ponto com volatilidade <= alvo
+        return self._ponto(k, t)
+
+    # --- Formatação ---
+
+    def como_series(self, pesos, nomes_dos_ativos, taxa_livre_de_risco=None):
+        """
+        Carteira no formato de uma linha do DataFrame de resultados
+        do 'plot.py' (Risco_Anual, Retorno_Anual, Risco_StDev,
+        Sharpe_Ratio e as colunas 'w_<ativo>').
+        """
+        rf = self.taxa_livre_de_risco if taxa_livre_de_risco is None else taxa_livre_de_risco
+        variancia = float(pesos @ self.cov @ pesos)
+        retorno = float(pesos @ self.mu)
+        volatilidade = np.sqrt(max(variancia, 0.0))
+        metricas = pd.Series({
+            'Risco_Anual': variancia,
+            'Retorno_Anual': retorno,
+            'Risco_StDev': volatilidade,
+            'Sharpe_Ratio': (retorno - rf) / volatilidade if volatilidade > 0 else np.nan,
+        })
+        return pd.concat([metricas, pd.Series(pesos, index=[f'w_{n}' for n in nomes_dos_ativos])])
+
+
+# --- 2. CACHE ---
+
+def obter_analise(inputs, limite_inferior=0.0, limite_superior=1.0):
+    """
+    'AnaliseFronteira' dos inputs (dict do 'preparar_dados' ou do
+    'artefato_inputs'), reaproveitando a já calculada para os mesmos
+    μ, Σ e limites (chave: o hash do artefato, se houver).
+    """
+    chave_inputs = inputs.get('hash')
+    if chave_inputs is None:
+        h = hashlib.sha256()
+        h.update(np.ascontiguousarray(inputs['retornos_medios'], dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(inputs['matriz_cov'], dtype=np.float64).tobytes())
+        chave_inputs = h.hexdigest()
+    chave = (chave_inputs, limite_inferior, limite_superior)
+
+    analise = _CACHE_ANALISES.get(chave)
+    if analise is None:
+        analise = AnaliseFronteira(inputs['retornos_medios'], inputs['matriz_cov'],
+                                   inputs['taxa_livre_de_risco'], limite_inferior, limite_superior)
+        _CACHE_ANALISES[chave] = analise
+    return analise
@@ -0,0 +1,370 @@
+"""
+================================================
+ARQUIVO DA AQUISIÇÃO CONCORRENTE DE DADOS (ASYNC)
+================================================
+
+O 'preparar_dados.py' baixava o calendário (Ibovespa), os
+preços e a Selic um depois do outro, e uma única falha do
+'yf.download' derrubava o lote inteiro.
+
+Este arquivo (asyncio + pool de threads, já que yfinance/bcb
+são bloqueantes) oferece:
+
+1. 'executar_concorrente(f1, f2, ...)': roda funções de download
+   ao mesmo tempo (ex: calendário, Selic e preços);
+2. 'FornecedorConcorrente': envolve qualquer fornecedor
+   ('baixar_precos' / 'baixar_selic') e baixa os tickers em LOTES,
+   em paralelo (no máximo MAX_CONCORRENCIA chamadas simultâneas).
+   Se um lote falha, cada ticker dele é tentado isoladamente, com
+   repetição e espera exponencial (backoff). Os tickers que falharem
+   de vez são informados no 'RelatorioAquisicao', sem derrubar o resto;
+3. Fornecedores locais para testes, no lugar do yfinance/bcb:
+   - FornecedorArquivos: lê um CSV por série de uma pasta;
+   - FornecedorHTTP + servir_fornecedor(): um servidor HTTP local
+     falso que publica qualquer fornecedor, e o cliente dele.
+
+A interface de um fornecedor é a mesma de sempre
+('baixar_precos(tickers, inicio, fim)' e 'baixar_selic(inicio, fim)');
+os métodos também podem ser corrotinas ('async def').
+
+Execute (servidor falso a partir de uma pasta de CSVs):
+    python aquisicao_dados.py --servir PASTA --porta 8765
+"""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import io
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+# --- 1. PARÂMETROS DA AQUISIÇÃO ---
+
+MAX_CONCORRENCIA = 8      # Chamadas simultâneas ao fornecedor
+TAMANHO_LOTE = 20         # Tickers por chamada (se o fornecedor não definir o seu)
+TENTATIVAS = 3            # Tentativas por ticker (após a falha do lote)
+ESPERA_INICIAL = 0.5      # Segundos antes da 2ª tentativa (dobra a cada falha)
+ESPERA_MAXIMA = 8.0       # Teto da espera entre tentativas
+TEMPO_LIMITE_HTTP = 30.0  # Timeout (s) das requisições do FornecedorHTTP
+
+
+# --- 2. EXECUÇÃO CONCORRENTE ---
+
+async def _chamar(funcao, *args, executor=None):
+    """Chama 'funcao' sem bloquear o loop (corrotina ou função comum em thread)."""
+    if inspect.iscoroutinefunction(funcao):
+        return await funcao(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, funcao, *args)
+
+def executar_concorrente(*funcoes):
+    """
+    Executa as funções (sem argumentos) ao mesmo tempo, cada uma em
+    uma thread, e retorna os resultados na mesma ordem. Se alguma
+    levantar exceção, ela é repassada depois que todas terminarem.
+    """
+    async def _todas():
+        with ThreadPoolExecutor(max_workers=max(len(funcoes), 1)) as executor:
+            return await asyncio.gather(*(_chamar(f, executor=executor) for f in funcoes),
+                                        return_exceptions=True)
+
+    resultados = asyncio.run(_todas())
+    for resultado in resultados:
+        if isinstance(resultado, BaseException):
+            raise resultado
+    return resultados
+
+def _espera(tentativa):
+    """Backoff exponencial com jitter: ~ESPERA_INICIAL·2^(tentativa-1), no máximo ESPERA_MAXIMA."""
+    base = min(ESPERA_INICIAL * 2 ** (tentativa - 1), ESPERA_MAXIMA)
+    return base * (0.5 + random.random() / 2)
+
+
+# --- 3. RELATÓRIO ---
+
+class RelatorioAquisicao:
+    """
+    Resultado de um download de preços:
+    - sucesso:   tickers com dados
+    - sem_dados: tickers que o fornecedor não retornou (ou só NaN)
+    - falhas:    {ticker: mensagem de erro} após todas as tentativas
+    - chamadas:  nº de chamadas ao fornecedor (inclui as repetições)
+    - segundos:  tempo total
+    """
+
+    def __init__(self):
+        self.sucesso = []
+        self.sem_dados = []
+        self.falhas = {}
+        self.chamadas = 0
+        self.segundos = 0.0
+
+    def resumo(self):
+        total = len(self.sucesso) + len(self.sem_dados) + len(self.falhas)
+        texto = (f"Download: {len(self.sucesso)}/{total} ativos em {self.segundos:.2f}s "
+                 f"({self.chamadas} chamadas)")
+        if self.sem_dados:
+            texto += f"\n  Sem dados no período: {self.sem_dados}"
+        for ticker, erro in self.falhas.items():
+            texto += f"\n  *** FALHA: {ticker} ({erro})"
+        return texto
+
+
+# --- 4. FORNECEDOR CONCORRENTE ---
+
+class FornecedorConcorrente:
+    """
+    Envolve um fornecedor e baixa os preços em lotes concorrentes,
+    com repetição por ticker. Tem a mesma interface de um fornecedor
+    (pode ser envolvido pelo 'cache_dados.FonteComCache').
+
+    O tamanho do lote é 'tamanho_lote' ou, se omitido, o atributo
+    TAMANHO_LOTE do fornecedor (quando ele define um), ou o padrão.
+    O relatório do último download de preços fica em 'self.relatorio'.
+    """
+
+    def __init__(self, fornecedor, max_concorrencia=None, tamanho_lote=None, tentativas=None):
+        self.fornecedor = fornecedor
+        self.max_concorrencia = max_concorrencia or MAX_CONCORRENCIA
+        self.tamanho_lote = tamanho_lote or getattr(fornecedor, 'TAMANHO_LOTE', TAMANHO_LOTE)
+        self.tentativas = tentativas or TENTATIVAS
+        self.relatorio = None
+        # O semáforo (único) limita as chamadas simultâneas, mesmo quando
+        # vários downloads (calendário, preços, Selic) correm juntos, cada
+        # um em sua thread. O pool de threads é criado e encerrado a cada
+        # download (nenhuma thread sobra depois que ele termina).
+        self._limite = threading.BoundedSemaphore(self.max_concorrencia)
+
+    # --- Interface de fornecedor (síncrona) ---
+
+    def baixar_precos(self, tickers, inicio, fim):
+        precos, relatorio = asyncio.run(self.baixar_precos_async(tickers, inicio, fim))
+        print(relatorio.resumo())
+        return precos
+
+    def baixar_selic(self, inicio, fim):
+        return asyncio.run(self.baixar_selic_async(inicio, fim))
+
+    # --- Versões assíncronas ---
+
+    def _limitado(self, funcao, *args):
+        """Chama 'funcao' (bloqueante) respeitando o limite de chamadas simultâneas."""
+        with self._limite:
+            return funcao(*args)
+
+    async def _com_repeticao(self, funcao, *args, tentativas, relatorio, executor):
+        """(resultado, None) ou (None, erro) após 'tentativas' chamadas."""
+        if not inspect.iscoroutinefunction(funcao):
+            funcao = functools.partial(self._limitado, funcao)
+        erro = None
+        for tentativa in range(1, tentativas + 1):
+            relatorio.chamadas += 1
+            try:
+                return await _chamar(funcao, *args, executor=executor), None
+            except Exception as e:
+                erro = e
+            if tentativa < tentativas:
+                await asyncio.sleep(_espera(tentativa))
+        return None, erro
+
+    async def _baixar_lote(self, lote, inicio, fim, relatorio, executor):
+        """Um lote; se falhar, cada ticker é tentado isoladamente (com repetição)."""
+        baixar = self.fornecedor.baixar_precos
+        if len(lote) > 1:
+            precos, erro = await self._com_repeticao(baixar, lote, inicio, fim, tentativas=1,
+                                                     relatorio=relatorio, executor=executor)
+            if erro is None:
+                return [precos], {}
+        individuais = await asyncio.gather(*(
+            self._com_repeticao(baixar, [ticker], inicio, fim, tentativas=self.tentativas,
+                                relatorio=relatorio, executor=executor)
+            for ticker in lote))
+        quadros = [precos for precos, erro in individuais if erro is None]
+        falhas = {t: f"{type(erro).__name__}: {erro}" for t, (_, erro) in zip(lote, individuais)
+                  if erro is not None}
+        return quadros, falhas
+
+    async def baixar_precos_async(self, tickers, inicio, fim):
+        """Retorna (DataFrame datas x tickers, RelatorioAquisicao)."""
+        tickers = list(dict.fromkeys(tickers))
+        relatorio = RelatorioAquisicao()
+        inicio_relogio = time.perf_counter()
+
+        lotes = [tickers[i:i + self.tamanho_lote] for i in range(0, len(tickers), self.tamanho_lote)]
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia) as executor:
+            resultados = await asyncio.gather(*(self._baixar_lote(lote, inicio, fim, relatorio, executor)
+                                                for lote in lotes))
+
+        quadros = []
+        for quadros_lote, falhas_lote in resultados:
+            quadros.extend(q.to_frame() if isinstance(q, pd.Series) else q for q in quadros_lote)
+            relatorio.falhas.update(falhas_lote)
+        precos = pd.concat(quadros, axis=1) if quadros else pd.DataFrame()
+        precos = precos.loc[:, ~precos.columns.duplicated()].sort_index()
+
+        # Reordena como pedido (tickers sem dados ficam de fora)
+        for ticker in tickers:
+            if ticker in relatorio.falhas:
+                continue
+            if ticker in precos.columns and precos[ticker].notna().any():
+                relatorio.sucesso.append(ticker)
+            else:
+                relatorio.sem_dados.append(ticker)
+        relatorio.segundos = time.perf_counter() - inicio_relogio
+        self.relatorio = relatorio
+        return precos.reindex(columns=relatorio.sucesso), relatorio
+
+    async def baixar_selic_async(self, inicio, fim):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            selic, erro = await self._com_repeticao(self.fornecedor.baixar_selic, inicio, fim,
+                                                    tentativas=self.tentativas,
+                                                    relatorio=RelatorioAquisicao(), executor=executor)
+        if erro is not None:
+            raise erro
+        return selic
+
+
+# --- 5. FORNECEDORES LOCAIS (TESTES) ---
+
+CHAVE_SELIC = 'SELIC'
+
+def _nome_csv(chave):
+    """Ticker (ex: '^BVSP') -> nome de arquivo seguro."""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', chave) + '.csv'
+
+def _recortar(serie, inicio, fim):
+    """Trecho [inicio, fim) da série (convenção do yfinance)."""
+    return serie[(serie.index >= pd.Timestamp(inicio)) & (serie.index < pd.Timestamp(fim))]
+
+class FornecedorArquivos:
+    """
+    Fornecedor lido de uma pasta com um CSV por série
+    ('<ticker>.csv' e 'SELIC.csv'), colunas 'data' e 'valor'.
+    Tickers sem arquivo voltam sem coluna (como um ticker inválido).
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def _serie(self, chave):
+        caminho = os.path.join(self.pasta, _nome_csv(chave))
+        if not os.path.exists(caminho):
+            return None
+        dados = pd.read_csv(caminho, parse_dates=['data'], index_col='data')
+        return dados['valor'].rename(chave)
+
+    def baixar_precos(self, tickers, inicio, fim):
+        series = [s for s in (self._serie(t) for t in tickers) if s is not None]
+        if not series:
+            return pd.DataFrame()
+        return pd.concat([_recortar(s, inicio, fim) for s in series], axis=1)
+
+    def baixar_selic(self, inicio, fim):
+        selic = self._serie(CHAVE_SELIC)
+        if selic is None:
+            raise FileNotFoundError(f"'{_nome_csv(CHAVE_SELIC)}' não existe em '{self.pasta}'")
+        return _recortar(selic, inicio, fim)
+
+def exportar_para_arquivos(fornecedor, tickers, inicio, fim, pasta):
+    """Grava os dados de um fornecedor no formato do 'FornecedorArquivos'."""
+    os.makedirs(pasta, exist_ok=True)
+    precos = fornecedor.baixar_precos(tickers, inicio, fim)
+    series = {t: precos[t] for t in precos.columns}
+    series[CHAVE_SELIC] = fornecedor.baixar_selic(inicio, fim)
+    for chave, serie in series.items():
+        serie.dropna().rename_axis('data').rename('valor').to_csv(os.path.join(pasta, _nome_csv(chave)))
+
+class FornecedorHTTP:
+    """
+    Cliente do servidor de 'servir_fornecedor' (ou de outro que fale
+    o mesmo protocolo):
+        GET /precos?tickers=A,B&inicio=YYYY-MM-DD&fim=YYYY-MM-DD -> CSV (data x tickers)
+        GET /selic?inicio=...&fim=...                            -> CSV (data, selic)
+    """
+
+    def __init__(self, url_base, tempo_limite=TEMPO_LIMITE_HTTP):
+        self.url_base = url_base.rstrip('/')
+        self.tempo_limite = tempo_limite
+
+    def _get_csv(self, rota, **parametros):
+        url = f"{self.url_base}/{rota}?{urllib.parse.urlencode(parametros)}"
+        with urllib.request.urlopen(url, timeout=self.tempo_limite) as resposta:
+            texto = resposta.read().decode('utf-8')
+        return pd.read_csv(io.StringIO(texto), parse_dates=['data'], index_col='data')
+
+    def baixar_precos(self, tickers, inicio, fim):
+        return self._get_csv('precos', tickers=','.join(tickers), inicio=inicio, fim=fim)
+
+    def baixar_selic(self, inicio, fim):
+        return self._get_csv('selic', inicio=inicio, fim=fim)['selic']
+
+def servir_fornecedor(fornecedor, host='127.0.0.1', porta=0, latencia=0.0, taxa_falhas=0.0):
+    """
+    Sobe (em uma thread) um servidor HTTP local que publica 'fornecedor'
+    no protocolo do 'FornecedorHTTP'. 'latencia' (s por requisição) e
+    'taxa_falhas' (prob. de responder 503) simulam uma API real.
+    Retorna o servidor: URL em 'servidor.url', parar com 'servidor.shutdown()'.
+    """
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            parametros = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+            time.sleep(latencia)
+            if random.random() < taxa_falhas:
+                self.send_error(503, "falha simulada")
+                return
+            try:
+                if url.path == '/precos':
+                    dados = fornecedor.baixar_precos(parametros['tickers'].split(','),
+                                                     parametros['inicio'], parametros['fim'])
+                elif url.path == '/selic':
+                    dados = fornecedor.baixar_selic(parametros['inicio'], parametros['fim']).rename('selic')
+                else:
+                    self.send_error(404)
+                    return
+                corpo = dados.rename_axis('data').to_csv().encode('utf-8')
+            except Exception as e:
+                self.send_error(500, str(e))
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass  # Silencioso
+
+    servidor = ThreadingHTTPServer((host, porta), Manipulador)
+    servidor.daemon_threads = True
+    servidor.url = f"http://{servidor.server_address[0]}:{servidor.server_address[1]}"
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+# --- 6. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servidor HTTP falso de dados de mercado (testes).")
+    parser.add_argument('--servir', required=True, metavar='PASTA', help="Pasta de CSVs do FornecedorArquivos")
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--latencia', type=float, default=0.0)
+    parser.add_argument('--taxa-falhas', type=float, default=0.0)
+    args = parser.parse_args()
+
+    servidor = servir_fornecedor(FornecedorArquivos(args.servir), porta=args.porta,
+                                 latencia=args.latencia, taxa_falhas=args.taxa_falhas)
+    print(f"Servindo '{args.servir}' em {servidor.url} (Ctrl+C para parar)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
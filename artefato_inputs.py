@@ -0,0 +1,204 @@
+"""
+================================================
+ARQUIVO DO ARTEFATO DE INPUTS DA OTIMIZAÇÃO
+================================================
+
+O 'otimizar.py' já tem em memória todos os inputs do modelo
+(μ, Σ, retornos históricos, Selic, nomes dos ativos).
+Este arquivo os grava em disco, ao lado dos resultados,
+para que o 'plot.py' (ou qualquer outro consumidor) não
+precise baixar e recalcular tudo de novo.
+
+Formato (pasta 'inputs_otimizacao/'):
+- manifesto.json: versão, ativos, período, Selic e hash
+- geracao_*/*.npy: matrizes binárias, lidas com memory-map (np.load mmap_mode='r')
+
+As matrizes de cada gravação ficam em uma subpasta nova e o
+manifesto (que aponta para ela) é trocado de uma vez, ver
+'publicacao_pasta.py': um leitor nunca mistura o μ/Σ de uma
+gravação com os nomes dos ativos de outra.
+"""
+
+import os
+import hashlib
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import publicacao_pasta
+
+# --- 1. PARÂMETROS DO ARTEFATO ---
+
+# Pasta padrão (ao lado de 'resultados_otimizacao.csv')
+PASTA_INPUTS = 'inputs_otimizacao'
+
+# Versão do formato. Artefatos de outra versão são ignorados.
+# (2: matrizes em uma subpasta por gravação, ver 'publicacao_pasta.py')
+VERSAO_FORMATO = 2
+
+# Idade máxima (em dias) para o artefato ser considerado atual
+VALIDADE_DIAS = 1
+
+ARQUIVO_MANIFESTO = publicacao_pasta.ARQUIVO_MANIFESTO
+
+# Linhas da matriz de retornos convertidas por vez no cálculo do hash
+LINHAS_POR_BLOCO_HASH = 4096
+
+
+# --- 2. FUNÇÕES AUXILIARES ---
+
+def _calcular_hash(retornos_medios, matriz_cov, matriz_retornos, nomes):
+    """
+    Hash SHA-256 do conteúdo numérico (em float64) e dos nomes dos
+    ativos. A matriz de retornos (que pode ser grande e estar em
+    float32, ver 'base_retornos.py') entra em blocos de linhas.
+    """
+    h = hashlib.sha256()
+    for matriz in (retornos_medios, matriz_cov):
+        h.update(np.ascontiguousarray(matriz, dtype=np.float64).tobytes())
+    for inicio in range(0, len(matriz_retornos), LINHAS_POR_BLOCO_HASH):
+        bloco = matriz_retornos[inicio:inicio + LINHAS_POR_BLOCO_HASH]
+        h.update(np.ascontiguousarray(bloco, dtype=np.float64).tobytes())
+    h.update('|'.join(nomes).encode('utf-8'))
+    return h.hexdigest()
+
+
+# --- 3. GRAVAÇÃO ---
+
+def salvar_inputs(inputs, pasta=PASTA_INPUTS, tickers_pedidos=None, anos_de_dados=None):
+    """
+    Grava o dicionário retornado por
+    'preparar_dados.calcular_inputs_otimizacao()' na pasta indicada.
+
+    'tickers_pedidos' e 'anos_de_dados' (do config.py) ficam no
+    manifesto para detectar quando o artefato está desatualizado.
+    Retorna o hash do conteúdo.
+    """
+    nomes = list(inputs['nomes_dos_ativos'])
+    retornos_hist = inputs['matriz_retornos_historicos']
+
+    mu = np.asarray(inputs['retornos_medios'], dtype=np.float64)
+    cov = np.asarray(inputs['matriz_cov'], dtype=np.float64)
+    # float32 (base em disco) fica em float32; o resto vira float64
+    matriz_retornos = retornos_hist.to_numpy()
+    if matriz_retornos.dtype not in (np.float32, np.float64):
+        matriz_retornos = matriz_retornos.astype(np.float64)
+    datas = pd.DatetimeIndex(retornos_hist.index).values.astype('datetime64[ns]')
+
+    conteudo_hash = _calcular_hash(mu, cov, matriz_retornos, nomes)
+
+    os.makedirs(pasta, exist_ok=True)
+    geracao, pasta_geracao = publicacao_pasta.nova_geracao(pasta)
+    np.save(os.path.join(pasta_geracao, 'retornos_medios.npy'), mu)
+    np.save(os.path.join(pasta_geracao, 'matriz_cov.npy'), cov)
+    np.save(os.path.join(pasta_geracao, 'matriz_retornos_historicos.npy'), matriz_retornos)
+    np.save(os.path.join(pasta_geracao, 'datas.npy'), datas)
+
+    manifesto = {
+        'versao': VERSAO_FORMATO,
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'nomes_dos_ativos': nomes,
+        'taxa_livre_de_risco': float(inputs['taxa_livre_de_risco']),
+        'data_inicio': str(pd.Timestamp(datas[0]).date()) if len(datas) else None,
+        'data_fim': str(pd.Timestamp(datas[-1]).date()) if len(datas) else None,
+        'tickers_pedidos': list(tickers_pedidos) if tickers_pedidos is not None else None,
+        'anos_de_dados': anos_de_dados,
+        'hash': conteudo_hash,
+    }
+    # O manifesto é gravado por último: ele "publica" a geração
+    publicacao_pasta.publicar(pasta, manifesto, geracao)
+
+    return conteudo_hash
+
+
+# --- 4. LEITURA ---
+
+def ler_manifesto(pasta=PASTA_INPUTS):
+    """Retorna o manifesto (dict) ou None se não existir / for de outra versão."""
+    return publicacao_pasta.ler_manifesto(pasta, VERSAO_FORMATO)
+
+def artefato_atual(manifesto, tickers_pedidos=None, anos_de_dados=None, validade_dias=VALIDADE_DIAS):
+    """
+    Verifica se o artefato ainda vale: gerado há menos de
+    'validade_dias' e com o mesmo universo/horizonte do config.
+    """
+    if manifesto is None:
+        return False
+    gerado_em = datetime.datetime.fromisoformat(manifesto['gerado_em'])
+    if datetime.datetime.now() - gerado_em > datetime.timedelta(days=validade_dias):
+        return False
+    if tickers_pedidos is not None and manifesto.get('tickers_pedidos') != list(tickers_pedidos):
+        return False
+    if anos_de_dados is not None and manifesto.get('anos_de_dados') != anos_de_dados:
+        return False
+    return True
+
+def carregar_inputs(pasta=PASTA_INPUTS, verificar_hash=False):
+    """
+    Carrega o artefato no mesmo formato de
+    'preparar_dados.calcular_inputs_otimizacao()'.
+
+    As matrizes são abertas com memory-map (sem copiar para a
+    memória). Retorna None se o artefato não existir.
+    """
+    manifesto = ler_manifesto(pasta)
+    if manifesto is None:
+        return None
+
+    def caminho(nome):
+        return publicacao_pasta.caminho_matriz(pasta, manifesto, nome)
+    try:
+        mu = np.load(caminho('retornos_medios.npy'), mmap_mode='r')
+        cov = np.load(caminho('matriz_cov.npy'), mmap_mode='r')
+        matriz_retornos = np.load(caminho('matriz_retornos_historicos.npy'), mmap_mode='r')
+        datas = np.load(caminho('datas.npy'))
+    except OSError as e:
+        # (Geração apagada entre a leitura do manifesto e a das matrizes)
+        print(f"*** AVISO: artefato em '{pasta}' incompleto ({e}). Ignorando.")
+        return None
+    nomes = manifesto['nomes_dos_ativos']
+
+    # Checagem barata de consistência entre as matrizes e o manifesto
+    n = len(nomes)
+    if (mu.shape != (n,) or cov.shape != (n, n) or matriz_retornos.ndim != 2
+            or matriz_retornos.shape[1] != n or len(datas) != matriz_retornos.shape[0]):
+        print(f"*** AVISO: formatos das matrizes em '{pasta}' não batem com o manifesto. Ignorando.")
+        return None
+
+    if verificar_hash and _calcular_hash(mu, cov, matriz_retornos, nomes) != manifesto['hash']:
+        print(f"*** AVISO: hash do artefato em '{pasta}' não confere. Ignorando.")
+        return None
+
+    return {
+        'retornos_medios': pd.Series(mu, index=nomes, copy=False),
+        'matriz_cov': pd.DataFrame(cov, index=nomes, columns=nomes, copy=False),
+        'matriz_retornos_historicos': pd.DataFrame(matriz_retornos,
+                                                   index=pd.DatetimeIndex(datas),
+                                                   columns=nomes, copy=False),
+        'taxa_livre_de_risco': manifesto['taxa_livre_de_risco'],
+        'nomes_dos_ativos': nomes,
+        'n_ativos': len(nomes),
+        'hash': manifesto['hash'],
+    }
+
+def carregar_ou_calcular_inputs(pasta=PASTA_INPUTS):
+    """
+    Usa o artefato se ele existir e estiver atual; caso
+    contrário, recalcula via 'preparar_dados' e grava um novo.
+    """
+    import config
+
+    manifesto = ler_manifesto(pasta)
+    if artefato_atual(manifesto, config.LISTA_COMPLETA_ATIVOS, config.ANOS_DE_DADOS):
+        inputs = carregar_inputs(pasta)
+        if inputs is not None:
+            print(f"Inputs carregados do artefato '{pasta}' (hash {inputs['hash'][:12]}).")
+            return inputs
+
+    print(f"Artefato '{pasta}' ausente ou desatualizado. Recalculando inputs...")
+    import preparar_dados
+    inputs = preparar_dados.calcular_inputs_otimizacao()
+    if inputs is not None:
+        salvar_inputs(inputs, pasta, config.LISTA_COMPLETA_ATIVOS, config.ANOS_DE_DADOS)
+    return inputs
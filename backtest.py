@@ -0,0 +1,225 @@
+"""
+================================================
+ARQUIVO DO BACKTEST WALK-FORWARD
+================================================
+
+Verifica como as carteiras de destaque do 'plot.py'
+(Mínimo Risco, Máximo Retorno e Máximo Sharpe) teriam se
+comportado no passado, usando 'matriz_retornos_historicos'.
+
+Em cada data de rebalanceamento:
+1. Reestima μ e Σ na janela anterior ('estimador_momentos.py');
+2. Recalcula a fronteira exata e escolhe a carteira de cada
+   regra, em forma fechada ('analise_fronteira.py');
+3. Deixa os pesos "flutuarem" com os preços até o próximo
+   rebalanceamento.
+
+As estimativas das várias datas rodam em paralelo (pool de
+processos). O caminho das carteiras é calculado de forma
+vetorizada sobre datas e estratégias (sem laço por dia).
+
+Execute: python backtest.py
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import estimador_momentos
+import analise_fronteira
+
+# --- 1. PARÂMETROS DO BACKTEST ---
+
+JANELA_ESTIMACAO = 252         # Pregões usados para estimar μ e Σ
+FREQUENCIA_REBALANCEAMENTO = 'M'  # 'W' semanal, 'M' mensal, 'Q' trimestral
+CUSTO_TRANSACAO = 0.0          # Custo por unidade de giro (ex: 0.001 = 10 bps)
+
+ESTRATEGIAS = ('min_risco', 'max_retorno', 'max_sharpe')
+
+ARQUIVO_CURVAS_CSV = 'backtest_curvas.csv'
+
+
+# --- 2. ESCOLHA DAS CARTEIRAS EM UMA DATA ---
+
+def escolher_carteiras(retornos_janela, taxa_livre_de_risco, metodo_covariancia='amostral',
+                       dias_ano=estimador_momentos.DIAS_UTEIS_ANO):
+    """
+    Estima μ/Σ na janela (T x N) e retorna os pesos exatos
+    (len(ESTRATEGIAS) x N) de cada estratégia ('analise_fronteira.py').
+    """
+    estimador = estimador_momentos.EstimadorJanela.de_retornos(retornos_janela)
+    mu = estimador.media() * dias_ano
+    try:
+        cov = estimador.covariancia(metodo_covariancia) * dias_ano
+        analise = analise_fronteira.AnaliseFronteira(mu, cov, taxa_livre_de_risco)
+    except np.linalg.LinAlgError:
+        # Σ singular (janela curta demais para N ativos): usa shrinkage
+        cov = estimador.covariancia('ledoit_wolf') * dias_ano
+        analise = analise_fronteira.AnaliseFronteira(mu, cov, taxa_livre_de_risco)
+
+    escolhas = {
+        'min_risco': analise.minima_variancia,
+        'max_retorno': analise.maximo_retorno,
+        'max_sharpe': analise.tangente,
+    }
+    return np.vstack([escolhas[e]() for e in ESTRATEGIAS])
+
+def _escolher_carteiras_tarefa(argumentos):
+    return escolher_carteiras(*argumentos)
+
+
+# --- 3. DATAS DE REBALANCEAMENTO ---
+
+def datas_rebalanceamento(indice, janela, frequencia):
+    """
+    Posições (no índice de datas) do primeiro pregão de cada
+    período ('W', 'M', 'Q'), depois de haver 'janela' dias de histórico.
+    """
+    periodos = pd.DatetimeIndex(indice).to_period(frequencia)
+    inicio_periodo = np.flatnonzero(np.r_[True, periodos[1:] != periodos[:-1]])
+    return inicio_periodo[inicio_periodo >= janela]
+
+
+# --- 4. CAMINHO DAS CARTEIRAS (VETORIZADO) ---
+
+def simular_caminho(R, posicoes, pesos, custo_transacao=0.0):
+    """
+    R: retornos diários (T x N); posicoes: K datas de rebalanceamento;
+    pesos: K x S x N (pesos-alvo de cada estratégia em cada data).
+
+    Os pesos definidos na data k valem a partir do retorno desse dia
+    e flutuam com os preços até a data k+1.
+    Retorna (retornos_diarios T' x S, giro K x S), com T' = dias a partir
+    do 1º rebalanceamento.
+    """
+    inicio = posicoes[0]
+    R = R[inicio:]
+    posicoes = posicoes - inicio
+    T = R.shape[0]
+
+    # Crescimento acumulado de cada ativo: C[t] = Π_{u<=t} (1 + R[u])
+    log_C = np.cumsum(np.log1p(R), axis=0)
+    log_C_antes = np.vstack([np.zeros((1, R.shape[1])), log_C[:-1]])   # C[t-1]
+
+    # Segmento (rebalanceamento vigente) de cada dia
+    segmento = np.searchsorted(posicoes, np.arange(T), side='right') - 1
+
+    # Q[k] = w_k / C[t0_k - 1]  ->  V[t] = Σ_n C[t, n] · Q[k(t), n]
+    # (valor da carteira relativo ao início do segmento)
+    fator_inicio = np.exp(-log_C_antes[posicoes])                      # K x N
+    Q = pesos * fator_inicio[:, None, :]                               # K x S x N
+    C = np.exp(log_C)
+    V = np.einsum('tn,tsn->ts', C, Q[segmento])                        # T x S
+
+    # V no dia anterior (1 no primeiro dia de cada segmento)
+    V_anterior = np.vstack([np.ones((1, V.shape[1])), V[:-1]])
+    V_anterior[posicoes] = 1.0
+    retornos = V / V_anterior - 1.0
+
+    # --- Giro: pesos-alvo vs. pesos que "flutuaram" até a data ---
+    giro = np.zeros((len(posicoes), pesos.shape[1]))
+    if len(posicoes) > 1:
+        fim_segmento = posicoes[1:] - 1
+        crescimento = np.exp(log_C[fim_segmento][:, None, :]) * Q[:-1]    # (K-1) x S x N
+        pesos_flutuantes = crescimento / crescimento.sum(axis=2, keepdims=True)
+        giro[1:] = 0.5 * np.abs(pesos[1:] - pesos_flutuantes).sum(axis=2)
+    giro[0] = 0.5 * np.abs(pesos[0]).sum(axis=1)                       # Montagem inicial
+
+    retornos[posicoes] -= custo_transacao * giro
+    return retornos, giro
+
+
+# --- 5. RESULTADO ---
+
+class ResultadoBacktest:
+    """
+    - curvas:     patrimônio acumulado (datas x estratégias, começa em 1)
+    - retornos:   retornos diários (datas x estratégias)
+    - drawdowns:  queda em relação ao pico (datas x estratégias)
+    - giro:       giro em cada rebalanceamento (datas x estratégias)
+    - pesos:      pesos-alvo (K x S x N)
+    - resumo:     métricas anualizadas por estratégia
+    """
+
+    def __init__(self, retornos, giro, pesos, taxa_livre_de_risco, dias_ano):
+        self.retornos = retornos
+        self.giro = giro
+        self.pesos = pesos
+        self.curvas = (1.0 + retornos).cumprod()
+        self.drawdowns = self.curvas / self.curvas.cummax() - 1.0
+
+        anos = len(retornos) / dias_ano
+        retorno_anual = self.curvas.iloc[-1] ** (1.0 / anos) - 1.0
+        volatilidade = retornos.std() * np.sqrt(dias_ano)
+        self.resumo = pd.DataFrame({
+            'Retorno_Anual': retorno_anual,
+            'Volatilidade': volatilidade,
+            'Sharpe': (retorno_anual - taxa_livre_de_risco) / volatilidade,
+            'Max_Drawdown': self.drawdowns.min(),
+            'Giro_Medio': giro.iloc[1:].mean() if len(giro) > 1 else giro.mean(),
+        })
+
+
+# --- 6. FUNÇÃO PRINCIPAL ---
+
+def executar_backtest(matriz_retornos, taxa_livre_de_risco, janela=JANELA_ESTIMACAO,
+                      frequencia=FREQUENCIA_REBALANCEAMENTO, custo_transacao=CUSTO_TRANSACAO,
+                      metodo_covariancia='amostral', n_processos=None,
+                      dias_ano=estimador_momentos.DIAS_UTEIS_ANO):
+    """
+    Backtest walk-forward das estratégias em ESTRATEGIAS sobre a
+    matriz de retornos diários (DataFrame datas x ativos).
+    """
+    R = np.asarray(matriz_retornos, dtype=np.float64)
+    posicoes = datas_rebalanceamento(matriz_retornos.index, janela, frequencia)
+    if len(posicoes) == 0:
+        raise ValueError("Histórico curto demais para a janela de estimação escolhida.")
+
+    # --- Estimação em cada data (em paralelo) ---
+    tarefas = [(R[p - janela:p], taxa_livre_de_risco, metodo_covariancia, dias_ano)
+               for p in posicoes]
+    if n_processos == 1:
+        pesos = [escolher_carteiras(*t) for t in tarefas]
+    else:
+        n_processos = n_processos or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=n_processos) as pool:
+            blocos = max(1, len(tarefas) // (4 * n_processos))
+            pesos = list(pool.map(_escolher_carteiras_tarefa, tarefas, chunksize=blocos))
+    pesos = np.stack(pesos)                                            # K x S x N
+
+    # --- Caminho vetorizado ---
+    retornos, giro = simular_caminho(R, posicoes, pesos, custo_transacao)
+    datas = matriz_retornos.index[posicoes[0]:]
+    return ResultadoBacktest(
+        pd.DataFrame(retornos, index=datas, columns=ESTRATEGIAS),
+        pd.DataFrame(giro, index=matriz_retornos.index[posicoes], columns=ESTRATEGIAS),
+        pesos,
+        taxa_livre_de_risco,
+        dias_ano
+    )
+
+
+# --- 7. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+    import time
+    import artefato_inputs
+
+    print("--- BACKTEST WALK-FORWARD ---")
+    inputs = artefato_inputs.carregar_ou_calcular_inputs()
+    if inputs is None:
+        print("Erro fatal: Não foi possível carregar os dados de input.")
+        exit()
+
+    inicio = time.perf_counter()
+    resultado = executar_backtest(inputs['matriz_retornos_historicos'],
+                                  inputs['taxa_livre_de_risco'])
+    print(f"Backtest concluído em {time.perf_counter() - inicio:.2f}s "
+          f"({len(resultado.giro)} rebalanceamentos).\n")
+
+    with pd.option_context('display.float_format', '{:.4f}'.format):
+        print(resultado.resumo)
+
+    resultado.curvas.to_csv(ARQUIVO_CURVAS_CSV, sep=';', decimal=',')
+    print(f"\nCurvas de patrimônio salvas em '{ARQUIVO_CURVAS_CSV}'.")
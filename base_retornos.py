@@ -0,0 +1,320 @@
+"""
+================================================
+ARQUIVO DA BASE DE RETORNOS EM DISCO (MEMORY-MAP)
+================================================
+
+O 'preparar_dados.py' monta um DataFrame float64 com TODOS os
+preços, depois um segundo com os retornos, e os dois ficam na
+memória. Com milhares de tickers e 20 anos de pregões, são
+vários GB de cópias antes de o otimizador começar.
+
+Este arquivo guarda os retornos diários em uma pasta:
+- retornos.npy: matriz T x N contígua (float32 por padrão),
+  aberta com memory-map: só as páginas lidas vão para a memória;
+- datas.npy: índice de datas (T);
+- manifesto.json: versão, tickers (N), dtype e período.
+
+1. EscritorBaseRetornos: recebe os PREÇOS em blocos de tickers
+   (ex: 100 por vez), alinha ao calendário de pregões e grava em
+   disco. Só um bloco de preços fica na memória. Ao final, as
+   datas com algum preço faltando e os ativos sem dados são
+   descartados e os retornos são gravados, com o mesmo resultado
+   do 'alinhar_retornos' sobre o DataFrame inteiro;
+2. BaseRetornos: recortes por janela de datas e por tickers SEM
+   cópia ('recorte'); μ e Σ calculados em blocos de linhas
+   ('media_covariancia'), acumulando em float64.
+
+Recortes de datas são sempre "views" do arquivo. Recortes de
+tickers também, se os tickers formarem um intervalo (ou passo
+constante) da base; senão, as colunas são separadas bloco a
+bloco, só na hora de ler.
+"""
+
+import os
+import json
+import mmap
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import estimador_momentos
+
+# --- 1. PARÂMETROS ---
+
+PASTA_BASE_RETORNOS = 'base_retornos'
+VERSAO_FORMATO = 1
+ARQUIVO_MANIFESTO = 'manifesto.json'
+
+DTYPE_PADRAO = 'float32'     # Precisão da matriz em disco ('float32' ou 'float64')
+LIMITE_MEMORIA_MB = 16       # Tamanho máximo de cada bloco (em float64)
+DIAS_UTEIS_ANO = 252
+
+
+# --- 2. GRAVAÇÃO (EM BLOCOS DE TICKERS) ---
+
+class EscritorBaseRetornos:
+    """
+    Grava a base a partir de blocos de PREÇOS.
+
+        escritor = EscritorBaseRetornos(pasta, calendario, tickers)
+        for bloco in blocos_de_tickers:
+            escritor.gravar_precos(baixar(bloco))   # DataFrame datas x tickers
+        base = escritor.finalizar()
+
+    Os preços alinhados vão para um arquivo temporário coluna a
+    coluna (cada ticker contíguo, float64, gravado com write: nada
+    fica mapeado na memória). 'finalizar' calcula os retornos e
+    grava a matriz final em blocos de linhas.
+    """
+
+    def __init__(self, pasta, calendario, tickers, dtype=DTYPE_PADRAO):
+        self.pasta = pasta
+        self.calendario = pd.DatetimeIndex(calendario)
+        self.tickers = list(tickers)
+        self.dtype = np.dtype(dtype)
+        self._posicoes = {t: i for i, t in enumerate(self.tickers)}
+        self._com_dados = np.zeros(len(self.tickers), dtype=bool)
+        # Linhas do calendário com os preços de TODOS os tickers com dados
+        self._linhas_completas = np.ones(len(self.calendario), dtype=bool)
+
+        os.makedirs(pasta, exist_ok=True)
+        self._caminho_temp = os.path.join(pasta, f'precos.{os.getpid()}.tmp')
+        self._arquivo = open(self._caminho_temp, 'w+b')
+        self._arquivo.truncate(8 * len(self.calendario) * len(self.tickers))
+
+    def gravar_precos(self, precos):
+        """
+        Alinha um bloco de preços ao calendário (como 'alinhar_retornos':
+        repete o último preço nas datas sem negociação) e grava.
+        Tickers fora da lista do escritor são ignorados.
+        """
+        colunas = [t for t in precos.columns if t in self._posicoes]
+        if not colunas:
+            return
+        alinhados = precos[colunas].reindex(self.calendario, method='ffill')
+        T = len(self.calendario)
+        for ticker in colunas:
+            valores = alinhados[ticker].to_numpy(dtype=np.float64)
+            validos = ~np.isnan(valores)
+            if not validos.any():
+                continue
+            j = self._posicoes[ticker]
+            self._com_dados[j] = True
+            self._linhas_completas &= validos
+            self._arquivo.seek(8 * T * j)
+            self._arquivo.write(valores.tobytes())
+
+    def finalizar(self):
+        """
+        Descarta os tickers sem dados e as datas em que falta algum
+        preço, calcula os retornos entre as datas mantidas (como
+        'pct_change' depois do 'dropna'), grava a matriz final e o
+        manifesto e devolve a base.
+        """
+        colunas = np.flatnonzero(self._com_dados)
+        mantidas = np.flatnonzero(self._linhas_completas)
+        if len(colunas) == 0 or len(mantidas) < 2:
+            self._descartar_temp()
+            raise ValueError("Os ativos não têm nenhum dia de retorno em comum.")
+
+        T = len(self.calendario)
+        n_linhas = len(mantidas) - 1
+        caminho = os.path.join(self.pasta, 'retornos.npy')
+        # (Por linha do bloco: preços + retornos + conversão para o dtype)
+        passo = _linhas_por_bloco(3 * len(colunas))
+        with open(caminho + '.tmp', 'wb') as saida:
+            np.lib.format.write_array_header_1_0(saida, {
+                'descr': np.lib.format.dtype_to_descr(self.dtype),
+                'fortran_order': False,
+                'shape': (n_linhas, len(colunas)),
+            })
+            for k in range(0, n_linhas, passo):
+                # Retornos k..k+passo usam os preços das datas mantidas k..k+passo (+1)
+                linhas = mantidas[k:k + passo + 1]
+                primeira, ultima = linhas[0], linhas[-1] + 1
+                precos = np.empty((len(linhas), len(colunas)))
+                for c, j in enumerate(colunas):
+                    self._arquivo.seek(8 * (T * j + primeira))
+                    trecho = np.fromfile(self._arquivo, dtype=np.float64, count=ultima - primeira)
+                    precos[:, c] = trecho[linhas - primeira]
+                retornos = precos[1:] / precos[:-1] - 1.0
+                retornos.astype(self.dtype, copy=False).tofile(saida)
+        os.replace(caminho + '.tmp', caminho)
+        self._descartar_temp()
+
+        sem_dados = [self.tickers[i] for i in np.flatnonzero(~self._com_dados)]
+        _publicar(self.pasta, self.calendario[mantidas[1:]], [self.tickers[i] for i in colunas],
+                  sem_dados, self.dtype)
+        return BaseRetornos.abrir(self.pasta)
+
+    def _descartar_temp(self):
+        self._arquivo.close()
+        os.remove(self._caminho_temp)
+
+def _publicar(pasta, datas, tickers, tickers_sem_dados, dtype):
+    """Grava as datas e, por último, o manifesto (que "publica" a base)."""
+    np.save(os.path.join(pasta, 'datas.npy'), datas.values.astype('datetime64[ns]'))
+    manifesto = {
+        'versao': VERSAO_FORMATO,
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'tickers': list(tickers),
+        'tickers_sem_dados': list(tickers_sem_dados),
+        'dtype': np.dtype(dtype).name,
+        'data_inicio': str(datas[0].date()) if len(datas) else None,
+        'data_fim': str(datas[-1].date()) if len(datas) else None,
+    }
+    caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+
+def gravar_retornos(retornos, pasta=PASTA_BASE_RETORNOS, dtype=DTYPE_PADRAO):
+    """Grava um DataFrame de retornos (datas x tickers) já pronto como base."""
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, 'retornos.npy')
+    matriz = np.lib.format.open_memmap(caminho + '.tmp', mode='w+', dtype=np.dtype(dtype),
+                                       shape=retornos.shape)
+    matriz[:] = retornos.to_numpy()
+    matriz.flush()
+    del matriz
+    os.replace(caminho + '.tmp', caminho)
+    _publicar(pasta, pd.DatetimeIndex(retornos.index), retornos.columns, [], dtype)
+    return BaseRetornos.abrir(pasta)
+
+
+# --- 3. LEITURA E RECORTES ---
+
+def _linhas_por_bloco(n_colunas, limite_memoria_mb=LIMITE_MEMORIA_MB):
+    """Nº de linhas por bloco para um bloco em float64 caber no limite."""
+    return max(1, int(limite_memoria_mb * 2**20 // (8 * max(n_colunas, 1))))
+
+def _como_fatia(posicoes):
+    """Posições com passo constante e positivo viram uma fatia (view); senão, None."""
+    if len(posicoes) == 0:
+        return None
+    if len(posicoes) == 1:
+        return slice(posicoes[0], posicoes[0] + 1)
+    passos = np.diff(posicoes)
+    if passos[0] > 0 and np.all(passos == passos[0]):
+        return slice(posicoes[0], posicoes[-1] + 1, int(passos[0]))
+    return None
+
+def _liberar_paginas(bloco):
+    """
+    Devolve ao sistema as páginas do arquivo já lidas pelo bloco
+    (madvise DONTNEED; os dados continuam no arquivo e são relidos
+    se preciso). Sem isso, ler a base inteira em blocos deixa o
+    arquivo todo contado na memória residente do processo.
+    Sem efeito fora do Linux ou se o bloco não vier de um memmap.
+    """
+    arquivo = getattr(bloco, '_mmap', None)
+    if arquivo is None or not hasattr(mmap, 'MADV_DONTNEED') or bloco.size == 0:
+        return
+    endereco_mapa = np.frombuffer(arquivo, dtype=np.uint8).ctypes.data
+    inicio = bloco.ctypes.data - endereco_mapa
+    fim = min(inicio + bloco.shape[0] * bloco.strides[0], len(arquivo))
+    inicio -= inicio % mmap.PAGESIZE
+    arquivo.madvise(mmap.MADV_DONTNEED, inicio, fim - inicio)
+
+class BaseRetornos:
+    """
+    Retornos diários (T x N) abertos com memory-map.
+    'recorte' devolve outra BaseRetornos sobre o mesmo arquivo.
+    """
+
+    def __init__(self, dados, datas, tickers, colunas=None, pasta=None):
+        self._dados = dados            # Matriz (ou view) com todas as colunas da base
+        self._colunas = colunas        # None, ou posições que não formam uma fatia
+        self.datas = pd.DatetimeIndex(datas)
+        self.tickers = list(tickers)
+        self.pasta = pasta
+
+    @classmethod
+    def abrir(cls, pasta=PASTA_BASE_RETORNOS):
+        """Abre a base da pasta (ou None se não existir / for de outra versão)."""
+        caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, encoding='utf-8') as f:
+            manifesto = json.load(f)
+        if manifesto.get('versao') != VERSAO_FORMATO:
+            return None
+        dados = np.load(os.path.join(pasta, 'retornos.npy'), mmap_mode='r')
+        datas = np.load(os.path.join(pasta, 'datas.npy'))
+        return cls(dados, datas, manifesto['tickers'], pasta=pasta)
+
+    @property
+    def shape(self):
+        return (len(self.datas), len(self.tickers))
+
+    @property
+    def dtype(self):
+        return self._dados.dtype
+
+    @property
+    def sem_copia(self):
+        """True se 'matriz' é uma view do arquivo (sem cópia)."""
+        return self._colunas is None
+
+    @property
+    def matriz(self):
+        """Matriz T x N: view do arquivo se 'sem_copia'; senão, uma cópia."""
+        if self._colunas is None:
+            return self._dados
+        return self._dados[:, self._colunas]
+
+    def recorte(self, inicio=None, fim=None, tickers=None):
+        """
+        Janela de datas [inicio, fim] (inclusive; None = sem limite)
+        e/ou subconjunto de tickers, sem copiar os dados.
+        """
+        primeira = 0 if inicio is None else self.datas.searchsorted(pd.Timestamp(inicio), side='left')
+        ultima = len(self.datas) if fim is None else self.datas.searchsorted(pd.Timestamp(fim), side='right')
+        dados = self._dados[primeira:ultima]
+
+        colunas = self._colunas
+        nomes = self.tickers
+        if tickers is not None:
+            posicao = {t: i for i, t in enumerate(self.tickers)}
+            faltando = [t for t in tickers if t not in posicao]
+            if faltando:
+                raise KeyError(f"Tickers fora da base: {faltando}")
+            posicoes = np.array([posicao[t] for t in tickers], dtype=np.int64)
+            if colunas is not None:
+                posicoes = colunas[posicoes]
+            fatia = _como_fatia(posicoes)
+            if fatia is not None:
+                dados, colunas = dados[:, fatia], None
+            else:
+                colunas = posicoes
+            nomes = list(tickers)
+        return BaseRetornos(dados, self.datas[primeira:ultima], nomes, colunas, self.pasta)
+
+    def blocos(self, linhas_por_bloco=None):
+        """Gera os dias em blocos (float64), em ordem cronológica."""
+        if linhas_por_bloco is None:
+            linhas_por_bloco = _linhas_por_bloco(len(self.tickers))
+        for inicio in range(0, len(self.datas), linhas_por_bloco):
+            linhas = self._dados[inicio:inicio + linhas_por_bloco]
+            bloco = linhas if self._colunas is None else linhas[:, self._colunas]
+            yield np.asarray(bloco, dtype=np.float64)
+            _liberar_paginas(linhas)
+
+    def media_covariancia(self, metodo='amostral', meia_vida=None, dias_ano=DIAS_UTEIS_ANO,
+                          linhas_por_bloco=None):
+        """
+        μ e Σ anualizados (Series / DataFrame, como 'estimar_mu_sigma'),
+        somando bloco a bloco: a memória fica em O(bloco·N + N²).
+        """
+        n = len(self.tickers)
+        blocos = self.blocos(linhas_por_bloco)
+        if meia_vida:
+            estimador = estimador_momentos.EstimadorEWMA.de_blocos(blocos, n, meia_vida)
+        else:
+            estimador = estimador_momentos.EstimadorJanela.de_blocos(blocos, n)
+        return estimador_momentos.momentos_anualizados(estimador, self.tickers, metodo, dias_ano)
+
+    def como_dataframe(self):
+        """DataFrame (datas x tickers) sobre a matriz, sem cópia se 'sem_copia'."""
+        return pd.DataFrame(self.matriz, index=self.datas, columns=self.tickers, copy=False)
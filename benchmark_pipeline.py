@@ -0,0 +1,327 @@
+"""
+================================================
+BENCHMARK SINTÉTICO DO PIPELINE COMPLETO
+================================================
+
+Mede o desempenho de cada etapa do projeto SEM acessar a
+internet, com universos sintéticos realistas:
+- estrutura de fatores + caudas pesadas (t de Student);
+- mistura de ativos da B3 (dias úteis, com feriados) e
+  criptomoedas (24/7), alinhados pelo calendário do '^BVSP'.
+
+Etapas medidas (tempo, pico de memória e qualidade):
+1. alinhamento:  preparar_dados.calcular_retornos_diarios
+2. mu_sigma:     estimador_momentos.estimar_mu_sigma (com o
+                 METODO_COVARIANCIA e a MEIA_VIDA_EWMA do preparar_dados)
+3. avaliacao:    OtimizacaoPortfolio._evaluate (população inteira)
+4. otimizacao:   NSGA-II (qualidade = HV / HV da fronteira exata)
+5. escrita_csv:  otimizar.montar_dataframe_resultados + CSV
+6. analise:      leitura do CSV + plot.calcular_custo_beneficio
+7. escrita_binaria / analise_binaria: o mesmo com 'resultados_binarios'
+   (só os objetivos + os pesos das 3 carteiras de destaque)
+
+Os resultados podem ser salvos como baseline e comparados
+nas próximas execuções, para pegar regressões antes da produção.
+
+Uso:
+    python benchmark_pipeline.py                    # preset 'rapido'
+    python benchmark_pipeline.py --preset completo
+    python benchmark_pipeline.py --salvar-baseline  # grava a baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import preparar_dados
+import estimador_momentos
+import modelo_problema
+import fronteira_exata
+import otimizacao_paralela
+import convergencia
+import otimizar
+import plot
+import resultados_binarios
+
+# --- 1. PARÂMETROS DO BENCHMARK ---
+
+# Cenários (N = nº de ativos, T = anos de histórico)
+PRESETS = {
+    'rapido':   {'n_ativos': [30, 300],             'anos': [1, 5]},
+    'completo': {'n_ativos': [30, 300, 1000, 5000], 'anos': [1, 5, 20]},
+}
+
+FRACAO_CRIPTO = 0.1          # Fração do universo negociada 24/7
+N_FATORES_SINTETICOS = 5     # Fatores comuns dos retornos
+GRAUS_LIBERDADE_T = 4        # Caudas pesadas (t de Student)
+FERIADOS_POR_ANO = 10        # Dias úteis sem pregão na B3
+
+POPULACAO_BENCH = 150        # Como no otimizar.py
+GERACOES_BENCH = 30          # Orçamento fixo do NSGA-II no benchmark
+REPETICOES_AVALIACAO = 20    # Nº de chamadas do _evaluate medidas
+LIMITE_N_EXATO = 1000        # Acima disso não calcula a fronteira exata (CLA)
+
+ARQUIVO_BASELINE = 'benchmark_baseline.json'
+TOLERANCIA_TEMPO = 0.5       # Regressão se ficar 50% mais lento...
+PISO_TEMPO_S = 0.05          # ...e a etapa levar mais que isso (ruído)
+TOLERANCIA_MEMORIA = 0.25    # Regressão se o pico de memória subir 25%
+TOLERANCIA_QUALIDADE = 0.02  # Regressão se a qualidade cair 0.02
+# Campos que identificam o estimador medido (baselines de outro estimador não são comparadas)
+CHAVES_CONFIGURACAO = ('metodo', 'meia_vida')
+
+
+# --- 2. DADOS SINTÉTICOS ---
+
+class FornecedorSintetico:
+    """
+    Fornecedor falso com a mesma interface do
+    'preparar_dados.FornecedorYahooBCB' (baixar_precos/baixar_selic).
+    Todos os preços são gerados uma única vez, na criação.
+    """
+
+    def __init__(self, n_ativos, anos, semente=0):
+        rng = np.random.default_rng(semente)
+        self.fim = pd.Timestamp('2025-01-01')
+        self.inicio = self.fim - pd.Timedelta(days=int(anos * 365.25))
+        dias = pd.date_range(self.inicio, self.fim - pd.Timedelta(days=1), freq='D')
+
+        # Calendário da B3: dias úteis menos alguns feriados
+        uteis = dias[dias.dayofweek < 5]
+        n_feriados = min(len(uteis) // 2, int(FERIADOS_POR_ANO * anos))
+        feriados = rng.choice(len(uteis), size=n_feriados, replace=False)
+        pregoes = uteis.delete(feriados)
+
+        n_cripto = int(round(n_ativos * FRACAO_CRIPTO))
+        self.tickers = ([f'SINT{i:04d}.SA' for i in range(n_ativos - n_cripto)]
+                        + [f'CRIP{i:04d}-USD' for i in range(n_cripto)])
+
+        # Retornos diários: fatores + idiossincrático, com caudas t
+        n_dias = len(dias)
+        cargas = rng.normal(0.0, 1.0, size=(N_FATORES_SINTETICOS, n_ativos))
+        cargas[0] = np.abs(cargas[0]) + 0.5                 # Fator "mercado"
+        escala_t = np.sqrt((GRAUS_LIBERDADE_T - 2) / GRAUS_LIBERDADE_T)
+        fatores = rng.standard_t(GRAUS_LIBERDADE_T, size=(n_dias, N_FATORES_SINTETICOS)) * escala_t * 0.006
+        retornos = fatores @ cargas
+        retornos += rng.standard_t(GRAUS_LIBERDADE_T, size=(n_dias, n_ativos)) * escala_t * 0.012
+        retornos += rng.normal(0.0003, 0.0003, size=n_ativos)
+        retornos[:, n_ativos - n_cripto:] *= 2.5               # Cripto: mais volátil
+
+        precos = 100.0 * np.exp(np.cumsum(retornos, axis=0))
+        self.precos = pd.DataFrame(precos, index=dias, columns=self.tickers)
+        # Ativos da B3 só têm preço nos dias de pregão
+        b3 = self.tickers[:n_ativos - n_cripto]
+        self.precos.loc[~self.precos.index.isin(pregoes), b3] = np.nan
+
+        self.benchmark = pd.Series(self.precos[b3].mean(axis=1).values, index=dias)
+        self.benchmark[~self.benchmark.index.isin(pregoes)] = np.nan
+
+    def baixar_precos(self, tickers, inicio, fim):
+        tabela = self.precos.assign(**{'^BVSP': self.benchmark})
+        return tabela.loc[pd.Timestamp(inicio):pd.Timestamp(fim) - pd.Timedelta(days=1), list(tickers)]
+
+    def baixar_selic(self, inicio, fim):
+        dias = pd.bdate_range(inicio, fim)
+        return pd.Series(10.5, index=dias)
+
+
+# --- 3. MEDIÇÃO ---
+
+def medir(funcao, *args, **kwargs):
+    """Executa 'funcao' e retorna (resultado, segundos, pico de memória em MB)."""
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao(*args, **kwargs)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    return resultado, segundos, max(pico - base, 0) / 1e6
+
+def hipervolume_relativo(F, F_exata):
+    """HV da fronteira F dividido pelo HV da fronteira exata (mesma referência)."""
+    amplitude = np.ptp(F_exata, axis=0)
+    referencia = F_exata.max(axis=0) + 0.1 * amplitude
+    hv_exato = convergencia.hipervolume_2d(F_exata, referencia)
+    if hv_exato <= 0:
+        return None
+    return convergencia.hipervolume_2d(F, referencia) / hv_exato
+
+
+# --- 4. EXECUÇÃO DE UM CENÁRIO ---
+
+def executar_cenario(n_ativos, anos, pasta_temp):
+    """Roda todas as etapas para um (N, T) e retorna a lista de medições."""
+    cenario = f'N={n_ativos},T={anos}a'
+    medicoes = []
+
+    def registrar(etapa, segundos, pico_mb, qualidade=None, **extras):
+        medicoes.append({'cenario': cenario, 'etapa': etapa, 'tempo_s': segundos,
+                         'pico_mb': pico_mb, 'qualidade': qualidade, **extras})
+        texto_qualidade = f" | qualidade {qualidade:.4f}" if qualidade is not None else ""
+        print(f"  {etapa:<15} {segundos:9.3f}s | {pico_mb:9.1f} MB{texto_qualidade}")
+
+    print(f"\n--- Cenário {cenario} ---")
+    fornecedor = FornecedorSintetico(n_ativos, anos)
+    inicio, fim = fornecedor.inicio.date().isoformat(), fornecedor.fim.date().isoformat()
+
+    # 1. Alinhamento ao calendário de pregões
+    retornos, t, m = medir(preparar_dados.calcular_retornos_diarios,
+                           fornecedor.tickers, preparar_dados.BENCHMARK_MERCADO,
+                           inicio, fim, fonte=fornecedor)
+    registrar('alinhamento', t, m, dias=len(retornos))
+
+    # 2. μ e Σ (o mesmo estimador configurado no 'preparar_dados')
+    def mu_sigma():
+        return estimador_momentos.estimar_mu_sigma(retornos, preparar_dados.METODO_COVARIANCIA,
+                                                   preparar_dados.MEIA_VIDA_EWMA,
+                                                   preparar_dados.DIAS_UTEIS_ANO)
+    (mu, cov), t, m = medir(mu_sigma)
+    registrar('mu_sigma', t, m, metodo=preparar_dados.METODO_COVARIANCIA,
+              meia_vida=preparar_dados.MEIA_VIDA_EWMA)
+    mu, cov = mu.to_numpy(), cov.to_numpy()
+
+    # 3. Avaliação da população
+    problema = modelo_problema.OtimizacaoPortfolio(mu, cov)
+    x = np.random.default_rng(1).dirichlet(np.ones(n_ativos), size=POPULACAO_BENCH)
+    def avaliar():
+        for _ in range(REPETICOES_AVALIACAO):
+            problema._evaluate(x, {})
+    _, t, m = medir(avaliar)
+    registrar('avaliacao', t / REPETICOES_AVALIACAO, m)
+
+    # 4. Otimização (NSGA-II com orçamento fixo)
+    def otimizar_nsga2():
+        from pymoo.optimize import minimize
+        algoritmo = otimizacao_paralela.criar_nsga2(POPULACAO_BENCH, True)
+        return minimize(problema, algoritmo, ('n_gen', GERACOES_BENCH), seed=1, verbose=False)
+    res, t, m = medir(otimizar_nsga2)
+    qualidade = None
+    if n_ativos <= LIMITE_N_EXATO and res.F is not None:
+        try:
+            exata = fronteira_exata.calcular_fronteira_exata(mu, cov, n_pontos=POPULACAO_BENCH)
+            qualidade = hipervolume_relativo(res.F, exata.F)
+        except np.linalg.LinAlgError:
+            qualidade = None  # Σ singular (N >= T): sem referência exata
+    registrar('otimizacao', t, m, qualidade)
+
+    # 5. Escrita do CSV
+    arquivo_csv = os.path.join(pasta_temp, f'resultados_{n_ativos}_{anos}.csv')
+    nomes = list(retornos.columns)
+    def escrever_csv():
+        df = otimizar.montar_dataframe_resultados(res.F, res.X, nomes)
+        df.to_csv(arquivo_csv, index=False, sep=';', decimal=',')
+    _, t, m = medir(escrever_csv)
+    registrar('escrita_csv', t, m)
+
+    # 6. Análise (como no plot.py)
+    def analisar():
+        df = pd.read_csv(arquivo_csv, sep=';', decimal=',')
+        df = plot.calcular_custo_beneficio(df, 0.105)
+        return (df['Risco_Anual'].idxmin(), df['Retorno_Anual'].idxmax(), df['Sharpe_Ratio'].idxmax())
+    _, t, m = medir(analisar)
+    registrar('analise', t, m)
+
+    # 7. Mesmas etapas no formato binário
+    pasta_binaria = os.path.join(pasta_temp, f'resultados_{n_ativos}_{anos}')
+    _, t, m = medir(lambda: resultados_binarios.salvar_resultados(res.F, res.X, nomes, pasta_binaria))
+    registrar('escrita_binaria', t, m)
+
+    def analisar_binario():
+        df = resultados_binarios.carregar_resultados(
+            pasta_binaria, colunas=list(resultados_binarios.COLUNAS_OBJETIVOS))
+        df = plot.calcular_custo_beneficio(df, 0.105)
+        indices = [df['Risco_Anual'].idxmin(), df['Retorno_Anual'].idxmax(), df['Sharpe_Ratio'].idxmax()]
+        return resultados_binarios.carregar_pesos(pasta_binaria, indices)
+    _, t, m = medir(analisar_binario)
+    registrar('analise_binaria', t, m)
+
+    return medicoes
+
+
+# --- 5. COMPARAÇÃO COM A BASELINE ---
+
+def _configuracao_por_cenario(medicoes):
+    """{cenario: (metodo, meia_vida)} das etapas que registram o estimador."""
+    return {m['cenario']: tuple(m.get(chave) for chave in CHAVES_CONFIGURACAO)
+            for m in medicoes if any(chave in m for chave in CHAVES_CONFIGURACAO)}
+
+def comparar_com_baseline(medicoes, baseline):
+    """
+    Retorna a lista de regressões (textos) em relação à baseline.
+    Cenários cuja baseline foi medida com outro estimador (metodo /
+    meia_vida) não são comparados: o custo e a qualidade de todas as
+    etapas seguintes mudam junto, e a diferença não seria regressão.
+    """
+    anteriores = {(b['cenario'], b['etapa']): b for b in baseline}
+    config_atual = _configuracao_por_cenario(medicoes)
+    config_antiga = _configuracao_por_cenario(baseline)
+    ignorados = sorted(c for c in config_atual
+                       if c in config_antiga and config_antiga[c] != config_atual[c])
+    for cenario in ignorados:
+        print(f"AVISO: cenário {cenario} não comparado — a baseline usou o estimador "
+              f"{config_antiga[cenario]} e esta execução {config_atual[cenario]} "
+              f"(use --salvar-baseline para renová-la).")
+    regressoes = []
+    for atual in medicoes:
+        antiga = anteriores.get((atual['cenario'], atual['etapa']))
+        if antiga is None or atual['cenario'] in ignorados:
+            continue
+        rotulo = f"{atual['cenario']} / {atual['etapa']}"
+        if (atual['tempo_s'] > PISO_TEMPO_S
+                and atual['tempo_s'] > antiga['tempo_s'] * (1 + TOLERANCIA_TEMPO)):
+            regressoes.append(f"{rotulo}: tempo {antiga['tempo_s']:.3f}s -> {atual['tempo_s']:.3f}s")
+        if (antiga['pico_mb'] > 1.0
+                and atual['pico_mb'] > antiga['pico_mb'] * (1 + TOLERANCIA_MEMORIA)):
+            regressoes.append(f"{rotulo}: memória {antiga['pico_mb']:.1f} MB -> {atual['pico_mb']:.1f} MB")
+        if (atual['qualidade'] is not None and antiga['qualidade'] is not None
+                and atual['qualidade'] < antiga['qualidade'] - TOLERANCIA_QUALIDADE):
+            regressoes.append(f"{rotulo}: qualidade {antiga['qualidade']:.4f} -> {atual['qualidade']:.4f}")
+    return regressoes
+
+
+# --- 6. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmark sintético do pipeline de otimização.")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='rapido')
+    parser.add_argument('--baseline', default=ARQUIVO_BASELINE,
+                        help="Arquivo JSON da baseline (leitura e gravação).")
+    parser.add_argument('--salvar-baseline', action='store_true',
+                        help="Grava os resultados desta execução como a nova baseline.")
+    argumentos = parser.parse_args()
+
+    print("--- BENCHMARK SINTÉTICO DO PIPELINE ---")
+    print(f"Preset: {argumentos.preset}")
+
+    tracemalloc.start()
+    medicoes = []
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        for n_ativos in PRESETS[argumentos.preset]['n_ativos']:
+            for anos in PRESETS[argumentos.preset]['anos']:
+                medicoes.extend(executar_cenario(n_ativos, anos, pasta_temp))
+    tracemalloc.stop()
+
+    if argumentos.salvar_baseline:
+        with open(argumentos.baseline, 'w', encoding='utf-8') as f:
+            json.dump(medicoes, f, indent=2)
+        print(f"\nBaseline salva em '{argumentos.baseline}'.")
+    elif os.path.exists(argumentos.baseline):
+        with open(argumentos.baseline, encoding='utf-8') as f:
+            regressoes = comparar_com_baseline(medicoes, json.load(f))
+        if regressoes:
+            print("\n*** REGRESSÕES EM RELAÇÃO À BASELINE ***")
+            for texto in regressoes:
+                print(f"  {texto}")
+            sys.exit(1)
+        print("\nNenhuma regressão em relação à baseline.")
+    else:
+        print(f"\nBaseline '{argumentos.baseline}' não encontrada (use --salvar-baseline).")
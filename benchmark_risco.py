@@ -0,0 +1,80 @@
+"""
+================================================
+BENCHMARK DOS MODELOS DE RISCO
+================================================
+
+Compara o tempo de avaliação do risco (w^T Σ w) de uma
+população inteira com:
+- o einsum original sobre a Σ densa;
+- os modelos de 'modelo_risco.py' (densa via BLAS, Cholesky,
+  K fatores em float64 e float32).
+
+Usa dados sintéticos (modelo de fatores), sem acessar a internet.
+Execute: python benchmark_risco.py
+"""
+
+import time
+
+import numpy as np
+
+import modelo_risco
+
+# --- 1. PARÂMETROS DO BENCHMARK ---
+TAMANHOS_UNIVERSO = [30, 300, 1000, 3000]  # Valores de N
+POPULACAO = 150                             # Linhas de 'x' (como no otimizar.py)
+N_FATORES = 20                              # K do modelo fatorial
+REPETICOES = 5                              # Tomamos o melhor tempo
+
+
+# --- 2. FUNÇÕES AUXILIARES ---
+
+def gerar_universo_sintetico(n_ativos, n_fatores, semente=0):
+    """Cria (cargas, risco_especifico) anuais plausíveis."""
+    rng = np.random.default_rng(semente)
+    cargas = rng.normal(0.0, 0.25 / np.sqrt(n_fatores), size=(n_ativos, n_fatores))
+    cargas[:, 0] = np.abs(cargas[:, 0]) + 0.15          # Fator "mercado"
+    especifico = rng.uniform(0.01, 0.09, size=n_ativos)
+    return cargas, especifico
+
+def cronometrar(funcao, x):
+    """Melhor tempo (em ms) entre REPETICOES execuções."""
+    melhor = np.inf
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao(x)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000.0
+
+
+# --- 3. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+
+    print("--- BENCHMARK: AVALIAÇÃO DO RISCO DA POPULAÇÃO ---")
+    print(f"População: {POPULACAO} | Fatores (K): {N_FATORES}\n")
+    print(f"{'N':>6} | {'einsum':>10} | {'densa':>10} | {'cholesky':>10} "
+          f"| {'fatorial':>10} | {'fat. f32':>10} | {'ganho':>7} | {'erro f32':>9}")
+    print("-" * 94)
+
+    for n in TAMANHOS_UNIVERSO:
+        cargas, especifico = gerar_universo_sintetico(n, N_FATORES)
+        fatorial = modelo_risco.RiscoFatorial(cargas, especifico)
+        fatorial_32 = modelo_risco.RiscoFatorial(cargas, especifico, precisao='float32')
+        matriz_cov = fatorial.matriz_densa()
+        densa = modelo_risco.RiscoDenso(matriz_cov)
+        cholesky = modelo_risco.RiscoFatorado.de_cholesky(matriz_cov)
+
+        x = np.random.default_rng(1).dirichlet(np.ones(n), size=POPULACAO)
+
+        t_einsum = cronometrar(lambda w: np.einsum('ij,jk,ik->i', w, matriz_cov, w), x)
+        t_densa = cronometrar(densa.variancia, x)
+        t_chol = cronometrar(cholesky.variancia, x)
+        t_fat = cronometrar(fatorial.variancia, x)
+        t_fat32 = cronometrar(fatorial_32.variancia, x)
+
+        referencia = np.einsum('ij,jk,ik->i', x, matriz_cov, x)
+        erro_32 = np.max(np.abs(fatorial_32.variancia(x) - referencia) / referencia)
+
+        print(f"{n:>6} | {t_einsum:>8.2f}ms | {t_densa:>8.2f}ms | {t_chol:>8.2f}ms "
+              f"| {t_fat:>8.2f}ms | {t_fat32:>8.2f}ms | {t_einsum / t_fat:>6.1f}x | {erro_32:>9.1e}")
+
+    print("\n('ganho' = einsum denso / modelo fatorial float64)")
@@ -0,0 +1,243 @@
+"""
+================================================
+ARQUIVO DE CACHE LOCAL DOS DADOS DE MERCADO
+================================================
+
+Este arquivo guarda em disco as séries baixadas do yfinance
+e do BCB, para que as próximas execuções baixem apenas
+as datas que ainda faltam (o "delta" no fim da série).
+
+Formato: um arquivo '.npz' por série (ticker ou Selic),
+com as colunas 'datas' e 'valores' e o intervalo de datas
+já coberto. Assim cada ativo é lido/atualizado isoladamente.
+
+Como os preços vêm ajustados (dividendos e desdobramentos), cada
+delta é conferido contra o cache em alguns dias de sobreposição:
+se o ajuste mudou, a série do ativo é baixada inteira de novo.
+
+O download em si fica a cargo de um "fornecedor" plugável
+(qualquer objeto com os métodos 'baixar_precos' e
+'baixar_selic'), o que permite trocar o yfinance/bcb por
+uma fonte local falsa em testes.
+"""
+
+import os
+import re
+import threading
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# --- 1. PARÂMETROS DO CACHE ---
+
+# Pasta padrão onde os arquivos do cache são gravados
+PASTA_CACHE_PADRAO = 'cache_dados'
+
+# Nome (chave) da série da Selic dentro do cache
+CHAVE_SELIC = 'SELIC'
+
+# Os preços 'auto_adjust' do yfinance são reajustados para trás a cada
+# dividendo/desdobramento: cada trecho novo é baixado com alguns dias
+# de sobreposição com o cache e, se os preços da sobreposição mudaram
+# (além da tolerância relativa), a série inteira é baixada de novo.
+DIAS_SOBREPOSICAO = 10
+TOLERANCIA_AJUSTE = 1e-4
+
+
+# --- 2. FUNÇÕES AUXILIARES ---
+
+def _nome_arquivo(chave):
+    """Converte um ticker (ex: '^BVSP') em um nome de arquivo seguro."""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', chave) + '.npz'
+
+def _para_data(valor):
+    """Normaliza strings 'YYYY-MM-DD' / datas para pd.Timestamp (sem hora)."""
+    return pd.Timestamp(valor).normalize()
+
+
+# --- 3. CLASSE PRINCIPAL ---
+
+class FonteComCache:
+    """
+    Envolve um fornecedor de dados com um cache em disco.
+
+    Expõe a mesma interface do fornecedor ('baixar_precos' e
+    'baixar_selic'), então pode ser usada no lugar dele sem
+    nenhuma outra alteração no código de 'preparar_dados.py'.
+
+    O intervalo [inicio, fim) segue a convenção do yfinance
+    ('fim' exclusivo).
+    """
+
+    def __init__(self, fornecedor, pasta=PASTA_CACHE_PADRAO, offline=False):
+        self.fornecedor = fornecedor
+        self.pasta = pasta
+        # Modo offline: nunca chama o fornecedor, usa só o que está em disco
+        self.offline = offline
+
+    # --- Interface pública (igual à do fornecedor) ---
+
+    def baixar_precos(self, tickers, inicio, fim):
+        """Retorna um DataFrame (datas x tickers) de preços de fechamento."""
+        return self._obter(list(tickers), inicio, fim, self.fornecedor.baixar_precos)
+
+    def baixar_selic(self, inicio, fim):
+        """Retorna a série histórica da Selic (em %), indexada por data."""
+        def baixar(chaves, ini, fim_):
+            return self.fornecedor.baixar_selic(ini, fim_).to_frame(name=CHAVE_SELIC)
+
+        return self._obter([CHAVE_SELIC], inicio, fim, baixar)[CHAVE_SELIC]
+
+    # --- Leitura e escrita de uma série em disco ---
+
+    def _ler(self, chave):
+        """Lê (serie, cobertura_inicio, cobertura_fim) ou None se não existe."""
+        caminho = os.path.join(self.pasta, _nome_arquivo(chave))
+        if not os.path.exists(caminho):
+            return None
+        with np.load(caminho) as dados:
+            serie = pd.Series(dados['valores'],
+                              index=pd.to_datetime(dados['datas']),
+                              name=chave)
+            cobertura = pd.to_datetime(dados['cobertura'])
+        return serie, cobertura[0], cobertura[1]
+
+    def _gravar(self, chave, serie, cob_inicio, cob_fim):
+        """Grava a série de forma atômica (arquivo temporário + rename)."""
+        os.makedirs(self.pasta, exist_ok=True)
+        caminho = os.path.join(self.pasta, _nome_arquivo(chave))
+        # (Nome único por thread: downloads concorrentes podem gravar juntos)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(temporario,
+                 datas=serie.index.values.astype('datetime64[ns]'),
+                 valores=serie.values.astype(np.float64),
+                 cobertura=np.array([cob_inicio, cob_fim], dtype='datetime64[ns]'))
+        os.replace(temporario, caminho)
+
+    # --- Lógica do delta ---
+
+    @staticmethod
+    def _ajuste_mudou(novo, antigo):
+        """True se os preços das datas em comum diferem (ajuste novo de dividendo/desdobramento)."""
+        comuns = novo.index.intersection(antigo.index)
+        if len(comuns) == 0:
+            return False
+        razao = novo.loc[comuns].to_numpy() / antigo.loc[comuns].to_numpy()
+        return bool(np.nanmax(np.abs(razao - 1.0)) > TOLERANCIA_AJUSTE)
+
+    def _baixar_de_novo(self, chaves, inicio, fim, limite_cobertura, series, cobertura, baixar):
+        """
+        Substitui as séries cujo ajuste mudou pela série inteira baixada
+        agora (do início da cobertura, ou do pedido, até 'fim').
+        """
+        print(f"Cache: ajuste de preços mudou (dividendos/desdobramentos) em {chaves}. "
+              f"Baixando as séries inteiras de novo.")
+        grupos = {}
+        for chave in chaves:
+            trecho_inicio = min(inicio, cobertura[chave][0])
+            grupos.setdefault(trecho_inicio, []).append(chave)
+        for trecho_inicio, grupo in grupos.items():
+            novos = baixar(grupo, trecho_inicio.date().isoformat(), fim.date().isoformat())
+            for chave in grupo:
+                if novos is None or chave not in novos.columns or novos[chave].dropna().empty:
+                    continue
+                novo = novos[chave].dropna()
+                novo.index = pd.to_datetime(novo.index).tz_localize(None).normalize()
+                series[chave] = novo.rename(chave)
+                cobertura[chave] = (trecho_inicio, min(fim, limite_cobertura))
+                self._gravar(chave, series[chave], *cobertura[chave])
+
+    def _obter(self, chaves, inicio, fim, baixar):
+        """
+        Monta o DataFrame pedido a partir do cache, baixando
+        apenas os trechos [inicio, fim) que ainda não estão cobertos.
+
+        'baixar(chaves, inicio_str, fim_str)' deve retornar um
+        DataFrame com uma coluna por chave.
+        """
+        inicio = _para_data(inicio)
+        fim = _para_data(fim)
+        # O dia de hoje ainda pode mudar (pregão aberto): nunca é
+        # considerado "coberto", para ser revalidado na próxima execução.
+        limite_cobertura = min(fim, _para_data(datetime.date.today()))
+
+        series = {}
+        cobertura = {}
+        # Agrupa as chaves pelo trecho faltante, para baixar em lote
+        trechos_faltantes = {}
+
+        for chave in chaves:
+            lido = self._ler(chave)
+            if lido is None:
+                series[chave] = pd.Series(dtype=np.float64, name=chave)
+                cobertura[chave] = None
+                trechos_faltantes.setdefault((inicio, fim), []).append(chave)
+                continue
+
+            serie, cob_inicio, cob_fim = lido
+            series[chave] = serie
+            cobertura[chave] = (cob_inicio, cob_fim)
+            # (Cada trecho inclui uma sobreposição com o que já está coberto)
+            sobreposicao = pd.Timedelta(days=DIAS_SOBREPOSICAO)
+            if inicio < cob_inicio:
+                trechos_faltantes.setdefault((inicio, min(cob_inicio + sobreposicao, cob_fim)),
+                                             []).append(chave)
+            if fim > cob_fim:
+                trechos_faltantes.setdefault((max(cob_fim - sobreposicao, cob_inicio), fim),
+                                             []).append(chave)
+
+        if trechos_faltantes and self.offline:
+            faltantes = sorted({c for grupo in trechos_faltantes.values() for c in grupo})
+            print(f"*** AVISO (offline): cache incompleto para {faltantes}. Usando apenas o que está em disco.")
+            trechos_faltantes = {}
+
+        n_trechos = sum(len(grupo) for grupo in trechos_faltantes.values())
+        print(f"Cache: {len(chaves)} séries pedidas, {n_trechos} trechos faltantes a baixar.")
+
+        reajustadas = []
+        for (trecho_inicio, trecho_fim), grupo in trechos_faltantes.items():
+            novos = baixar(grupo,
+                           trecho_inicio.date().isoformat(),
+                           trecho_fim.date().isoformat())
+            if novos is None:
+                continue
+
+            for chave in grupo:
+                novo = novos[chave].dropna() if chave in novos.columns else pd.Series(dtype=np.float64)
+                if novo.empty:
+                    # Sem dados: só fica coberto se o ativo já tem dados no cache
+                    # depois do trecho (ex: trecho anterior à listagem). Senão pode
+                    # ser uma falha, e o trecho é tentado de novo na próxima execução.
+                    antigos = series[chave]
+                    if cobertura[chave] is not None and len(antigos) and antigos.index.min() >= trecho_fim:
+                        cobertura[chave] = (min(cobertura[chave][0], trecho_inicio), cobertura[chave][1])
+                        self._gravar(chave, antigos, *cobertura[chave])
+                    continue
+                novo.index = pd.to_datetime(novo.index).tz_localize(None).normalize()
+
+                if self._ajuste_mudou(novo, series[chave]):
+                    reajustadas.append(chave)
+                    continue
+
+                # Valores novos têm prioridade sobre os antigos no overlap
+                series[chave] = novo.combine_first(series[chave]).rename(chave)
+
+                cob_atual = cobertura[chave]
+                if cob_atual is None:
+                    cob_atual = (trecho_inicio, trecho_inicio)
+                cob_nova = (min(cob_atual[0], trecho_inicio),
+                            max(cob_atual[1], min(trecho_fim, limite_cobertura)))
+                cobertura[chave] = cob_nova
+                self._gravar(chave, series[chave], *cob_nova)
+
+        if reajustadas:
+            self._baixar_de_novo(reajustadas, inicio, fim, limite_cobertura, series, cobertura, baixar)
+
+        # Recorta o intervalo pedido e monta o DataFrame final
+        colunas = {}
+        for chave in chaves:
+            serie = series[chave]
+            colunas[chave] = serie[(serie.index >= inicio) & (serie.index < fim)]
+
+        return pd.DataFrame(colunas, columns=chaves).sort_index()
@@ -0,0 +1,331 @@
+"""
+================================================
+ARQUIVO DO EXECUTOR DE CENÁRIOS (ESTUDOS "E SE...?")
+================================================
+
+Para comparar configurações, em vez de editar o 'config.py'
+e rodar os scripts um de cada vez, este arquivo recebe uma
+GRADE (ou lista) de alterações e executa todos os cenários:
+
+1. Calcula a UNIÃO do que os cenários precisam (todos os
+   tickers, o maior horizonte) e baixa esse histórico UMA vez;
+2. Para cada cenário, recorta o histórico (tickers e período)
+   e calcula μ e Σ, sem baixar nada de novo;
+3. Executa as otimizações em paralelo (pool de processos), uma
+   só vez por conjunto de entradas: cenários que só diferem em
+   chaves de rótulo (CHAVES_ROTULO, ex: PERFIL_INVESTIDOR)
+   reaproveitam a mesma fronteira;
+4. Grava a fronteira de cada cenário ('resultados_binarios') e
+   um resumo consolidado com as métricas de destaque.
+
+Chaves aceitas em cada cenário:
+- do config.py:          ANOS_DE_DADOS, LISTA_ATIVOS, PERFIL_INVESTIDOR,
+                         VALOR_TOTAL_INVESTIMENTO
+- do preparar_dados.py:  METODO_COVARIANCIA, MEIA_VIDA_EWMA
+- do otimizar.py:        MOTOR_OTIMIZACAO, POPULACAO_SIZE, NUM_GERACOES,
+                         NUM_PONTOS_FRONTEIRA
+
+'LISTA_ATIVOS' pode ser uma lista de tickers ou o nome das listas
+do config.py somadas com '+' (ex: 'LISTA_ACOES+LISTA_CRIPTO').
+
+Uso:
+    python cenarios.py                       # usa GRADE_CENARIOS abaixo
+    python cenarios.py --grade estudo.json   # grade (objeto) ou lista de cenários
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import config
+import preparar_dados
+import estimador_momentos
+import resultados_binarios
+
+# --- 1. PARÂMETROS DO EXECUTOR ---
+
+# Grade padrão: todas as combinações dos valores abaixo
+GRADE_CENARIOS = {
+    'ANOS_DE_DADOS': [3, 5],
+    'LISTA_ATIVOS': ['LISTA_COMPLETA_ATIVOS', 'LISTA_ACOES+LISTA_ETFS+LISTA_RENDA_FIXA'],
+}
+
+PASTA_CENARIOS = 'resultados_cenarios'
+ARQUIVO_RESUMO_CSV = 'resumo_cenarios.csv'
+
+# Valores usados quando o cenário não altera a chave
+PADROES = {
+    'ANOS_DE_DADOS': config.ANOS_DE_DADOS,
+    'LISTA_ATIVOS': 'LISTA_COMPLETA_ATIVOS',
+    'PERFIL_INVESTIDOR': config.PERFIL_INVESTIDOR,
+    'VALOR_TOTAL_INVESTIMENTO': config.VALOR_TOTAL_INVESTIMENTO,
+    'METODO_COVARIANCIA': preparar_dados.METODO_COVARIANCIA,
+    'MEIA_VIDA_EWMA': preparar_dados.MEIA_VIDA_EWMA,
+    # Nos estudos em lote, o motor exato (CLA) é o padrão: é
+    # determinístico e muito mais rápido que o NSGA-II
+    'MOTOR_OTIMIZACAO': 'CLA',
+    'POPULACAO_SIZE': 150,
+    'NUM_GERACOES': 200,
+    'NUM_PONTOS_FRONTEIRA': 150,
+}
+
+# Chaves que não mudam a otimização (só o rótulo e a leitura do
+# resultado): cenários que só diferem nelas usam a mesma fronteira
+CHAVES_ROTULO = ('nome', 'PERFIL_INVESTIDOR', 'VALOR_TOTAL_INVESTIMENTO')
+
+
+# --- 2. MONTAGEM DOS CENÁRIOS ---
+
+def expandir_grade(grade):
+    """
+    Grade {chave: [valores]} -> lista de cenários (todas as
+    combinações). Uma lista de dicts é devolvida como está.
+    """
+    if isinstance(grade, list):
+        return [dict(c) for c in grade]
+    chaves = list(grade)
+    valores = [v if isinstance(v, list) and not _e_lista_de_tickers(k, v) else [v]
+               for k, v in grade.items()]
+    return [dict(zip(chaves, combinacao)) for combinacao in itertools.product(*valores)]
+
+def _e_lista_de_tickers(chave, valor):
+    """Na grade, LISTA_ATIVOS: ['PETR4.SA', ...] é UM valor, não vários."""
+    return chave == 'LISTA_ATIVOS' and all(isinstance(v, str) and not v.startswith('LISTA_')
+                                           for v in valor)
+
+def resolver_tickers(lista_ativos):
+    """Lista de tickers a partir de uma lista ou de 'LISTA_A+LISTA_B' (do config.py)."""
+    if isinstance(lista_ativos, str):
+        tickers = []
+        for nome in lista_ativos.split('+'):
+            tickers.extend(getattr(config, nome.strip()))
+        return list(dict.fromkeys(tickers))
+    return list(lista_ativos)
+
+def completar_cenario(alteracoes, indice):
+    """Junta as alterações aos padrões e dá um nome ao cenário."""
+    desconhecidas = set(alteracoes) - set(PADROES) - {'nome'}
+    if desconhecidas:
+        raise ValueError(f"Chaves de cenário desconhecidas: {sorted(desconhecidas)}")
+    cenario = dict(PADROES)
+    cenario.update(alteracoes)
+    if 'nome' not in cenario:
+        partes = [f"{k}={v if not isinstance(v, list) else f'{len(v)}_ativos'}"
+                  for k, v in alteracoes.items()]
+        cenario['nome'] = f"cenario_{indice:03d}" + (' (' + ', '.join(partes) + ')' if partes else '')
+    cenario['tickers'] = resolver_tickers(cenario['LISTA_ATIVOS'])
+    return cenario
+
+def chave_otimizacao(cenario):
+    """
+    O que define a fronteira do cenário: tickers, horizonte, estimador,
+    motor e parâmetros (tudo, menos CHAVES_ROTULO). 'LISTA_ATIVOS' fica
+    de fora porque 'tickers' já é a lista resolvida.
+    """
+    return tuple((k, tuple(v) if isinstance(v, list) else v)
+                 for k, v in sorted(cenario.items())
+                 if k not in CHAVES_ROTULO and k != 'LISTA_ATIVOS')
+
+
+# --- 3. DADOS COMPARTILHADOS ---
+
+def baixar_historico_uniao(cenarios, fonte=None):
+    """
+    Baixa UMA vez o histórico que cobre todos os cenários:
+    preços de todos os tickers, calendário do benchmark e Selic,
+    desde o início do maior horizonte.
+    """
+    if fonte is None:
+        fonte = preparar_dados.obter_fonte_dados()
+    tickers = list(dict.fromkeys(t for c in cenarios for t in c['tickers']))
+    maior_horizonte = max(c['ANOS_DE_DADOS'] for c in cenarios)
+    inicio, fim = preparar_dados.calcular_periodo(maior_horizonte)
+
+    print(f"Histórico compartilhado: {len(tickers)} ativos, {inicio} a {fim}")
+    benchmark = preparar_dados.BENCHMARK_MERCADO
+    taxa, calendario, precos = preparar_dados.executar_downloads(
+        lambda: preparar_dados.baixar_taxa_livre_de_risco(inicio, fim, fonte=fonte),
+        lambda: fonte.baixar_precos([benchmark], inicio, fim)[benchmark].dropna().index,
+        lambda: preparar_dados.baixar_dados_precos(tickers, inicio, fim, fonte=fonte))
+    if precos is None or calendario.empty:
+        return None
+    return {'precos': precos, 'calendario': calendario, 'taxa_livre_de_risco': taxa, 'fim': fim}
+
+def recortar_inputs(historico, cenario):
+    """
+    μ, Σ e retornos do cenário, recortando o histórico compartilhado
+    exatamente como o 'preparar_dados' faria para esse config.
+    """
+    fim = pd.Timestamp(historico['fim']).date()
+    inicio, _ = preparar_dados.calcular_periodo(cenario['ANOS_DE_DADOS'], fim)
+    inicio = pd.Timestamp(inicio)
+
+    disponiveis = [t for t in cenario['tickers'] if t in historico['precos'].columns]
+    precos = historico['precos'].loc[historico['precos'].index >= inicio, disponiveis]
+    precos = precos.dropna(axis='columns', how='all')
+    calendario = historico['calendario'][historico['calendario'] >= inicio]
+
+    retornos = preparar_dados.alinhar_retornos(precos, calendario)
+    if retornos.empty:
+        return None
+    mu, cov = estimador_momentos.estimar_mu_sigma(
+        retornos,
+        metodo=cenario['METODO_COVARIANCIA'],
+        meia_vida=cenario['MEIA_VIDA_EWMA'],
+        dias_ano=preparar_dados.DIAS_UTEIS_ANO
+    )
+    return {'retornos_medios': mu, 'matriz_cov': cov, 'matriz_retornos_historicos': retornos}
+
+
+# --- 4. OTIMIZAÇÃO DE UM CENÁRIO (em um processo do pool) ---
+
+def _otimizar_cenario(argumentos):
+    """Retorna (F, X, segundos) da fronteira de um cenário."""
+    mu, cov, cenario = argumentos
+    inicio = time.perf_counter()
+    if cenario['MOTOR_OTIMIZACAO'] == 'CLA':
+        import fronteira_exata
+        res = fronteira_exata.calcular_fronteira_exata(mu, cov, n_pontos=cenario['NUM_PONTOS_FRONTEIRA'])
+        F, X = res.F, res.X
+    else:
+        from pymoo.optimize import minimize
+        import modelo_problema
+        import otimizacao_paralela
+        problema = modelo_problema.OtimizacaoPortfolio(mu, cov)
+        algoritmo = otimizacao_paralela.criar_nsga2(cenario['POPULACAO_SIZE'])
+        res = minimize(problema, algoritmo, ('n_gen', cenario['NUM_GERACOES']), seed=1, verbose=False)
+        if res.F is None:
+            return None, None, time.perf_counter() - inicio
+        F, X = np.atleast_2d(res.F), np.atleast_2d(res.X)
+    return F, X, time.perf_counter() - inicio
+
+
+# --- 5. MÉTRICAS DE DESTAQUE ---
+
+def metricas_fronteira(F, taxa_livre_de_risco):
+    """As 3 carteiras de destaque do 'plot.py', resumidas em números."""
+    variancias = F[:, 0]
+    retornos = -F[:, 1]
+    volatilidades = np.sqrt(np.maximum(variancias, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatilidades > 0, (retornos - taxa_livre_de_risco) / volatilidades, -np.inf)
+    i_min, i_ret, i_sharpe = np.argmin(variancias), np.argmax(retornos), np.argmax(sharpe)
+    return {
+        'n_portfolios': len(F),
+        'min_risco_volatilidade': volatilidades[i_min],
+        'min_risco_retorno': retornos[i_min],
+        'max_retorno_volatilidade': volatilidades[i_ret],
+        'max_retorno_retorno': retornos[i_ret],
+        'max_sharpe_volatilidade': volatilidades[i_sharpe],
+        'max_sharpe_retorno': retornos[i_sharpe],
+        'max_sharpe': sharpe[i_sharpe],
+    }
+
+
+# --- 6. FUNÇÃO PRINCIPAL ---
+
+def executar_cenarios(grade, pasta=PASTA_CENARIOS, n_processos=None, fornecedor=None):
+    """
+    Executa todos os cenários da grade e retorna o resumo (DataFrame,
+    uma linha por cenário). As fronteiras ficam em 'pasta/<cenario>/'.
+    """
+    cenarios = [completar_cenario(c, i + 1) for i, c in enumerate(expandir_grade(grade))]
+    print(f"{len(cenarios)} cenários a executar.")
+
+    historico = baixar_historico_uniao(cenarios, preparar_dados.obter_fonte_dados(fornecedor))
+    if historico is None:
+        print("Erro fatal: não foi possível baixar o histórico compartilhado.")
+        return None
+    taxa = historico['taxa_livre_de_risco']
+
+    # --- Recorte de cada conjunto de entradas (barato: só fatias do histórico) ---
+    # (Cenários com a mesma chave de otimização compartilham recorte e fronteira)
+    chaves = [chave_otimizacao(c) for c in cenarios]
+    unicos = {}
+    for cenario, chave in zip(cenarios, chaves):
+        if chave not in unicos:
+            unicos[chave] = (cenario, recortar_inputs(historico, cenario))
+    entradas = [unicos[chave][1] for chave in chaves]
+    for cenario, inputs in zip(cenarios, entradas):
+        if inputs is None:
+            print(f"  AVISO: '{cenario['nome']}' sem dados suficientes. Ignorado.")
+
+    # --- Otimizações em paralelo (uma por chave) ---
+    chaves_validas = [k for k, (_, e) in unicos.items() if e is not None]
+    tarefas = [(np.asarray(unicos[k][1]['retornos_medios']), np.asarray(unicos[k][1]['matriz_cov']),
+                unicos[k][0]) for k in chaves_validas]
+    validos = [(c, e, k) for c, e, k in zip(cenarios, entradas, chaves) if e is not None]
+    if len(tarefas) < len(validos):
+        print(f"{len(validos)} cenários válidos, {len(tarefas)} otimizações distintas "
+              f"(os demais só mudam {', '.join(CHAVES_ROTULO[1:])}).")
+    if n_processos is None:
+        n_processos = min(len(tarefas), os.cpu_count() or 1) or 1
+    inicio = time.perf_counter()
+    if n_processos == 1:
+        resultados = [_otimizar_cenario(t) for t in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=n_processos) as pool:
+            resultados = list(pool.map(_otimizar_cenario, tarefas))
+    print(f"Otimizações concluídas em {time.perf_counter() - inicio:.2f}s ({n_processos} processos).")
+    por_chave = dict(zip(chaves_validas, resultados))
+
+    # --- Gravação: fronteira por cenário + resumo consolidado ---
+    os.makedirs(pasta, exist_ok=True)
+    linhas = []
+    for indice, (cenario, inputs, chave) in enumerate(validos, start=1):
+        F, X, segundos = por_chave[chave]
+        retornos = inputs['matriz_retornos_historicos']
+        linha = {
+            'cenario': cenario['nome'],
+            'pasta': f'cenario_{indice:03d}',
+            'anos_de_dados': cenario['ANOS_DE_DADOS'],
+            'perfil_investidor': cenario['PERFIL_INVESTIDOR'],
+            'valor_total_investimento': cenario['VALOR_TOTAL_INVESTIMENTO'],
+            'motor': cenario['MOTOR_OTIMIZACAO'],
+            'metodo_covariancia': cenario['METODO_COVARIANCIA'],
+            'n_ativos': retornos.shape[1],
+            'n_dias': retornos.shape[0],
+            'data_inicio': retornos.index.min().date(),
+            'data_fim': retornos.index.max().date(),
+            'tempo_otimizacao_s': segundos,
+        }
+        if F is not None:
+            linha.update(metricas_fronteira(F, taxa))
+            metadados = {k: v for k, v in cenario.items() if k != 'tickers'}
+            metadados['taxa_livre_de_risco'] = taxa
+            resultados_binarios.salvar_resultados(F, X, list(retornos.columns),
+                                                  os.path.join(pasta, linha['pasta']), metadados)
+        linhas.append(linha)
+
+    resumo = pd.DataFrame(linhas)
+    resumo.to_csv(os.path.join(pasta, ARQUIVO_RESUMO_CSV), index=False, sep=';', decimal=',')
+    return resumo
+
+
+# --- 7. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Executa uma grade de cenários de otimização.")
+    parser.add_argument('--grade', help="JSON com a grade (objeto) ou a lista de cenários")
+    parser.add_argument('--pasta', default=PASTA_CENARIOS)
+    parser.add_argument('--processos', type=int, default=None)
+    args = parser.parse_args()
+
+    grade = GRADE_CENARIOS
+    if args.grade:
+        with open(args.grade, encoding='utf-8') as f:
+            grade = json.load(f)
+
+    print("--- EXECUTOR DE CENÁRIOS ---")
+    resumo = executar_cenarios(grade, args.pasta, args.processos)
+    if resumo is not None:
+        colunas = ['cenario', 'n_ativos', 'n_dias', 'max_sharpe', 'max_sharpe_retorno',
+                   'max_sharpe_volatilidade', 'min_risco_volatilidade', 'tempo_otimizacao_s']
+        with pd.option_context('display.float_format', '{:.4f}'.format, 'display.width', 200):
+            print(resumo[[c for c in colunas if c in resumo.columns]].to_string(index=False))
+        print(f"\nResumo salvo em '{os.path.join(args.pasta, ARQUIVO_RESUMO_CSV)}'.")
@@ -0,0 +1,198 @@
+"""
+================================================
+ARQUIVO DA LINHA DE COMANDO (PONTO DE ENTRADA ÚNICO)
+================================================
+
+Um só comando para as etapas do projeto:
+
+    python cli.py fetch      # baixa os dados e salva o artefato de inputs
+    python cli.py optimize   # roda o 'otimizar.py'
+    python cli.py analyze    # só as 3 análises do 'plot.py' (sem gráficos)
+    python cli.py plot       # análises + gráficos (aceita --lote, --processos, --forcar)
+    python cli.py bench      # 'benchmark_pipeline.py' (demais argumentos repassados)
+    python cli.py serve      # serviço residente de consultas ('servico_fronteira.py')
+
+Opções gerais (antes do subcomando):
+    --offline             usa só o cache local (preparar_dados.MODO_OFFLINE)
+    --tempos-importacao   relatório do tempo gasto importando cada pacote
+    --rastro              rastro das etapas (tempo/memória) em JSON no formato
+                          Chrome Trace (ver 'rastreamento.py')
+    --arquivo-rastro ARQ  onde gravar o rastro (padrão: rastro_pipeline.json)
+    --perfil ETAPA        cProfile da etapa (ou prefixo, ex: 'dados'); repetível
+
+Cada subcomando importa só o que usa: este arquivo não importa
+nada pesado no topo. Ex: 'analyze' com o artefato de inputs em
+dia não carrega yfinance, bcb, pymoo nem matplotlib.
+"""
+
+import argparse
+import builtins
+import runpy
+import sys
+import time
+
+# Pacotes cuja presença (ou ausência) o relatório sempre mostra
+PACOTES_PESADOS = ('yfinance', 'bcb', 'pandas', 'scipy', 'pymoo', 'matplotlib')
+
+
+# --- 1. RELATÓRIO DE IMPORTAÇÃO ---
+
+class MedidorImportacoes:
+    """
+    Mede o tempo gasto em cada pacote importado pela 1ª vez
+    (substituindo 'builtins.__import__' enquanto ativo).
+
+    O tempo de um import aninhado (ex: pandas importando numpy)
+    é descontado do pacote "pai" e somado ao pacote importado.
+    """
+
+    def __init__(self):
+        self.tempos = {}
+        self._pilha = []
+        self._original = None
+
+    def __enter__(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._importar
+        return self
+
+    def __exit__(self, *args):
+        builtins.__import__ = self._original
+
+    def _importar(self, nome, globals=None, locals=None, fromlist=(), level=0):
+        if level or nome in sys.modules:
+            return self._original(nome, globals, locals, fromlist, level)
+
+        raiz = nome.partition('.')[0]
+        self._pilha.append(0.0)   # Tempo dos imports aninhados
+        inicio = time.perf_counter()
+        try:
+            return self._original(nome, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - inicio
+            aninhados = self._pilha.pop()
+            self.tempos[raiz] = self.tempos.get(raiz, 0.0) + total - aninhados
+            if self._pilha:
+                self._pilha[-1] += total
+
+    def relatorio(self, n_maiores=12):
+        linhas = ["\n--- TEMPO DE IMPORTAÇÃO ---"]
+        for pacote, segundos in sorted(self.tempos.items(), key=lambda item: -item[1])[:n_maiores]:
+            linhas.append(f"  {pacote:<22} {segundos * 1000:8.1f} ms")
+        linhas.append(f"  {'TOTAL':<22} {sum(self.tempos.values()) * 1000:8.1f} ms")
+        carregados = [p for p in PACOTES_PESADOS if p in sys.modules]
+        nao_carregados = [p for p in PACOTES_PESADOS if p not in sys.modules]
+        linhas.append(f"  Carregados:     {', '.join(carregados) or '-'}")
+        linhas.append(f"  Não carregados: {', '.join(nao_carregados) or '-'}")
+        return "\n".join(linhas)
+
+
+# --- 2. SUBCOMANDOS ---
+
+def comando_fetch(args):
+    """Baixa os dados (ou lê o cache) e salva o artefato de inputs."""
+    import config
+    import preparar_dados
+    import artefato_inputs
+
+    inputs = preparar_dados.calcular_inputs_otimizacao()
+    if inputs is None:
+        return 1
+    hash_inputs = artefato_inputs.salvar_inputs(inputs, artefato_inputs.PASTA_INPUTS,
+                                                config.LISTA_COMPLETA_ATIVOS, config.ANOS_DE_DADOS)
+    print(f"Inputs salvos em '{artefato_inputs.PASTA_INPUTS}/' (hash {hash_inputs[:12]}).")
+    return 0
+
+def comando_optimize(args):
+    runpy.run_module('otimizar', run_name='__main__')
+    return 0
+
+def comando_analyze(args):
+    import plot
+    return 0 if plot.analisar_resultados(gerar_graficos=False) is not None else 1
+
+def comando_plot(args):
+    import plot
+    if args.lote:
+        plot.renderizar_lote(args.lote, args.processos, args.forcar)
+        return 0
+    return 0 if plot.analisar_resultados(True, args.processos, args.forcar) is not None else 1
+
+def comando_serve(args):
+    import servico_fronteira
+    argv = ['--host', args.host, '--porta', str(args.porta), '--intervalo', str(args.intervalo)]
+    if args.socket:
+        argv += ['--socket', args.socket]
+    return servico_fronteira.main(argv)
+
+def comando_bench(args):
+    sys.argv = ['benchmark_pipeline.py'] + args.argumentos
+    runpy.run_module('benchmark_pipeline', run_name='__main__')
+    return 0
+
+
+# --- 3. BLOCO DE EXECUÇÃO PRINCIPAL ---
+
+def montar_parser():
+    parser = argparse.ArgumentParser(description="Otimização de portfólio: ponto de entrada único.")
+    parser.add_argument('--offline', action='store_true', help="Usa só o cache local de dados")
+    parser.add_argument('--tempos-importacao', action='store_true',
+                        help="Mostra o tempo de importação de cada pacote ao final")
+    parser.add_argument('--rastro', action='store_true', help="Grava o rastro das etapas (Chrome Trace JSON)")
+    parser.add_argument('--arquivo-rastro', default='rastro_pipeline.json', metavar='ARQUIVO')
+    parser.add_argument('--perfil', action='append', default=[], metavar='ETAPA',
+                        help="Grava um cProfile da etapa em 'perfis/' (implica --rastro)")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    sub.add_parser('fetch', help="Baixa os dados e salva o artefato de inputs").set_defaults(funcao=comando_fetch)
+    sub.add_parser('optimize', help="Executa a otimização (otimizar.py)").set_defaults(funcao=comando_optimize)
+    sub.add_parser('analyze', help="Análises das carteiras de destaque, sem gráficos").set_defaults(
+        funcao=comando_analyze)
+
+    plot = sub.add_parser('plot', help="Análises e gráficos (plot.py)")
+    plot.add_argument('--lote', nargs='+', metavar='PASTA')
+    plot.add_argument('--processos', type=int, default=None)
+    plot.add_argument('--forcar', action='store_true')
+    plot.set_defaults(funcao=comando_plot)
+
+    serve = sub.add_parser('serve', help="Serviço de consultas à fronteira (servico_fronteira.py)")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--porta', type=int, default=8765)
+    serve.add_argument('--socket', default=None)
+    serve.add_argument('--intervalo', type=float, default=2.0)
+    serve.set_defaults(funcao=comando_serve)
+
+    # (Os argumentos do 'bench' são repassados ao benchmark_pipeline.py)
+    sub.add_parser('bench', help="Benchmark do pipeline (benchmark_pipeline.py)",
+                   add_help=False).set_defaults(funcao=comando_bench)
+    return parser
+
+def main(argv=None):
+    parser = montar_parser()
+    args, extras = parser.parse_known_args(argv)
+    if extras and args.comando != 'bench':
+        parser.error(f"argumentos não reconhecidos: {' '.join(extras)}")
+    args.argumentos = extras
+    medidor = MedidorImportacoes() if args.tempos_importacao else None
+    inicio = time.perf_counter()
+    try:
+        if medidor is not None:
+            medidor.__enter__()
+        if args.rastro or args.perfil:
+            import rastreamento
+            rastreamento.ativar(args.arquivo_rastro, args.perfil)
+        if args.offline:
+            import preparar_dados
+            preparar_dados.MODO_OFFLINE = True
+        codigo = args.funcao(args)
+    finally:
+        if args.rastro or args.perfil:
+            rastreamento.finalizar()
+        if medidor is not None:
+            medidor.__exit__()
+            print(medidor.relatorio())
+            print(f"  Tempo total do comando: {time.perf_counter() - inicio:.2f}s")
+    return codigo
+
+if __name__ == '__main__':
+    sys.exit(main())
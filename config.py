@@ -86,7 +86,26 @@ LISTA_COMPLETA_ATIVOS = (
 )
 
 
-# --- 3. COMENTÁRIOS PARA MELHORIAS FUTURAS ---
+# --- 3. LOTES DE NEGOCIAÇÃO ---
+# (Usados em 'alocacao_lotes.py' para transformar os pesos
+#  contínuos em quantidades que podem de fato ser compradas)
+
+# Ações da B3 são negociadas em lotes de 100 (o mercado
+# fracionário não é considerado aqui).
+LOTE_ACOES = 100
+
+# BDRs, ETFs, FIIs e ETFs de renda fixa: 1 cota por lote.
+LOTE_PADRAO = 1
+
+# Lote de cada ativo (quem não estiver aqui usa LOTE_PADRAO).
+# 0 = quantidade fracionária livre (ex: criptomoedas).
+LOTES_POR_ATIVO = {
+    **{ticker: LOTE_ACOES for ticker in LISTA_ACOES},
+    **{ticker: 0 for ticker in LISTA_CRIPTO},
+}
+
+
+# --- 4. COMENTÁRIOS PARA MELHORIAS FUTURAS ---
 
 # TODO: Implementar perfis de investidor
 # A ideia é usar o perfil (ex: 'CONSERVADOR', 'MODERADO', 'AGRESSIVO')
@@ -94,7 +113,9 @@ LISTA_COMPLETA_ATIVOS = (
 PERFIL_INVESTIDOR = 'MODERADO'
 
 
-# TODO: Implementar restrições de "mundo real" (Lotes Mínimos)
-# Atualmente, o modelo otimiza pesos contínuos (ex: 1.2345% de PETR4).
-# Na vida real, só podemos comprar "lotes".
-# Isso mudaria o problema para uma "Programação Inteira Mista" (MIP).
\ No newline at end of file
+# Restrições de "mundo real" (Lotes Mínimos)
+# O modelo otimiza pesos contínuos (ex: 1.2345% de PETR4), mas na
+# vida real só podemos comprar "lotes". Em vez de resolver uma
+# "Programação Inteira Mista" (MIP) completa, o 'alocacao_lotes.py'
+# arredonda as carteiras já otimizadas para lotes inteiros
+# (heurística gulosa ou branch-and-bound), usando os lotes acima.
@@ -0,0 +1,236 @@
+"""
+================================================
+ARQUIVO DE CONVERGÊNCIA E INSTRUMENTAÇÃO DO NSGA-II
+================================================
+
+Dois complementos para o 'minimize' do Pymoo:
+
+1. TerminacaoConvergencia: critério de parada por estagnação
+   do hipervolume (HV) ou da mudança da fronteira (IGD entre
+   gerações), com tolerância e paciência configuráveis,
+   em vez de um número fixo de gerações.
+
+2. RegistroGeracoes: log estruturado (JSON lines), uma linha
+   por geração: nº de avaliações, hipervolume, fração viável,
+   spread e tempo gasto em cada etapa.
+
+As métricas são para 2 objetivos (Risco, -Retorno), ambos
+minimizados, como em 'modelo_problema.py'.
+"""
+
+import json
+import time
+import collections
+
+import numpy as np
+from pymoo.core.callback import Callback
+from pymoo.core.termination import Termination
+
+
+# --- 1. MÉTRICAS (2 OBJETIVOS) ---
+
+def hipervolume_2d(F, referencia):
+    """
+    Hipervolume exato de uma fronteira 2D (minimização) em
+    relação ao ponto de 'referencia'. O(n log n).
+    """
+    F = np.asarray(F, dtype=np.float64)
+    if len(F) == 0:
+        return 0.0
+    F = F[np.all(F < referencia, axis=1)]
+    if len(F) == 0:
+        return 0.0
+    F = F[np.argsort(F[:, 0])]
+    # Só os pontos que melhoram o 2º objetivo contam (não-dominados)
+    melhor = np.minimum.accumulate(F[:, 1])
+    manter = np.ones(len(F), dtype=bool)
+    manter[1:] = F[1:, 1] < melhor[:-1]
+    F = F[manter]
+    larguras = np.diff(np.append(F[:, 0], referencia[0]))
+    return float(np.sum(larguras * (referencia[1] - F[:, 1])))
+
+def igd(F, F_referencia):
+    """Distância média de cada ponto de 'F_referencia' ao ponto mais próximo de F."""
+    if len(F) == 0 or len(F_referencia) == 0:
+        return np.inf
+    distancias = np.linalg.norm(F_referencia[:, None, :] - F[None, :, :], axis=2)
+    return float(distancias.min(axis=1).mean())
+
+def spread(F):
+    """
+    Uniformidade da fronteira (Δ de Deb, sem os extremos):
+    0 = pontos igualmente espaçados; quanto maior, mais irregular.
+    """
+    if len(F) < 3:
+        return 0.0
+    F = F[np.argsort(F[:, 0])]
+    d = np.linalg.norm(np.diff(F, axis=0), axis=1)
+    media = d.mean()
+    if media == 0:
+        return 0.0
+    return float(np.sum(np.abs(d - media)) / (len(d) * media))
+
+def _fronteira_viavel(algorithm):
+    """F das soluções ótimas viáveis da geração atual."""
+    opt = algorithm.opt
+    if opt is None or len(opt) == 0:
+        return np.empty((0, 2))
+    viaveis = opt.get('feas')
+    return opt.get('F')[viaveis.ravel()] if viaveis is not None else opt.get('F')
+
+def _ponto_referencia(F, referencia_anterior=None):
+    """
+    Ponto de referência do HV: pior valor de cada objetivo + 10% da
+    amplitude. Com 'referencia_anterior', só se afasta dela: a fronteira
+    costuma se espalhar nas primeiras gerações, e uma referência fixa na
+    1ª fronteira deixaria de fora (HV = 0) os pontos que passam dela.
+    """
+    amplitude = np.ptp(F, axis=0)
+    referencia = F.max(axis=0) + 0.1 * np.where(amplitude > 0, amplitude, np.abs(F.max(axis=0)) + 1e-12)
+    if referencia_anterior is None:
+        return referencia
+    return np.maximum(referencia, referencia_anterior)
+
+
+# --- 2. CRITÉRIO DE PARADA ---
+
+class TerminacaoConvergencia(Termination):
+    """
+    Para quando a fronteira estagna:
+    - metrica='hv':  ganho relativo do HV nas últimas 'paciencia'
+                     gerações < 'tolerancia' (as duas fronteiras
+                     medidas com a MESMA referência, a atual);
+    - metrica='igd': IGD entre fronteiras consecutivas (normalizado
+                     pela amplitude dos objetivos) < 'tolerancia_igd'
+                     por 'paciencia' gerações seguidas.
+    Em qualquer caso, para ao atingir 'n_max_gen'.
+
+    As duas tolerâncias são separadas porque as escalas não se
+    comparam: o ganho de HV é relativo, o IGD é uma distância
+    (em frações da amplitude) que nunca chega a zero com uma
+    população que continua se movendo ao longo da fronteira.
+    """
+
+    def __init__(self, metrica='hv', tolerancia=1e-4, paciencia=15, n_max_gen=200, n_min_gen=10,
+                 tolerancia_igd=1e-3):
+        super().__init__()
+        if metrica not in ('hv', 'igd'):
+            raise ValueError("metrica deve ser 'hv' ou 'igd'")
+        self.metrica = metrica
+        self.tolerancia = tolerancia
+        self.tolerancia_igd = tolerancia_igd
+        self.paciencia = paciencia
+        self.n_max_gen = n_max_gen
+        self.n_min_gen = n_min_gen
+
+        self.referencia = None
+        self.historico = []
+        # Fronteiras das últimas 'paciencia' + 1 gerações (para o HV)
+        self.fronteiras = collections.deque(maxlen=paciencia + 1)
+        self.F_anterior = None
+        self.convergiu = False
+
+    def _update(self, algorithm):
+        n_gen = algorithm.n_gen or 0
+        F = _fronteira_viavel(algorithm)
+
+        if len(F) > 0:
+            if self.metrica == 'hv':
+                self.referencia = _ponto_referencia(F, self.referencia)
+                self.fronteiras.append(F)
+                self.historico.append(hipervolume_2d(F, self.referencia))
+            else:
+                if self.F_anterior is not None and len(self.F_anterior) > 0:
+                    escala = np.ptp(np.vstack([F, self.F_anterior]), axis=0)
+                    escala = np.where(escala > 0, escala, 1.0)
+                    self.historico.append(igd(F / escala, self.F_anterior / escala))
+                self.F_anterior = F
+
+        if n_gen >= self.n_min_gen and len(self.historico) > self.paciencia:
+            if self.metrica == 'hv':
+                # (A referência pode ter mudado: o HV antigo é recalculado com a atual)
+                atual = self.historico[-1]
+                antigo = hipervolume_2d(self.fronteiras[0], self.referencia)
+                ganho = (atual - antigo) / max(abs(atual), 1e-300)
+                self.convergiu = ganho < self.tolerancia
+            else:
+                self.convergiu = max(self.historico[-self.paciencia:]) < self.tolerancia_igd
+
+        if self.convergiu:
+            return 1.0
+        return min(1.0, n_gen / self.n_max_gen)
+
+
+# --- 3. LOG POR GERAÇÃO ---
+
+class RegistroGeracoes(Callback):
+    """
+    Grava uma linha JSON por geração em 'arquivo_log'.
+
+    Para separar o tempo de avaliação do tempo do próprio
+    algoritmo (seleção, cruzamento, ordenação...), usa os
+    contadores 'n_avaliacoes' e 'tempo_avaliacao' do problema
+    ('modelo_problema.OtimizacaoPortfolio').
+    """
+
+    def __init__(self, arquivo_log, problema=None):
+        super().__init__()
+        self.arquivo_log = arquivo_log
+        self.problema = problema
+        self.referencia = None
+        self._arquivo = None
+        # O relógio começa na criação (logo antes do 'minimize'), para
+        # que a 1ª geração inclua a amostragem e avaliação iniciais
+        self._inicio = time.perf_counter()
+        self._ultimo_instante = self._inicio
+        self._ultimo_tempo_avaliacao = getattr(problema, 'tempo_avaliacao', 0.0)
+
+    def initialize(self, algorithm):
+        self._arquivo = open(self.arquivo_log, 'w', encoding='utf-8')
+
+    def notify(self, algorithm):
+        agora = time.perf_counter()
+        tempo_geracao = agora - self._ultimo_instante
+
+        tempo_avaliacao_total = getattr(self.problema, 'tempo_avaliacao', 0.0)
+        tempo_avaliacao = tempo_avaliacao_total - self._ultimo_tempo_avaliacao
+        self._ultimo_tempo_avaliacao = tempo_avaliacao_total
+
+        # --- Métricas da geração ---
+        # (A referência só se afasta: quando muda, o HV das gerações
+        #  anteriores não é comparável; por isso ela vai em cada linha)
+        F = _fronteira_viavel(algorithm)
+        if len(F) > 0:
+            self.referencia = _ponto_referencia(F, self.referencia)
+        hv = hipervolume_2d(F, self.referencia) if self.referencia is not None else 0.0
+
+        avaliados = algorithm.off if getattr(algorithm, 'off', None) is not None else algorithm.pop
+        viaveis = avaliados.get('feas')
+        fracao_viavel = float(np.mean(viaveis)) if viaveis is not None and len(viaveis) else 0.0
+
+        tempo_metricas = time.perf_counter() - agora
+
+        registro = {
+            'geracao': int(algorithm.n_gen),
+            'n_avaliacoes': int(algorithm.evaluator.n_eval),
+            'hipervolume': hv,
+            'referencia_hv': None if self.referencia is None else self.referencia.tolist(),
+            'fracao_viavel': fracao_viavel,
+            'spread': spread(F),
+            'n_fronteira': int(len(F)),
+            'tempo_geracao_s': tempo_geracao,
+            'tempo_avaliacao_s': tempo_avaliacao,
+            'tempo_algoritmo_s': max(tempo_geracao - tempo_avaliacao, 0.0),
+            'tempo_metricas_s': tempo_metricas,
+            'tempo_total_s': agora - self._inicio,
+        }
+        self._arquivo.write(json.dumps(registro) + '\n')
+        self._arquivo.flush()
+
+        # O tempo das métricas não entra na próxima geração
+        self._ultimo_instante = time.perf_counter()
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
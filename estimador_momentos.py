@@ -0,0 +1,320 @@
+"""
+================================================
+ARQUIVO DO ESTIMADOR INCREMENTAL DE μ E Σ
+================================================
+
+O 'preparar_dados.py' recalcula retornos.mean() e
+retornos.cov() do zero sobre a janela inteira a cada execução,
+e só oferece a covariância amostral, que fica mal-condicionada
+quando o nº de ativos (N) se aproxima do nº de dias (T).
+
+Este arquivo oferece:
+
+- EstimadorJanela: guarda estatísticas suficientes (somas de
+  potências) e permite INCLUIR e REMOVER um dia em O(N²),
+  para janelas móveis. Covariância amostral ou com
+  "shrinkage" de Ledoit-Wolf / OAS (alvo: identidade escalada).
+
+- EstimadorEWMA: média e covariância com pesos
+  exponencialmente decrescentes (meia-vida em dias), O(N²)
+  por dia; blocos de dias entram de uma vez (via BLAS).
+
+Os dois podem ser gravados em disco ('salvar'/'carregar') para
+que a atualização diária só processe os dias novos.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# --- 1. PARÂMETROS ---
+
+# Dias úteis (pregões) em um ano (igual ao preparar_dados.py)
+DIAS_UTEIS_ANO = 252
+
+METODOS_COVARIANCIA = ('amostral', 'ledoit_wolf', 'oas')
+
+
+# --- 2. FUNÇÕES DE SHRINKAGE ---
+
+def intensidade_oas(S, n_obs):
+    """
+    Intensidade de shrinkage do OAS (Chen et al., 2010) para a
+    covariância empírica S (normalizada por 1/n).
+    """
+    p = S.shape[0]
+    mu = np.trace(S) / p
+    alfa = np.mean(S ** 2)
+    numerador = alfa + mu ** 2
+    denominador = (n_obs + 1.0) * (alfa - mu ** 2 / p)
+    if denominador <= 0:
+        return 1.0
+    return float(min(numerador / denominador, 1.0))
+
+def aplicar_shrinkage(S, intensidade):
+    """(1 - δ)·S + δ·(tr(S)/N)·I"""
+    alvo = np.trace(S) / S.shape[0]
+    resultado = (1.0 - intensidade) * S
+    resultado[np.diag_indices_from(resultado)] += intensidade * alvo
+    return resultado
+
+
+# --- 3. ESTIMADOR DE JANELA (INCLUIR / REMOVER) ---
+
+class EstimadorJanela:
+    """
+    Estatísticas suficientes de uma janela de retornos diários:
+        n, Σx, Σxx^T, Σ||x||²·x, Σ||x||², Σ||x||⁴
+    Todas são somas, então incluir e remover um dia custa O(N²).
+
+    Se 'tamanho_janela' for dado, guarda os dias da janela e
+    remove automaticamente o mais antigo ao incluir um novo.
+    """
+
+    def __init__(self, n_ativos, tamanho_janela=None):
+        self.n_ativos = n_ativos
+        self.tamanho_janela = tamanho_janela
+        self.n = 0
+        self.soma = np.zeros(n_ativos)
+        self.soma_produtos = np.zeros((n_ativos, n_ativos))
+        self.soma_norma2_x = np.zeros(n_ativos)
+        self.soma_norma2 = 0.0
+        self.soma_norma4 = 0.0
+        self.janela = deque()
+
+    @classmethod
+    def de_retornos(cls, retornos, tamanho_janela=None):
+        """Cria o estimador a partir de uma matriz T x N (de uma só vez, via BLAS)."""
+        R = np.asarray(retornos, dtype=np.float64)
+        if tamanho_janela is not None:
+            R = R[-tamanho_janela:]
+        estimador = cls.de_blocos((R,), R.shape[1])
+        estimador.tamanho_janela = tamanho_janela
+        if tamanho_janela is not None:
+            estimador.janela.extend(R)
+        return estimador
+
+    @classmethod
+    def de_blocos(cls, blocos, n_ativos):
+        """
+        Como 'de_retornos', mas somando bloco a bloco (cada bloco:
+        alguns dias x N, ex: de uma 'base_retornos.BaseRetornos').
+        A memória fica em O(bloco·N + N²), qualquer que seja T.
+        """
+        estimador = cls(n_ativos)
+        for bloco in blocos:
+            R = np.asarray(bloco, dtype=np.float64)
+            norma2 = np.einsum('ij,ij->i', R, R)
+            estimador.n += R.shape[0]
+            estimador.soma += R.sum(axis=0)
+            estimador.soma_produtos += R.T @ R
+            estimador.soma_norma2_x += norma2 @ R
+            estimador.soma_norma2 += float(norma2.sum())
+            estimador.soma_norma4 += float(norma2 @ norma2)
+        return estimador
+
+    def _acumular(self, x, sinal):
+        norma2 = x @ x
+        self.n += sinal
+        self.soma += sinal * x
+        self.soma_produtos += sinal * np.outer(x, x)
+        self.soma_norma2_x += sinal * norma2 * x
+        self.soma_norma2 += sinal * norma2
+        self.soma_norma4 += sinal * norma2 ** 2
+
+    def incluir(self, x):
+        """Inclui um dia (vetor de N retornos). Remove o mais antigo se a janela encher."""
+        x = np.asarray(x, dtype=np.float64)
+        self._acumular(x, +1)
+        if self.tamanho_janela is not None:
+            self.janela.append(x)
+            if len(self.janela) > self.tamanho_janela:
+                self._acumular(self.janela.popleft(), -1)
+
+    def remover(self, x):
+        """Remove um dia (vetor de N retornos) já incluído."""
+        self._acumular(np.asarray(x, dtype=np.float64), -1)
+
+    # --- Estimativas ---
+
+    def media(self):
+        return self.soma / self.n
+
+    def _cov_empirica(self):
+        """Covariância empírica normalizada por 1/n."""
+        m = self.media()
+        S = self.soma_produtos / self.n
+        S -= np.outer(m, m)   # (No próprio S: uma matriz N x N a menos)
+        return S
+
+    def _intensidade_ledoit_wolf(self, S):
+        """
+        Intensidade de Ledoit-Wolf (2004). Usa Σ_t ||y_t||⁴ (y = x - média),
+        obtido das somas guardadas sem revisitar os dias.
+        """
+        m = self.media()
+        mm = m @ m
+        soma_b = self.soma @ m                           # Σ x·m
+        soma_b2 = m @ self.soma_produtos @ m             # Σ (x·m)²
+        soma_ab = self.soma_norma2_x @ m                 # Σ ||x||² (x·m)
+        soma_y4 = (self.soma_norma4 + 4 * soma_b2 + self.n * mm ** 2
+                   - 4 * soma_ab + 2 * mm * self.soma_norma2 - 4 * mm * soma_b)
+
+        mu = np.trace(S) / self.n_ativos
+        delta2 = np.sum(S ** 2) - 2 * mu * np.trace(S) + mu ** 2 * self.n_ativos
+        if delta2 <= 0:
+            return 0.0
+        beta2 = (soma_y4 - self.n * np.sum(S ** 2)) / self.n ** 2
+        return float(min(max(beta2, 0.0), delta2) / delta2)
+
+    def covariancia(self, metodo='amostral'):
+        """
+        Covariância diária:
+        - 'amostral':    igual a pandas .cov() (normalizada por n - 1)
+        - 'ledoit_wolf': shrinkage de Ledoit-Wolf
+        - 'oas':         shrinkage OAS
+        """
+        S = self._cov_empirica()
+        if metodo == 'amostral':
+            S *= self.n / (self.n - 1)
+            return S
+        amostral = S * self.n / (self.n - 1)
+        if metodo == 'ledoit_wolf':
+            return aplicar_shrinkage(amostral, self._intensidade_ledoit_wolf(S))
+        if metodo == 'oas':
+            return aplicar_shrinkage(amostral, intensidade_oas(S, self.n))
+        raise ValueError(f"Método de covariância desconhecido: {metodo}")
+
+    # --- Persistência ---
+
+    def salvar(self, caminho):
+        np.savez(caminho, n=self.n, soma=self.soma, soma_produtos=self.soma_produtos,
+                 soma_norma2_x=self.soma_norma2_x, soma_norma2=self.soma_norma2,
+                 soma_norma4=self.soma_norma4,
+                 tamanho_janela=-1 if self.tamanho_janela is None else self.tamanho_janela,
+                 janela=np.array(self.janela).reshape(-1, self.n_ativos))
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho) as dados:
+            tamanho = int(dados['tamanho_janela'])
+            estimador = cls(dados['soma'].shape[0], None if tamanho < 0 else tamanho)
+            estimador.n = int(dados['n'])
+            estimador.soma = dados['soma']
+            estimador.soma_produtos = dados['soma_produtos']
+            estimador.soma_norma2_x = dados['soma_norma2_x']
+            estimador.soma_norma2 = float(dados['soma_norma2'])
+            estimador.soma_norma4 = float(dados['soma_norma4'])
+            estimador.janela.extend(dados['janela'])
+        return estimador
+
+
+# --- 4. ESTIMADOR EXPONENCIAL (EWMA) ---
+
+class EstimadorEWMA:
+    """
+    Média e covariância com pesos exponenciais (estilo RiskMetrics):
+    o dia de hoje pesa 1 e um dia de 'meia_vida' dias atrás pesa 1/2.
+    """
+
+    def __init__(self, n_ativos, meia_vida=63):
+        self.n_ativos = n_ativos
+        self.decaimento = 0.5 ** (1.0 / meia_vida)
+        self.soma_pesos = 0.0
+        self.soma_pesos2 = 0.0
+        self.media_atual = np.zeros(n_ativos)
+        self.comomento = np.zeros((n_ativos, n_ativos))
+
+    @classmethod
+    def de_retornos(cls, retornos, meia_vida=63):
+        retornos = np.asarray(retornos)
+        return cls.de_blocos((retornos,), retornos.shape[1], meia_vida)
+
+    @classmethod
+    def de_blocos(cls, blocos, n_ativos, meia_vida=63):
+        """Inclui os dias bloco a bloco, em ordem cronológica."""
+        estimador = cls(n_ativos, meia_vida)
+        for bloco in blocos:
+            estimador.incluir_bloco(bloco)
+        return estimador
+
+    def incluir_bloco(self, bloco):
+        """
+        Inclui vários dias (b x N, em ordem cronológica) de uma vez, via BLAS:
+        o bloco vira um "mini-estimador" com pesos λ^(b-1), ..., λ, 1
+        (média ponderada e R_c^T diag(w) R_c) e é combinado ao estado atual,
+        que decai λ^b (fórmula de Chan para médias/co-momentos ponderados).
+        O resultado é o mesmo de 'incluir' dia a dia.
+        """
+        R = np.asarray(bloco, dtype=np.float64)
+        b = R.shape[0]
+        if b == 0:
+            return
+        pesos = self.decaimento ** np.arange(b - 1, -1, -1, dtype=np.float64)
+        soma_bloco = float(pesos.sum())
+        media_bloco = (pesos @ R) / soma_bloco
+        R_c = R - media_bloco
+        comomento_bloco = (R_c * pesos[:, None]).T @ R_c
+
+        decaimento_bloco = self.decaimento ** b
+        soma_antiga = decaimento_bloco * self.soma_pesos
+        self.soma_pesos = soma_antiga + soma_bloco
+        self.soma_pesos2 = decaimento_bloco ** 2 * self.soma_pesos2 + float(pesos @ pesos)
+        delta = media_bloco - self.media_atual
+        self.media_atual = self.media_atual + delta * (soma_bloco / self.soma_pesos)
+        self.comomento *= decaimento_bloco
+        self.comomento += comomento_bloco
+        self.comomento += np.outer(delta, delta) * (soma_antiga * soma_bloco / self.soma_pesos)
+
+    def incluir(self, x):
+        """Inclui um dia em O(N²) (média e co-momento ponderados, forma de West)."""
+        x = np.asarray(x, dtype=np.float64)
+        self.soma_pesos = self.decaimento * self.soma_pesos + 1.0
+        self.soma_pesos2 = self.decaimento ** 2 * self.soma_pesos2 + 1.0
+        self.comomento *= self.decaimento
+        delta = x - self.media_atual
+        self.media_atual = self.media_atual + delta / self.soma_pesos
+        self.comomento += np.outer(delta, x - self.media_atual)
+
+    def media(self):
+        return self.media_atual.copy()
+
+    def n_efetivo(self):
+        """Nº efetivo de observações: (Σw)² / Σw²."""
+        return self.soma_pesos ** 2 / self.soma_pesos2
+
+    def covariancia(self, metodo='amostral'):
+        """Covariância ponderada (com correção de viés); 'oas' também disponível."""
+        S = self.comomento / self.soma_pesos
+        n_ef = self.n_efetivo()
+        amostral = S * n_ef / (n_ef - 1.0)
+        if metodo == 'amostral':
+            return amostral
+        if metodo == 'oas':
+            return aplicar_shrinkage(amostral, intensidade_oas(S, n_ef))
+        raise ValueError(f"Método não suportado no EWMA: {metodo}")
+
+
+# --- 5. FUNÇÃO AUXILIAR ---
+
+def estimar_mu_sigma(retornos, metodo='amostral', meia_vida=None, dias_ano=DIAS_UTEIS_ANO):
+    """
+    μ e Σ anualizados de um DataFrame de retornos diários,
+    no mesmo formato do 'preparar_dados' (Series / DataFrame).
+
+    - metodo: 'amostral', 'ledoit_wolf' ou 'oas'
+    - meia_vida: se dada, usa o EWMA (métodos 'amostral' e 'oas')
+    """
+    if meia_vida:
+        estimador = EstimadorEWMA.de_retornos(retornos, meia_vida)
+    else:
+        estimador = EstimadorJanela.de_retornos(retornos)
+    return momentos_anualizados(estimador, list(retornos.columns), metodo, dias_ano)
+
+def momentos_anualizados(estimador, nomes, metodo='amostral', dias_ano=DIAS_UTEIS_ANO):
+    """μ (Series) e Σ (DataFrame) anualizados de um estimador já alimentado."""
+    mu = pd.Series(estimador.media() * dias_ano, index=nomes)
+    cov = estimador.covariancia(metodo)
+    cov *= dias_ano
+    return mu, pd.DataFrame(cov, index=nomes, columns=nomes, copy=False)
@@ -0,0 +1,463 @@
+"""
+================================================
+ARQUIVO DO MOTOR EXATO DA FRONTEIRA EFICIENTE
+================================================
+
+Alternativa ao NSGA-II para o mesmo problema de
+'modelo_problema.py' (média-variância, sem venda a
+descoberto, soma dos pesos = 1).
+
+Como o problema é convexo, a fronteira eficiente pode ser
+calculada EXATAMENTE pelo Critical Line Algorithm (CLA) de
+Markowitz: ela é uma sequência de "portfólios de canto"
+(corner portfolios) e, entre dois cantos vizinhos, os pesos
+variam linearmente com o retorno-alvo.
+
+Referência: Bailey & López de Prado (2013),
+"An Open-Source Implementation of the Critical-Line Algorithm
+for Portfolio Optimization".
+"""
+
+import numpy as np
+
+# Tolerância numérica para limites e soma dos pesos
+TOLERANCIA = 1e-9
+
+
+# --- 1. RESULTADO (mesmo formato do 'res' do Pymoo) ---
+
+class ResultadoFronteira:
+    """
+    Resultado do motor exato, com os mesmos atributos usados
+    pelo 'otimizar.py' no resultado do Pymoo:
+
+    - F: objetivos (Coluna 0: Risco/Variância, Coluna 1: -Retorno)
+    - X: pesos 'w' de cada portfólio (uma linha por portfólio)
+
+    Também guarda os portfólios de canto ('X_cantos') e os
+    multiplicadores 'lambdas' de cada um.
+    """
+
+    def __init__(self, X, F, X_cantos, lambdas):
+        self.X = X
+        self.F = F
+        self.X_cantos = X_cantos
+        self.lambdas = lambdas
+
+
+# --- 2. CRITICAL LINE ALGORITHM ---
+
+class CriticalLineAlgorithm:
+    """
+    Calcula os portfólios de canto da fronteira eficiente para
+    min w^T Σ w - λ w^T μ, com soma(w) = 1 e lb <= w <= ub.
+    """
+
+    def __init__(self, retornos_medios, matriz_cov, limite_inferior=0.0, limite_superior=1.0):
+        self.mu = np.asarray(retornos_medios, dtype=np.float64).ravel()
+        self.cov = np.asarray(matriz_cov, dtype=np.float64)
+        n = len(self.mu)
+        self.lb = np.broadcast_to(np.asarray(limite_inferior, dtype=np.float64), (n,)).copy()
+        self.ub = np.broadcast_to(np.asarray(limite_superior, dtype=np.float64), (n,)).copy()
+
+        if self.lb.sum() > 1.0 + TOLERANCIA or self.ub.sum() < 1.0 - TOLERANCIA:
+            raise ValueError("Limites de peso inviáveis: soma(lb) > 1 ou soma(ub) < 1.")
+
+        self.pesos = []     # Portfólios de canto
+        self.lambdas = []   # λ de cada canto (decrescente)
+
+    # --- Passo inicial: portfólio de máximo retorno ---
+
+    def _solucao_inicial(self):
+        """
+        Começa com todos os pesos no limite inferior e "enche"
+        os ativos de maior retorno até a soma chegar a 1.
+
+        Se outros ativos tiverem o MESMO retorno do último
+        preenchido (empate), o portfólio de máximo retorno não é
+        único: entre eles, fica o de menor variância
+        ('_minima_variancia_empatados'), e os que não estão em
+        um limite são os livres.
+        """
+        w = self.lb.copy()
+        ordem = np.argsort(self.mu)[::-1]
+        livre = ordem[0]
+        for i in ordem:
+            livre = i
+            w[i] = min(self.ub[i], w[i] + (1.0 - w.sum()))
+            if w.sum() >= 1.0 - TOLERANCIA:
+                break
+        escala = TOLERANCIA * max(1.0, abs(self.mu[livre]))
+        empatados = np.flatnonzero(np.abs(self.mu - self.mu[livre]) <= escala)
+        if len(empatados) == 1:
+            return [int(livre)], w
+        return self._minima_variancia_empatados(w, [int(i) for i in empatados], int(livre))
+
+    def _minima_variancia_empatados(self, w, empatados, livre):
+        """
+        min w^T Σ w movendo só os pesos 'empatados' (soma e limites
+        mantidos; os demais ficam fixos). QP pequeno, resolvido por
+        conjunto ativo primal a partir do 'w' (viável) do enchimento.
+        Retorna (livres, w); sempre há ao menos um livre.
+        """
+        w = w.copy()
+        tol_var = TOLERANCIA * max(float(np.mean(np.diag(self.cov))), np.finfo(float).tiny)
+        livres = [i for i in empatados
+                  if i == livre or self.lb[i] + TOLERANCIA < w[i] < self.ub[i] - TOLERANCIA]
+        presos = [i for i in empatados if i not in livres]
+
+        for _ in range(10 * len(empatados) + 10):
+            k = len(livres)
+            gradiente = self.cov @ w
+            if k > 1:
+                # Passo d (soma zero) até o mínimo com os presos fixos (KKT; lstsq aceita Σ singular)
+                kkt = np.zeros((k + 1, k + 1))
+                kkt[:k, :k] = self.cov[np.ix_(livres, livres)]
+                kkt[:k, k] = kkt[k, :k] = 1.0
+                d = np.linalg.lstsq(kkt, np.append(-gradiente[livres], 0.0), rcond=None)[0][:k]
+            else:
+                d = np.zeros(k)
+
+            if np.max(np.abs(d), initial=0.0) > TOLERANCIA:
+                # Anda até o mínimo ou até o primeiro limite atingido
+                passo, bloqueio = 1.0, None
+                for j, i in enumerate(livres):
+                    if d[j] > TOLERANCIA:
+                        alcance = (self.ub[i] - w[i]) / d[j]
+                    elif d[j] < -TOLERANCIA:
+                        alcance = (self.lb[i] - w[i]) / d[j]
+                    else:
+                        continue
+                    if alcance < passo:
+                        passo, bloqueio = alcance, j
+                w[livres] += passo * d
+                if bloqueio is not None:
+                    i = livres.pop(bloqueio)
+                    w[i] = self.ub[i] if d[bloqueio] > 0 else self.lb[i]
+                    presos.append(i)
+                continue
+
+            # Mínimo no conjunto atual: algum preso quer sair do limite?
+            nivel = float(np.mean(gradiente[livres]))
+            ganhos = [(nivel - gradiente[i]) if w[i] <= self.lb[i] + TOLERANCIA else (gradiente[i] - nivel)
+                      for i in presos]
+            if not ganhos or max(ganhos) <= tol_var:
+                break
+            livres.append(presos.pop(int(np.argmax(ganhos))))
+
+        return livres, w
+
+    # --- Álgebra do sistema KKT restrito aos ativos livres ---
+
+    def _matrizes(self, livres, w):
+        """Blocos de Σ, μ e w para os ativos livres (F) e presos (B)."""
+        mascara = np.zeros(len(self.mu), dtype=bool)
+        mascara[livres] = True
+        presos = np.flatnonzero(~mascara)
+        cov_f = self.cov[np.ix_(livres, livres)]
+        mu_f = self.mu[livres]
+        if len(presos):
+            cov_fb = self.cov[np.ix_(livres, presos)]
+            w_b = w[presos]
+        else:
+            cov_fb, w_b = None, None
+        return cov_f, cov_fb, mu_f, w_b, presos
+
+    @staticmethod
+    def _eventos_prender(cov_f_inv, cov_fb, mu_f, w_b, lb_f, ub_f):
+        """
+        CASO A (vetorizado): para cada ativo livre j, o λ em que
+        ele atinge um de seus limites, e qual limite.
+        """
+        uns_f = np.ones(len(mu_f))
+        c4 = cov_f_inv @ uns_f
+        c2 = cov_f_inv @ mu_f
+        c1 = uns_f @ c4
+        c3 = uns_f @ c2
+        c = -c1 * c2 + c3 * c4
+        limite = np.where(c > 0, ub_f, lb_f)
+
+        if w_b is None:
+            numerador = c4 - c1 * limite
+        else:
+            l1 = w_b.sum()
+            l3 = cov_f_inv @ (cov_fb @ w_b)
+            l2 = l3.sum()
+            numerador = (1 - l1 + l2) * c4 - c1 * (limite + l3)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lam = np.where(CriticalLineAlgorithm._c_valido(c, c1 * c2, c3 * c4), numerador / c, -np.inf)
+        return lam, limite
+
+    def _eventos_liberar(self, cov_f_inv, cov_fb, mu_f, w_b, presos):
+        """
+        CASO B (vetorizado): para cada ativo preso i, o λ em que
+        ele passa a ser livre.
+
+        A inversa de Σ_FF ampliada com o ativo i vem do complemento
+        de Schur, então todos os candidatos saem de uma única
+        multiplicação de matrizes (em vez de uma inversão por ativo).
+        """
+        uns_f = np.ones(len(mu_f))
+        a1 = cov_f_inv @ uns_f
+        am = cov_f_inv @ mu_f
+        c1 = uns_f @ a1
+        c3 = uns_f @ am
+
+        U = cov_f_inv @ cov_fb                                 # u_i = Σ_FF⁻¹ Σ_Fi
+        s = self.cov[presos, presos] - np.sum(cov_fb * U, axis=0)
+        # s ~ 0: o ativo i é combinação linear dos livres (Σ ampliada
+        # singular); não pode ser liberado
+        validos = np.abs(s) > TOLERANCIA * max(float(np.mean(np.diag(self.cov))), np.finfo(float).tiny)
+        s = np.where(validos, s, 1.0)
+        e1 = 1.0 - U.sum(axis=0)                               # 1 - uᵀ1
+        em = self.mu[presos] - U.T @ mu_f                      # μ_i - uᵀμ_F
+
+        c1_novo = c1 + e1 ** 2 / s
+        c3_novo = c3 + e1 * em / s
+        c2_i = em / s
+        c4_i = e1 / s
+        c = -c1_novo * c2_i + c3_novo * c4_i
+
+        # Termos dos pesos presos, agora sem o ativo i
+        w_i = w_b
+        z_f = cov_fb @ w_b
+        z_i = self.cov[np.ix_(presos, presos)] @ w_b - self.cov[presos, presos] * w_i
+        uz = U.T @ z_f - w_i * np.sum(U * cov_fb, axis=0)
+        l1 = w_b.sum() - w_i
+        l3_i = (z_i - uz) / s
+        l2 = a1 @ z_f - w_i * U.sum(axis=0) + e1 * l3_i
+
+        numerador = (1 - l1 + l2) * c4_i - c1_novo * (w_i + l3_i)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(validos & self._c_valido(c, c1_novo * c2_i, c3_novo * c4_i),
+                            numerador / c, -np.inf)
+
+    @staticmethod
+    def _c_valido(c, termo_a, termo_b):
+        """
+        c = termo_b - termo_a é nulo (a menos de arredondamento) quando
+        os retornos dos livres empatam: o evento não depende de λ.
+        """
+        return np.abs(c) > TOLERANCIA * (np.abs(termo_a) + np.abs(termo_b))
+
+    @staticmethod
+    def _pesos_livres(cov_f_inv, cov_fb, mu_f, w_b, lam):
+        """Pesos dos ativos livres para um dado λ (condições KKT)."""
+        uns_f = np.ones(len(mu_f))
+        g1 = uns_f @ cov_f_inv @ mu_f
+        g2 = uns_f @ cov_f_inv @ uns_f
+        if w_b is None:
+            gamma = -lam * g1 / g2 + 1 / g2
+            w1 = 0.0
+        else:
+            g3 = w_b.sum()
+            w1 = cov_f_inv @ cov_fb @ w_b
+            g4 = uns_f @ w1
+            gamma = -lam * g1 / g2 + (1 - g3 + g4) / g2
+        w2 = cov_f_inv @ uns_f
+        w3 = cov_f_inv @ mu_f
+        return -w1 + gamma * w2 + lam * w3
+
+    @staticmethod
+    def _inversa(cov_f):
+        """
+        Σ_FF⁻¹ via Cholesky; se Σ_FF for singular (ativos livres
+        colineares, ex: um ETF e seu BDR), a pseudo-inversa.
+        """
+        try:
+            L = np.linalg.cholesky(cov_f)
+            diagonal = np.diag(L) ** 2
+            if diagonal.min() > TOLERANCIA * diagonal.max():
+                L_inv = np.linalg.inv(L)
+                return L_inv.T @ L_inv
+        except np.linalg.LinAlgError:
+            pass
+        return np.linalg.pinv(cov_f, hermitian=True)
+
+    # --- Laço principal ---
+
+    def resolver(self):
+        """Calcula e retorna (pesos_dos_cantos, lambdas)."""
+        livres, w = self._solucao_inicial()
+        self.pesos = [w.copy()]
+        self.lambdas = [np.inf]
+
+        while True:
+            cov_f, cov_fb, mu_f, w_b, presos = self._matrizes(livres, w)
+            cov_f_inv = self._inversa(cov_f)
+
+            # Só eventos com λ estritamente menor que o anterior: evita que
+            # erros de arredondamento prendam/soltem o mesmo ativo em ciclo
+            lam_anterior = self.lambdas[-1]
+            lam_maximo = lam_anterior - TOLERANCIA * max(1.0, abs(lam_anterior)) \
+                if np.isfinite(lam_anterior) else np.inf
+
+            # CASO A: um ativo livre vai para um limite
+            lam_entra, i_entra, limite_entra = -np.inf, None, None
+            if len(livres) > 1:
+                lams, limites = self._eventos_prender(cov_f_inv, cov_fb, mu_f, w_b,
+                                                      self.lb[livres], self.ub[livres])
+                lams = np.where(lams < lam_maximo, lams, -np.inf)
+                j = int(np.argmax(lams))
+                if np.isfinite(lams[j]):
+                    lam_entra, i_entra, limite_entra = lams[j], livres[j], limites[j]
+
+            # CASO B: um ativo preso no limite passa a ser livre
+            lam_sai, i_sai = -np.inf, None
+            if len(presos):
+                lams = self._eventos_liberar(cov_f_inv, cov_fb, mu_f, w_b, presos)
+                lams = np.where(lams < lam_maximo, lams, -np.inf)
+                j = int(np.argmax(lams))
+                if np.isfinite(lams[j]):
+                    lam_sai, i_sai = lams[j], int(presos[j])
+
+            if (i_entra is None or lam_entra < 0) and (i_sai is None or lam_sai < 0):
+                # Nenhum evento com λ >= 0: chegamos ao portfólio de mínima variância
+                self.lambdas.append(0.0)
+                mu_f = np.zeros_like(mu_f)
+            else:
+                if lam_entra > lam_sai:
+                    self.lambdas.append(lam_entra)
+                    livres.remove(i_entra)
+                    w[i_entra] = limite_entra
+                else:
+                    self.lambdas.append(lam_sai)
+                    livres.append(i_sai)
+                cov_f, cov_fb, mu_f, w_b, _ = self._matrizes(livres, w)
+                cov_f_inv = self._inversa(cov_f)
+
+            w[livres] = self._pesos_livres(cov_f_inv, cov_fb, mu_f, w_b, self.lambdas[-1])
+            self.pesos.append(w.copy())
+
+            if self.lambdas[-1] == 0.0:
+                break
+
+        self._limpar()
+        return np.array(self.pesos), np.array(self.lambdas)
+
+    def _limpar(self):
+        """
+        Remove cantos com erro numérico (fora dos limites ou soma != 1)
+        e cantos que não diminuem o retorno (fora da fronteira eficiente).
+        """
+        pesos, lambdas = [], []
+        for w, lam in zip(self.pesos, self.lambdas):
+            if abs(w.sum() - 1.0) > 1e-6:
+                continue
+            if np.any(w < self.lb - 1e-6) or np.any(w > self.ub + 1e-6):
+                continue
+            pesos.append(np.clip(w, self.lb, self.ub))
+            lambdas.append(lam)
+
+        pesos_finais, lambdas_finais = [], []
+        for w, lam in zip(pesos, lambdas):
+            if pesos_finais and w @ self.mu > pesos_finais[-1] @ self.mu - TOLERANCIA:
+                # Retorno não caiu: ponto redundante ou fora da fronteira
+                if w @ self.cov @ w < pesos_finais[-1] @ self.cov @ pesos_finais[-1]:
+                    pesos_finais[-1], lambdas_finais[-1] = w, lam
+                continue
+            pesos_finais.append(w)
+            lambdas_finais.append(lam)
+
+        self.pesos = pesos_finais
+        self.lambdas = lambdas_finais
+
+
+# --- 3. INTERPOLAÇÃO E FUNÇÃO PRINCIPAL ---
+
+def interpolar_fronteira(pesos_cantos, retornos_medios, n_pontos):
+    """
+    Gera 'n_pontos' portfólios com retornos-alvo igualmente
+    espaçados, do mínimo risco ao máximo retorno.
+
+    Entre dois cantos vizinhos, os pesos eficientes são uma
+    combinação linear dos dois (interpolação EXATA).
+    """
+    mu = np.asarray(retornos_medios, dtype=np.float64)
+    retornos_cantos = pesos_cantos @ mu          # Decrescente
+    if len(pesos_cantos) == 1 or n_pontos <= 1:
+        return pesos_cantos[-1:].copy()
+
+    alvos = np.linspace(retornos_cantos[-1], retornos_cantos[0], n_pontos)
+    # Índice k do canto tal que retorno[k] >= alvo >= retorno[k+1]
+    k = np.searchsorted(-retornos_cantos, -alvos, side='right') - 1
+    k = np.clip(k, 0, len(pesos_cantos) - 2)
+    r_a, r_b = retornos_cantos[k], retornos_cantos[k + 1]
+    alfa = np.where(r_a > r_b, (alvos - r_b) / np.where(r_a > r_b, r_a - r_b, 1.0), 1.0)
+    return alfa[:, None] * pesos_cantos[k] + (1.0 - alfa[:, None]) * pesos_cantos[k + 1]
+
+def calcular_fronteira_exata(retornos_medios, matriz_cov, n_pontos=100,
+                             limite_inferior=0.0, limite_superior=1.0):
+    """
+    Calcula a fronteira eficiente exata (CLA) e retorna um
+    'ResultadoFronteira' com os cantos e 'n_pontos'
+    portfólios interpolados (em F/X, como o Pymoo).
+    """
+    mu = np.asarray(retornos_medios, dtype=np.float64)
+    cov = np.asarray(matriz_cov, dtype=np.float64)
+
+    cla = CriticalLineAlgorithm(mu, cov, limite_inferior, limite_superior)
+    pesos_cantos, lambdas = cla.resolver()
+
+    X = interpolar_fronteira(pesos_cantos, mu, n_pontos)
+    F = np.column_stack([
+        np.einsum('ij,jk,ik->i', X, cov, X),   # Risco (Variância)
+        -X.dot(mu)                             # -Retorno
+    ])
+    return ResultadoFronteira(X, F, pesos_cantos, lambdas)
+
+
+# --- Bloco de Teste ---
+if __name__ == '__main__':
+    """
+    Conferência do CLA contra um otimizador quadrático genérico
+    (SLSQP do scipy) em casos-limite: retornos empatados no topo,
+    todos os μ iguais, limite superior < 1 e ativos colineares
+    (Σ singular). Execute: python fronteira_exata.py
+    """
+    from scipy.optimize import minimize
+
+    def variancia_qp(mu, cov, retorno_alvo=None, limite_superior=1.0):
+        """min w^T Σ w (com retorno >= alvo), pelo SLSQP; melhor de 4 partidas."""
+        n = len(mu)
+        restricoes = [{'type': 'eq', 'fun': lambda w: w.sum() - 1.0}]
+        if retorno_alvo is not None:
+            restricoes.append({'type': 'ineq', 'fun': lambda w: w @ mu - retorno_alvo})
+        melhor = np.inf
+        for semente in range(4):
+            w0 = np.random.default_rng(semente).dirichlet(np.ones(n))
+            r = minimize(lambda w: w @ cov @ w, w0, jac=lambda w: 2 * cov @ w,
+                         bounds=[(0.0, limite_superior)] * n, constraints=restricoes,
+                         method='SLSQP', options={'ftol': 1e-15, 'maxiter': 1000})
+            if r.success:
+                melhor = min(melhor, r.fun)
+        return melhor
+
+    rng = np.random.default_rng(3)
+    n = 8
+    retornos = rng.normal(size=(500, n)) * 0.01
+    mu_base = rng.uniform(0.05, 0.20, n)
+    topo = np.argsort(mu_base)[::-1]
+    mu_empate = mu_base.copy()
+    mu_empate[topo[1:3]] = mu_base[topo[0]]
+    colineares = retornos.copy()
+    colineares[:, 1] = colineares[:, 0]
+    colineares[:, 2] = 0.5 * colineares[:, 0] + 0.5 * colineares[:, 3]
+
+    casos = {
+        'aleatório': (mu_base, np.cov(retornos.T) * 252, 1.0),
+        'empate no topo': (mu_empate, np.cov(retornos.T) * 252, 1.0),
+        'todos os μ iguais': (np.full(n, 0.1), np.cov(retornos.T) * 252, 1.0),
+        'empate, limite 0,3': (mu_empate, np.cov(retornos.T) * 252, 0.3),
+        'colineares': (mu_base, np.cov(colineares.T) * 252, 1.0),
+    }
+    print("--- TESTANDO 'fronteira_exata.py' (CLA x SLSQP) ---")
+    for nome, (mu, cov, limite) in casos.items():
+        cantos, _ = CriticalLineAlgorithm(mu, cov, 0.0, limite).resolver()
+        X = interpolar_fronteira(cantos, mu, 10)
+        minima = variancia_qp(mu, cov, None, limite)
+        erros = [(w @ cov @ w - variancia_qp(mu, cov, w @ mu, limite)) / minima for w in X]
+        erros.append((min(w @ cov @ w for w in cantos) - minima) / minima)
+        situacao = "OK" if max(erros) < 1e-6 else "FALHOU"
+        print(f"  {nome:<20} cantos: {len(cantos):2d} | maior excesso de variância: {max(erros):.1e}  {situacao}")
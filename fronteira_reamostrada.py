@@ -0,0 +1,257 @@
+"""
+================================================
+ARQUIVO DA FRONTEIRA REAMOSTRADA (MICHAUD)
+================================================
+
+μ e Σ estimados uma única vez ('preparar_dados.py') carregam o
+erro de estimação para a fronteira: de uma execução para outra,
+a carteira de Máximo Sharpe do 'plot.py' pode pular de uma
+mistura pesada em cripto para uma pesada em renda fixa.
+
+A fronteira reamostrada (Michaud) suaviza isso:
+1. Sorteia centenas de amostras "bootstrap em blocos" da
+   'matriz_retornos_historicos' (blocos de dias consecutivos,
+   circulares, para manter a dependência serial);
+2. Reestima μ e Σ de cada amostra. Cada amostra é só um vetor de
+   contagens (quantas vezes cada dia foi sorteado), então um lote
+   de amostras sai de duas multiplicações de matrizes;
+3. Resolve a fronteira exata (CLA, 'fronteira_exata.py') de cada
+   amostra, em um pool de processos, com NUM_PONTOS carteiras de
+   retornos-alvo igualmente espaçados (o "posto" na fronteira);
+4. Faz a média dos pesos por posto: a fronteira reamostrada.
+   As bandas de confiança (pesos, risco e retorno, avaliados com
+   μ/Σ originais) são os quantis entre as amostras.
+
+Usado pelo 'otimizar.py' com MOTOR_OTIMIZACAO = 'REAMOSTRADA', ou
+direto: python fronteira_reamostrada.py (grava só as bandas).
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import estimador_momentos
+import fronteira_exata
+
+# --- 1. PARÂMETROS ---
+
+NUM_AMOSTRAS = 500          # Nº de amostras bootstrap
+TAMANHO_BLOCO = 21          # Dias consecutivos por bloco (~1 mês de pregões)
+NUM_PONTOS = 100            # Carteiras (postos) por fronteira
+NIVEL_CONFIANCA = 0.90      # Bandas entre os quantis 5% e 95%
+METODOS_COVARIANCIA = ('amostral', 'oas')
+
+# Amostras por tarefa do pool (limitadas também pela memória abaixo)
+AMOSTRAS_POR_LOTE = 32
+LIMITE_MEMORIA_LOTE_MB = 256
+
+ARQUIVO_BANDAS_CSV = 'fronteira_reamostrada_bandas.csv'
+
+# Estado de cada processo do pool (ver '_iniciar_trabalhador')
+_TRABALHADOR = {}
+
+
+# --- 2. BOOTSTRAP EM BLOCOS ---
+
+def contagens_bootstrap(n_dias, n_amostras, tamanho_bloco, rng):
+    """
+    Bootstrap circular em blocos, como contagens (n_amostras x n_dias):
+    quantas vezes cada dia entrou em cada amostra (cada linha soma n_dias).
+    """
+    n_blocos = -(-n_dias // tamanho_bloco)
+    inicios = rng.integers(0, n_dias, size=(n_amostras, n_blocos))
+    dias = (inicios[:, :, None] + np.arange(tamanho_bloco)) % n_dias
+    dias = dias.reshape(n_amostras, -1)[:, :n_dias]
+    deslocados = dias + (np.arange(n_amostras) * n_dias)[:, None]
+    return np.bincount(deslocados.ravel(), minlength=n_amostras * n_dias).reshape(n_amostras, n_dias)
+
+def momentos_lote(R, contagens, metodo='amostral', dias_ano=estimador_momentos.DIAS_UTEIS_ANO):
+    """
+    μ (B x N) e Σ (B x N x N) anualizados de um lote de amostras,
+    iguais a reestimar sobre as matrizes reamostradas (sem montá-las):
+        m = c^T R / T    e    S = R^T diag(c) R / T - m m^T
+    """
+    n = R.shape[0]
+    c = np.asarray(contagens, dtype=np.float64)
+    medias = (c @ R) / n
+    covs = np.matmul(R.T[None, :, :] * c[:, None, :], R)
+    covs /= n
+    covs -= medias[:, :, None] * medias[:, None, :]     # Covariância empírica (1/n)
+    if metodo == 'oas':
+        for b in range(len(covs)):
+            intensidade = estimador_momentos.intensidade_oas(covs[b], n)
+            covs[b] = estimador_momentos.aplicar_shrinkage(covs[b] * n / (n - 1), intensidade)
+    elif metodo == 'amostral':
+        covs *= n / (n - 1)
+    else:
+        raise ValueError(f"Método não suportado na reamostragem: {metodo} (use {METODOS_COVARIANCIA})")
+    covs *= dias_ano
+    return medias * dias_ano, covs
+
+def amostras_por_lote(n_dias, n_ativos):
+    """Tamanho do lote: até AMOSTRAS_POR_LOTE, sem passar de LIMITE_MEMORIA_LOTE_MB."""
+    bytes_por_amostra = 8 * n_ativos * (n_dias + n_ativos)
+    return int(max(1, min(AMOSTRAS_POR_LOTE, LIMITE_MEMORIA_LOTE_MB * 2**20 // bytes_por_amostra)))
+
+
+# --- 3. FRONTEIRAS DAS AMOSTRAS (POOL DE PROCESSOS) ---
+
+def _iniciar_trabalhador(R, metodo, dias_ano, n_pontos):
+    """Recebe os retornos uma vez por processo (as tarefas levam só as contagens)."""
+    _TRABALHADOR.update(R=R, metodo=metodo, dias_ano=dias_ano, n_pontos=n_pontos)
+
+def _fronteiras_lote(contagens):
+    """
+    Pesos (B x NUM_PONTOS x N) das fronteiras exatas de um lote
+    de amostras. Amostras em que o CLA falha (ex: Σ singular)
+    ficam com NaN.
+    """
+    mus, covs = momentos_lote(_TRABALHADOR['R'], contagens, _TRABALHADOR['metodo'],
+                              _TRABALHADOR['dias_ano'])
+    n_pontos = _TRABALHADOR['n_pontos']
+    pesos = np.full((len(mus), n_pontos, mus.shape[1]), np.nan)
+    for b, (mu, cov) in enumerate(zip(mus, covs)):
+        try:
+            cantos, _ = fronteira_exata.CriticalLineAlgorithm(mu, cov).resolver()
+        except (np.linalg.LinAlgError, ValueError):
+            continue
+        X = fronteira_exata.interpolar_fronteira(cantos, mu, n_pontos)
+        if len(X) == n_pontos:
+            pesos[b] = X
+    return pesos
+
+
+# --- 4. RESULTADO ---
+
+class ResultadoReamostragem:
+    """
+    Fronteira reamostrada (X, F no formato do Pymoo, avaliada com
+    μ/Σ originais) e bandas de confiança (limites inferior e
+    superior) por posto:
+    - bandas_pesos:   (2 x NUM_PONTOS x N)
+    - bandas_risco:   (2 x NUM_PONTOS)   variância anual
+    - bandas_retorno: (2 x NUM_PONTOS)
+    """
+
+    def __init__(self, X, F, bandas_pesos, bandas_risco, bandas_retorno, n_amostras, n_falhas):
+        self.X = X
+        self.F = F
+        self.bandas_pesos = bandas_pesos
+        self.bandas_risco = bandas_risco
+        self.bandas_retorno = bandas_retorno
+        self.n_amostras = n_amostras
+        self.n_falhas = n_falhas
+
+    def dataframe_bandas(self, nomes_dos_ativos):
+        """Uma linha por posto: risco, retorno e pesos, cada um com as bandas."""
+        colunas = {
+            'Risco_Anual': self.F[:, 0],
+            'Risco_Inf': self.bandas_risco[0],
+            'Risco_Sup': self.bandas_risco[1],
+            'Retorno_Anual': -self.F[:, 1],
+            'Retorno_Inf': self.bandas_retorno[0],
+            'Retorno_Sup': self.bandas_retorno[1],
+        }
+        for j, nome in enumerate(nomes_dos_ativos):
+            colunas[f'w_{nome}'] = self.X[:, j]
+            colunas[f'w_{nome}_inf'] = self.bandas_pesos[0, :, j]
+            colunas[f'w_{nome}_sup'] = self.bandas_pesos[1, :, j]
+        df = pd.DataFrame(colunas)
+        df.index.name = 'Posto'
+        return df
+
+
+# --- 5. FUNÇÃO PRINCIPAL ---
+
+def calcular_fronteira_reamostrada(matriz_retornos, retornos_medios, matriz_cov,
+                                   n_amostras=NUM_AMOSTRAS, tamanho_bloco=TAMANHO_BLOCO,
+                                   n_pontos=NUM_PONTOS, nivel=NIVEL_CONFIANCA,
+                                   metodo='amostral', n_processos=None, semente=1,
+                                   dias_ano=estimador_momentos.DIAS_UTEIS_ANO):
+    """
+    Fronteira reamostrada de Michaud sobre a matriz de retornos
+    diários (T x N). 'retornos_medios' e 'matriz_cov' (as estimativas
+    pontuais) só servem para avaliar as carteiras (F e bandas).
+    (O EWMA não se aplica: o bootstrap embaralha a ordem dos blocos.)
+    """
+    if metodo not in METODOS_COVARIANCIA:
+        # (Ledoit-Wolf precisa dos momentos de 4ª ordem de cada amostra)
+        print(f"  AVISO: covariância '{metodo}' não suportada na reamostragem; usando 'oas'.")
+        metodo = 'oas'
+    R = np.ascontiguousarray(matriz_retornos, dtype=np.float64)
+    mu = np.asarray(retornos_medios, dtype=np.float64)
+    cov = np.asarray(matriz_cov, dtype=np.float64)
+    n_dias, n_ativos = R.shape
+
+    rng = np.random.default_rng(semente)
+    contagens = contagens_bootstrap(n_dias, n_amostras, tamanho_bloco, rng).astype(np.int32)
+    tamanho_lote = amostras_por_lote(n_dias, n_ativos)
+    if n_processos != 1:
+        n_processos = n_processos or os.cpu_count() or 1
+        # Lotes menores se houver poucas amostras para todos os processos
+        tamanho_lote = max(1, min(tamanho_lote, -(-n_amostras // n_processos)))
+    lotes = [contagens[i:i + tamanho_lote] for i in range(0, n_amostras, tamanho_lote)]
+
+    # Pesos das amostras em float32 (S x NUM_PONTOS x N)
+    pesos = np.empty((n_amostras, n_pontos, n_ativos), dtype=np.float32)
+    parametros = (R, metodo, dias_ano, n_pontos)
+    if n_processos == 1:
+        _iniciar_trabalhador(*parametros)
+        resultados = map(_fronteiras_lote, lotes)
+        for i, lote in enumerate(resultados):
+            pesos[i * tamanho_lote:i * tamanho_lote + len(lote)] = lote
+    else:
+        with ProcessPoolExecutor(max_workers=n_processos, initializer=_iniciar_trabalhador,
+                                 initargs=parametros) as pool:
+            for i, lote in enumerate(pool.map(_fronteiras_lote, lotes)):
+                pesos[i * tamanho_lote:i * tamanho_lote + len(lote)] = lote
+
+    validas = ~np.isnan(pesos[:, 0, 0])
+    n_falhas = int(n_amostras - validas.sum())
+    if not validas.any():
+        raise ValueError("O CLA falhou em todas as amostras bootstrap.")
+    pesos = pesos[validas]
+
+    # Média por posto (os pesos continuam somando 1)
+    X = pesos.mean(axis=0, dtype=np.float64)
+    X /= X.sum(axis=1, keepdims=True)
+    F = np.column_stack([np.einsum('ij,jk,ik->i', X, cov, X), -X @ mu])
+
+    # Bandas: carteiras de cada amostra avaliadas com μ/Σ originais
+    planas = pesos.reshape(-1, n_ativos).astype(np.float64)
+    riscos = np.sum((planas @ cov) * planas, axis=1).reshape(len(pesos), n_pontos)
+    retornos = (planas @ mu).reshape(len(pesos), n_pontos)
+    quantis = ((1.0 - nivel) / 2, 1.0 - (1.0 - nivel) / 2)
+    return ResultadoReamostragem(
+        X, F,
+        np.quantile(pesos, quantis, axis=0),
+        np.quantile(riscos, quantis, axis=0),
+        np.quantile(retornos, quantis, axis=0),
+        int(validas.sum()),
+        n_falhas
+    )
+
+
+# --- 6. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+    import artefato_inputs
+    import preparar_dados
+
+    print("--- FRONTEIRA REAMOSTRADA (MICHAUD) ---")
+    inputs = artefato_inputs.carregar_ou_calcular_inputs()
+    if inputs is None:
+        print("Erro fatal: Não foi possível carregar os dados de input.")
+        exit()
+
+    inicio = time.perf_counter()
+    resultado = calcular_fronteira_reamostrada(inputs['matriz_retornos_historicos'],
+                                               inputs['retornos_medios'], inputs['matriz_cov'],
+                                               dias_ano=preparar_dados.DIAS_UTEIS_ANO)
+    print(f"{resultado.n_amostras} amostras em {time.perf_counter() - inicio:.2f}s "
+          f"({resultado.n_falhas} falhas do CLA).")
+
+    resultado.dataframe_bandas(inputs['nomes_dos_ativos']).to_csv(ARQUIVO_BANDAS_CSV, sep=';', decimal=',')
+    print(f"Bandas de confiança salvas em '{ARQUIVO_BANDAS_CSV}'.")
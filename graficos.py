@@ -0,0 +1,240 @@
+"""
+================================================
+ARQUIVO DA RENDERIZAÇÃO DOS GRÁFICOS (CACHE + PARALELO)
+================================================
+
+O 'plot.py' (e o modo em lote, que gera gráficos para muitas
+execuções/cenários) descreve cada gráfico como uma "tarefa":
+um dict com o tipo, o arquivo PNG de saída, os DADOS (arrays)
+e os PARÂMETROS de desenho.
+
+Este arquivo:
+1. Calcula um hash (SHA-256) de cada tarefa: dados + parâmetros
+   + VERSAO_GRAFICOS. Se o PNG já existe e foi gerado com o
+   mesmo hash (índice '.cache_graficos.json' na pasta do PNG),
+   o gráfico é pulado;
+2. Desenha os gráficos restantes em paralelo (pool de processos),
+   com o backend não interativo 'Agg' do matplotlib.
+
+IMPORTANTE: ao mudar o código de desenho, incremente
+VERSAO_GRAFICOS para invalidar os PNGs já gerados.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import rastreamento
+
+# --- 1. PARÂMETROS ---
+
+VERSAO_GRAFICOS = 1                          # Incrementar ao mudar o desenho
+DPI_GRAFICOS = 300
+ARQUIVO_INDICE_CACHE = '.cache_graficos.json'
+LIMIAR_PIZZA = 0.02                          # Fatias < 2% viram "Outros Ativos"
+
+
+# --- 2. TAREFAS (DESCRIÇÃO DOS GRÁFICOS) ---
+
+def tarefa_fronteira(volatilidades, retornos, destaques, arquivo, valor_total,
+                     titulo="Fronteira de Pareto: Otimização de Portfólio (NSGA-II)"):
+    """
+    Gráfico da fronteira (volatilidade x retorno).
+    'destaques': dict com 'min_risco', 'max_retorno' e 'max_sharpe',
+    cada um (volatilidade, retorno).
+    """
+    return {
+        'tipo': 'fronteira',
+        'arquivo': arquivo,
+        'dados': {
+            'volatilidades': np.asarray(volatilidades, dtype=np.float64),
+            'retornos': np.asarray(retornos, dtype=np.float64),
+            'destaques': np.array([destaques[k] for k in ('min_risco', 'max_retorno', 'max_sharpe')],
+                                  dtype=np.float64),
+        },
+        'parametros': {'titulo': titulo, 'valor_total': float(valor_total), 'dpi': DPI_GRAFICOS},
+    }
+
+def tarefa_pizza(series_portifolio, titulo, arquivo):
+    """Gráfico de pizza ("donut") dos pesos 'w_<ativo>' de uma carteira."""
+    pesos = series_portifolio.filter(like='w_')
+    return {
+        'tipo': 'pizza',
+        'arquivo': arquivo,
+        'dados': {
+            'pesos': pesos.to_numpy(dtype=np.float64),
+            'ativos': [a.replace('w_', '') for a in pesos.index],
+        },
+        'parametros': {'titulo': titulo, 'limiar': LIMIAR_PIZZA, 'dpi': DPI_GRAFICOS},
+    }
+
+def hash_tarefa(tarefa):
+    """SHA-256 dos dados + parâmetros + versão do desenho."""
+    h = hashlib.sha256()
+    h.update(f"{tarefa['tipo']}|{VERSAO_GRAFICOS}|".encode())
+    h.update(json.dumps(tarefa['parametros'], sort_keys=True, default=str).encode())
+    for chave in sorted(tarefa['dados']):
+        valor = tarefa['dados'][chave]
+        h.update(chave.encode())
+        if isinstance(valor, np.ndarray):
+            h.update(str(valor.shape).encode())
+            h.update(np.ascontiguousarray(valor).tobytes())
+        else:
+            h.update(json.dumps(valor, default=str).encode())
+    return h.hexdigest()
+
+
+# --- 3. DESENHO (roda nos processos do pool) ---
+
+def _pyplot():
+    """
+    Importa o pyplot com o backend 'Agg' (sem janela) só quando há
+    algo para desenhar: com tudo em cache, o matplotlib nem é carregado.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def desenhar_fronteira(dados, parametros, arquivo):
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.scatter(dados['volatilidades'], dados['retornos'], s=15, facecolors='none',
+               edgecolors='blue', label='Portfólios Ótimos')
+
+    (vol_min, ret_min), (vol_max, ret_max), (vol_sharpe, ret_sharpe) = dados['destaques']
+    ax.scatter(vol_min, ret_min, c='red', s=70, label='Mínimo Risco (PMV)', zorder=5)
+    ax.scatter(vol_max, ret_max, c='green', s=70, label='Máximo Retorno', zorder=5)
+    ax.scatter(vol_sharpe, ret_sharpe, c='gold', s=150, label='Melhor Custo-Benefício (Sharpe)',
+               marker='*', zorder=5, edgecolors='black')
+
+    ax.set_title(parametros['titulo'], fontsize=16)
+    ax.set_xlabel("Risco (Volatilidade Anualizada - Desvio Padrão)", fontsize=12)
+    ax.set_ylabel("Retorno Esperado (Anualizado)", fontsize=12)
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+
+    ax.text(0.98, 0.02, f"Valor Total Investido: R$ {parametros['valor_total']:,.2f}",
+            transform=ax.transAxes,
+            horizontalalignment='right',
+            verticalalignment='bottom',
+            fontsize=10,
+            bbox=dict(boxstyle='round,pad=0.3', fc='white', alpha=0.7))
+
+    fig.savefig(arquivo, dpi=parametros['dpi'])
+    plt.close(fig)
+
+def desenhar_pizza(dados, parametros, arquivo):
+    pesos = np.asarray(dados['pesos'])
+    ativos = np.asarray(dados['ativos'], dtype=object)
+    limiar = parametros['limiar']
+
+    # Agrupa as fatias pequenas em "Outros Ativos"
+    relevantes = pesos >= limiar
+    valores = list(pesos[relevantes])
+    labels = list(ativos[relevantes])
+    outros = pesos[~relevantes].sum()
+    if outros > 0.001:  # Só adiciona "Outros" se for relevante
+        valores.append(outros)
+        labels.append('Outros Ativos')
+    ordem = np.argsort(valores, kind='stable')[::-1]
+
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 8))
+    # 'autopct' formata os percentuais, 'startangle' gira o gráfico
+    ax.pie(np.asarray(valores)[ordem], labels=[labels[i] for i in ordem], autopct='%1.1f%%',
+           startangle=90, pctdistance=0.85)  # Percentuais dentro das fatias
+
+    # Círculo no centro: "donut chart" (mais legível)
+    ax.add_artist(plt.Circle((0, 0), 0.70, fc='white'))
+
+    ax.set_title(f"Distribuição de Capital: {parametros['titulo']}", fontsize=16)
+    ax.axis('equal')  # Garante que a pizza seja um círculo
+    fig.tight_layout()
+    fig.savefig(arquivo, dpi=parametros['dpi'])
+    plt.close(fig)
+
+DESENHOS = {
+    'fronteira': desenhar_fronteira,
+    'pizza': desenhar_pizza,
+}
+
+def _desenhar_tarefa(tarefa):
+    """Desenha uma tarefa e retorna o tempo gasto (s)."""
+    inicio = time.perf_counter()
+    pasta = os.path.dirname(tarefa['arquivo'])
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    DESENHOS[tarefa['tipo']](tarefa['dados'], tarefa['parametros'], tarefa['arquivo'])
+    return time.perf_counter() - inicio
+
+
+# --- 4. CACHE POR HASH ---
+
+def _ler_indice(pasta):
+    caminho = os.path.join(pasta, ARQUIVO_INDICE_CACHE)
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _gravar_indice(pasta, indice):
+    caminho = os.path.join(pasta, ARQUIVO_INDICE_CACHE)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(indice, f, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+# --- 5. RENDERIZAÇÃO ---
+
+@rastreamento.rastrear('graficos.renderizacao')
+def renderizar_graficos(tarefas, n_processos=None, forcar=False):
+    """
+    Gera os PNGs das tarefas, pulando os que estão em dia com o cache.
+    Retorna um dict {arquivo: 'cache' | 'gerado'}.
+
+    'n_processos': None = até um por CPU; 1 = em série (sem pool).
+    'forcar': redesenha tudo, ignorando o cache.
+    """
+    # Os índices do cache são lidos/gravados só aqui (processo principal)
+    indices = {}
+    pendentes, situacao = [], {}
+    for tarefa in tarefas:
+        pasta, nome = os.path.split(os.path.abspath(tarefa['arquivo']))
+        if pasta not in indices:
+            indices[pasta] = _ler_indice(pasta)
+        assinatura = hash_tarefa(tarefa)
+        if not forcar and indices[pasta].get(nome) == assinatura and os.path.exists(tarefa['arquivo']):
+            situacao[tarefa['arquivo']] = 'cache'
+        else:
+            pendentes.append((tarefa, pasta, nome, assinatura))
+
+    if pendentes:
+        if n_processos is None:
+            n_processos = min(len(pendentes), os.cpu_count() or 1)
+        inicio = time.perf_counter()
+        if n_processos <= 1:
+            list(map(_desenhar_tarefa, (p[0] for p in pendentes)))
+        else:
+            with ProcessPoolExecutor(max_workers=n_processos) as pool:
+                list(pool.map(_desenhar_tarefa, (p[0] for p in pendentes)))
+        print(f"  {len(pendentes)} gráfico(s) gerado(s) em {time.perf_counter() - inicio:.2f}s "
+              f"({n_processos} processo(s)).")
+
+        for tarefa, pasta, nome, assinatura in pendentes:
+            indices[pasta][nome] = assinatura
+            situacao[tarefa['arquivo']] = 'gerado'
+        for pasta in {p[1] for p in pendentes}:
+            _gravar_indice(pasta, indices[pasta])
+
+    n_cache = sum(1 for s in situacao.values() if s == 'cache')
+    if n_cache:
+        print(f"  {n_cache} gráfico(s) sem alteração (cache).")
+    return situacao
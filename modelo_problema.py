@@ -10,37 +10,77 @@ As Funções Objetivo e Restrições são definidas
 explicitamente abaixo para fins de clareza acadêmica.
 """
 
+import time
+
 import numpy as np
 from pymoo.core.problem import Problem
 
+import modelo_risco
+import rastreamento
+
 class OtimizacaoPortfolio(Problem):
     """
     Esta classe define o problema de Otimização Multiobjetivo
     de Portfólio (Média-Variância).
     """
 
-    def __init__(self, retornos_medios, matriz_cov):
+    def __init__(self, retornos_medios, matriz_cov, precisao='float64',
+                 max_ativos=None, peso_minimo=0.0):
         """
         Inicializa o problema de otimização, definindo os
         limites e a dimensionalidade do problema.
+
+        'matriz_cov' pode ser a Σ densa (N x N) ou um modelo de
+        risco estruturado de 'modelo_risco.py' (fator de Cholesky,
+        modelo de K fatores...), para universos grandes, ou ainda
+        o CVaR dos cenários ('risco_cvar.RiscoCVaR'), que troca a
+        variância do OBJETIVO 1 pela perda média na cauda.
+        'precisao' ('float64' ou 'float32') vale para a Σ densa.
+
+        Restrição de cardinalidade (opcional):
+        - 'max_ativos' (K): no máximo K ativos na carteira;
+        - 'peso_minimo': cada ativo comprado tem peso >= peso_minimo.
+        Com 'max_ativos', o cromossomo passa a ser [K índices de
+        ativos, K pesos] (ver 'decodificar') e risco/retorno são
+        calculados só na submatriz K x K de Σ.
         """
         
         # --- Parâmetros de Entrada ---
         # (μ e Σ recebidos do preparar_dados.py)
         self.retornos_medios = retornos_medios
         self.matriz_cov = matriz_cov
+        self.modelo_risco = modelo_risco.criar_modelo_risco(matriz_cov, precisao)
+        self._mu = np.asarray(retornos_medios, dtype=np.float64)
+        
+        # --- Restrição de Cardinalidade ---
+        self.max_ativos = max_ativos
+        self.peso_minimo = peso_minimo
+        
+        # --- Instrumentação ---
+        # (Nº de portfólios avaliados e tempo gasto no _evaluate)
+        self.n_avaliacoes = 0
+        self.tempo_avaliacao = 0.0
         
         # --- Variáveis de Decisão ---
         # O vetor 'w' (pesos), de tamanho N
         n_ativos = len(retornos_medios)
+        self.n_ativos = n_ativos
+        n_var, xl, xu = n_ativos, 0.0, 1.0
         
+        # Com cardinalidade: K índices (0 .. N-1) seguidos de K pesos (0 .. 1)
+        if max_ativos is not None:
+            if not 1 <= max_ativos <= n_ativos:
+                raise ValueError(f"max_ativos deve estar entre 1 e {n_ativos}.")
+            n_var = 2 * max_ativos
+            xl = np.zeros(n_var)
+            xu = np.concatenate([np.full(max_ativos, n_ativos - 1.0), np.ones(max_ativos)])
         
         # --- Definição Formal do Problema para o Pymoo ---
         super().__init__(
             
             # n_var = N (Número de variáveis de decisão)
             # (O algoritmo deve encontrar N pesos, w_1, w_2, ..., w_N)
-            n_var=n_ativos,       
+            n_var=n_var,       
             
             # n_obj = 2 (Número de Funções Objetivo)
             # (OBJETIVO 1: Minimizar Risco)
@@ -57,19 +97,68 @@ class OtimizacaoPortfolio(Problem):
             # RESTRICAO 2: Limite Inferior (w_i >= 0)
             # // NÃO PERMITIR VENDA A DESCOBERTO (SHORT SELLING)
             # Dizemos ao Pymoo que nenhuma variável w_i pode ser < 0.
-            xl=0.0,               
+            xl=xl,               
             
             # Restrição Bônus: Limite Superior (w_i <= 1)
             # // NÃO INVESTIR MAIS DE 100% EM UM ÚNICO ATIVO
-            xu=1.0                
+            xu=xu                
         )
 
+    # --- Cromossomo com cardinalidade: [K índices, K pesos] ---
+
+    def decodificar(self, x):
+        """
+        Converte o cromossomo (pop x 2K) em (indices pop x K, pesos pop x K):
+        os pesos são normalizados para somar 1 e os que ficam abaixo de
+        'peso_minimo' são zerados (os restantes são renormalizados, o que
+        só os aumenta). Assim, toda carteira tem <= K ativos com peso
+        >= peso_minimo, por construção.
+        """
+        K = self.max_ativos
+        indices = np.clip(np.rint(x[:, :K]), 0, self.n_ativos - 1).astype(np.intp)
+        pesos = np.maximum(x[:, K:], 0.0)
+        soma = pesos.sum(axis=1, keepdims=True)
+        pesos = np.where(soma > 0, pesos / np.where(soma > 0, soma, 1.0), 1.0 / K)
+        
+        if self.peso_minimo > 0:
+            maior = pesos == pesos.max(axis=1, keepdims=True)
+            # (Se todos ficassem abaixo do mínimo, fica só o maior)
+            pesos = np.where((pesos >= self.peso_minimo) | maior, pesos, 0.0)
+            pesos = pesos / pesos.sum(axis=1, keepdims=True)
+        return indices, pesos
+
+    def codificar(self, pesos_densos):
+        """
+        Inverso aproximado de 'decodificar': fica com os K maiores
+        pesos de cada carteira densa (pop x N). Útil no warm start.
+        """
+        K = self.max_ativos
+        pesos_densos = np.atleast_2d(pesos_densos)
+        indices = np.argsort(-pesos_densos, axis=1)[:, :K]
+        pesos = np.take_along_axis(pesos_densos, indices, axis=1)
+        return np.hstack([indices.astype(np.float64), pesos])
+
+    def pesos_densos(self, x):
+        """Pesos completos (pop x N) de cada indivíduo, em qualquer dos dois modos."""
+        if self.max_ativos is None:
+            return x
+        indices, pesos = self.decodificar(x)
+        densos = np.zeros((len(x), self.n_ativos))
+        np.add.at(densos, (np.arange(len(x))[:, None], indices), pesos)
+        return densos
+
     def _evaluate(self, x, out, *args, **kwargs):
         """
         Esta é a função de avaliação.
         Aqui calculamos explicitamente os objetivos e restrições
         para cada portfólio 'w' (cada linha da matriz 'x').
         """
+        inicio = time.perf_counter()
+        
+        # Com cardinalidade, cada carteira é (K índices, K pesos) e as
+        # fórmulas abaixo usam só a submatriz de Σ desses K ativos
+        if self.max_ativos is not None:
+            indices, pesos = self.decodificar(x)
         
         # --- ================================== ---
         # --- DEFINIÇÃO DAS FUNÇÕES OBJETIVO ---
@@ -77,7 +166,14 @@ class OtimizacaoPortfolio(Problem):
         
         # OBJETIVO 1: Minimizar o Risco (Variância)
         # Fórmula: Minimizar V(w) = w^T * Σ * w
-        obj_risco = np.einsum('ij,jk,ik->i', x, self.matriz_cov, x)
+        # (O cálculo fica a cargo do modelo de risco: com a Σ densa é
+        #  o mesmo que np.einsum('ij,jk,ik->i', x, Σ, x); com um modelo
+        #  de K fatores custa O(pop·N·K) em vez de O(pop·N²). Com o
+        #  'RiscoCVaR', o objetivo passa a ser o CVaR dos cenários.)
+        if self.max_ativos is not None:
+            obj_risco = self.modelo_risco.risco_subconjunto(indices, pesos)
+        else:
+            obj_risco = self.modelo_risco.risco(x)
         
         
         # OBJETIVO 2: Maximizar o Retorno
@@ -86,7 +182,10 @@ class OtimizacaoPortfolio(Problem):
         # O Pymoo, por padrão, só MINIMIZA.
         # A solução é minimizar o *negativo* do retorno.
         # (Maximizar X) == (Minimizar -X)
-        retorno_calculado = x.dot(self.retornos_medios)
+        if self.max_ativos is not None:
+            retorno_calculado = np.sum(pesos * self._mu[indices], axis=1)
+        else:
+            retorno_calculado = x.dot(self.retornos_medios)
         obj_retorno_negativo = -retorno_calculado
         
         
@@ -99,7 +198,11 @@ class OtimizacaoPortfolio(Problem):
         #
         # O Pymoo espera que restrições de igualdade sejam = 0.
         # Fórmula: (Soma(w_i)) - 1 = 0
-        restricao_soma_pesos = np.sum(x, axis=1) - 1.0
+        # (Com cardinalidade, a decodificação já normaliza os pesos)
+        if self.max_ativos is not None:
+            restricao_soma_pesos = np.sum(pesos, axis=1) - 1.0
+        else:
+            restricao_soma_pesos = np.sum(x, axis=1) - 1.0
         
         
         # RESTRICAO 2: Não-Negatividade (w_i >= 0)
@@ -128,6 +231,11 @@ class OtimizacaoPortfolio(Problem):
         out["H"] = np.column_stack([
             restricao_soma_pesos
         ])
+        
+        fim = time.perf_counter()
+        self.n_avaliacoes += len(x)
+        self.tempo_avaliacao += fim - inicio
+        rastreamento.evento('avaliacao', inicio, fim, 'nsga2', carteiras=len(x))
 
 # --- Bloco de Teste ---
 if __name__ == '__main__':
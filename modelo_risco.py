@@ -0,0 +1,216 @@
+"""
+================================================
+ARQUIVO DOS MODELOS DE RISCO (Σ estruturada)
+================================================
+
+O 'modelo_problema.py' calcula o risco com a matriz de
+covariância densa Σ (N x N): custo O(pop·N²) por geração
+e N² de memória. Para universos grandes (milhares de ativos)
+isso não escala.
+
+Este arquivo define modelos de risco equivalentes, com a
+mesma fórmula V(w) = w^T Σ w, mas com Σ em forma estruturada:
+
+- RiscoDenso:     Σ completa (comportamento original)
+- RiscoFatorado:  Σ = B B^T (ex: fator de Cholesky, ou
+                  retornos centrados, com B de N x K)
+- RiscoFatorial:  Σ = B F B^T + diag(d)   (K fatores +
+                  risco específico), custo O(pop·N·K)
+
+Todos aceitam 'precisao="float32"' para reduzir memória e
+tempo das multiplicações (o resultado volta em float64).
+
+O objetivo de risco do problema é 'risco(x)', que por padrão é
+a variância; 'risco_cvar.py' define o CVaR como alternativa.
+
+Para carteiras com poucos ativos (restrição de cardinalidade),
+'variancia_subconjunto' usa só as linhas/colunas dos K ativos
+de cada carteira: O(pop·K²) em vez de O(pop·N²).
+"""
+
+import numpy as np
+
+# --- 1. CLASSE BASE ---
+
+class ModeloRisco:
+    """Interface comum: 'variancia(x)' para uma matriz de pesos (pop x N)."""
+
+    def __init__(self, precisao='float64'):
+        self.dtype = np.dtype(precisao)
+
+    @property
+    def n_ativos(self):
+        raise NotImplementedError
+
+    def variancia(self, x):
+        """Retorna w^T Σ w para cada linha 'w' de x."""
+        raise NotImplementedError
+
+    def variancia_subconjunto(self, indices, pesos):
+        """
+        w^T Σ w para carteiras esparsas: 'indices' (pop x K, inteiros)
+        e 'pesos' (pop x K). Índices repetidos somam seus pesos.
+        Padrão: monta os pesos densos e usa 'variancia'.
+        """
+        x = np.zeros((len(indices), self.n_ativos))
+        np.add.at(x, (np.arange(len(indices))[:, None], indices), pesos)
+        return self.variancia(x)
+
+    def risco(self, x):
+        """
+        Medida de risco do OBJETIVO 1 do 'modelo_problema.py'.
+        Padrão: a variância; outros modelos (ex: 'risco_cvar.RiscoCVaR')
+        trocam a medida sobrescrevendo 'risco' e 'risco_subconjunto'.
+        """
+        return self.variancia(x)
+
+    def risco_subconjunto(self, indices, pesos):
+        """'risco' para carteiras esparsas (ver 'variancia_subconjunto')."""
+        return self.variancia_subconjunto(indices, pesos)
+
+    def matriz_densa(self):
+        """Reconstrói Σ (N x N). Use apenas para universos pequenos."""
+        raise NotImplementedError
+
+    def _converter(self, x):
+        return np.asarray(x, dtype=self.dtype)
+
+
+# --- 2. MODELOS ---
+
+class RiscoDenso(ModeloRisco):
+    """Σ densa (N x N): o modelo original."""
+
+    def __init__(self, matriz_cov, precisao='float64'):
+        super().__init__(precisao)
+        self.matriz_cov = np.asarray(matriz_cov, dtype=self.dtype)
+
+    @property
+    def n_ativos(self):
+        return self.matriz_cov.shape[0]
+
+    def variancia(self, x):
+        x = self._converter(x)
+        # Equivalente a einsum('ij,jk,ik->i'), mas usando BLAS (matmul)
+        return np.sum((x @ self.matriz_cov) * x, axis=1, dtype=np.float64)
+
+    def variancia_subconjunto(self, indices, pesos):
+        # Submatriz K x K de cada carteira: Σ[idx][:, idx]
+        sub = self.matriz_cov[indices[:, :, None], indices[:, None, :]]
+        w = self._converter(pesos)
+        return np.einsum('pk,pkl,pl->p', w, sub, w, dtype=np.float64)
+
+    def matriz_densa(self):
+        return self.matriz_cov.astype(np.float64)
+
+class RiscoFatorado(ModeloRisco):
+    """
+    Σ = B B^T, com B de N x K.
+
+    - Fator de Cholesky: B = cholesky(Σ) (K = N)
+    - Retornos históricos centrados: B = R_c^T / sqrt(T - 1) (K = T)
+    Custo: O(pop·N·K).
+    """
+
+    def __init__(self, fator, precisao='float64'):
+        super().__init__(precisao)
+        self.fator = np.asarray(fator, dtype=self.dtype)
+
+    @classmethod
+    def de_cholesky(cls, matriz_cov, precisao='float64'):
+        """Cria o modelo a partir da Σ densa (fatoração de Cholesky)."""
+        return cls(np.linalg.cholesky(np.asarray(matriz_cov, dtype=np.float64)), precisao)
+
+    @classmethod
+    def de_retornos(cls, matriz_retornos, dias_ano=252, precisao='float64'):
+        """
+        Cria o modelo direto da matriz de retornos (T x N), sem
+        nunca montar Σ: Σ_anual = dias_ano · R_c^T R_c / (T - 1).
+        """
+        R = np.asarray(matriz_retornos, dtype=np.float64)
+        R_c = R - R.mean(axis=0)
+        return cls(R_c.T * np.sqrt(dias_ano / (R.shape[0] - 1)), precisao)
+
+    @property
+    def n_ativos(self):
+        return self.fator.shape[0]
+
+    def variancia(self, x):
+        y = self._converter(x) @ self.fator          # pop x K
+        return np.sum(y * y, axis=1, dtype=np.float64)
+
+    def variancia_subconjunto(self, indices, pesos):
+        y = np.einsum('pk,pkf->pf', self._converter(pesos), self.fator[indices])
+        return np.sum(y * y, axis=1, dtype=np.float64)
+
+    def matriz_densa(self):
+        B = self.fator.astype(np.float64)
+        return B @ B.T
+
+class RiscoFatorial(ModeloRisco):
+    """
+    Modelo de K fatores: Σ = B F B^T + diag(d)
+
+    - cargas (B): N x K
+    - cov_fatores (F): K x K (padrão: identidade)
+    - risco_especifico (d): N (variância idiossincrática)
+    Custo: O(pop·N·K), memória O(N·K).
+    """
+
+    def __init__(self, cargas, risco_especifico, cov_fatores=None, precisao='float64'):
+        super().__init__(precisao)
+        cargas = np.asarray(cargas, dtype=np.float64)
+        if cov_fatores is not None:
+            # Absorve F nas cargas: B F B^T = (B L)(B L)^T, com F = L L^T
+            cargas = cargas @ np.linalg.cholesky(np.asarray(cov_fatores, dtype=np.float64))
+        self.cargas = cargas.astype(self.dtype)
+        self.risco_especifico = np.asarray(risco_especifico, dtype=self.dtype)
+
+    @classmethod
+    def de_pca(cls, matriz_cov, n_fatores, precisao='float64'):
+        """
+        Aproxima uma Σ densa por K fatores (componentes principais);
+        o restante da diagonal vira risco específico.
+        """
+        cov = np.asarray(matriz_cov, dtype=np.float64)
+        autovalores, autovetores = np.linalg.eigh(cov)
+        maiores = np.argsort(autovalores)[::-1][:n_fatores]
+        cargas = autovetores[:, maiores] * np.sqrt(np.maximum(autovalores[maiores], 0.0))
+        especifico = np.maximum(np.diag(cov) - np.sum(cargas ** 2, axis=1), 0.0)
+        return cls(cargas, especifico, precisao=precisao)
+
+    @property
+    def n_ativos(self):
+        return self.cargas.shape[0]
+
+    def variancia(self, x):
+        x = self._converter(x)
+        y = x @ self.cargas                          # pop x K
+        return (np.sum(y * y, axis=1, dtype=np.float64)
+                + np.sum(x * x * self.risco_especifico, axis=1, dtype=np.float64))
+
+    def variancia_subconjunto(self, indices, pesos):
+        w = self._converter(pesos)
+        y = np.einsum('pk,pkf->pf', w, self.cargas[indices])
+        # (Índices repetidos: o risco específico precisa do peso somado)
+        x = np.zeros(indices.shape, dtype=self.dtype)
+        primeiro = np.argmax(indices[:, :, None] == indices[:, None, :], axis=2)
+        np.add.at(x, (np.arange(len(indices))[:, None], primeiro), w)
+        return (np.sum(y * y, axis=1, dtype=np.float64)
+                + np.sum(x * x * self.risco_especifico[indices], axis=1, dtype=np.float64))
+
+    def matriz_densa(self):
+        B = self.cargas.astype(np.float64)
+        return B @ B.T + np.diag(self.risco_especifico.astype(np.float64))
+
+
+# --- 3. FUNÇÃO AUXILIAR ---
+
+def criar_modelo_risco(matriz_cov, precisao='float64'):
+    """
+    Aceita uma Σ densa (array/DataFrame) ou um ModeloRisco já
+    pronto, e sempre retorna um ModeloRisco.
+    """
+    if isinstance(matriz_cov, ModeloRisco):
+        return matriz_cov
+    return RiscoDenso(matriz_cov, precisao)
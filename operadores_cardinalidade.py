@@ -0,0 +1,139 @@
+"""
+================================================
+ARQUIVO DOS OPERADORES GENÉTICOS COM CARDINALIDADE
+================================================
+
+Operadores do NSGA-II para o cromossomo [K índices, K pesos]
+de 'modelo_problema.OtimizacaoPortfolio(max_ativos=K)'.
+
+Cada indivíduo é um SUBCONJUNTO de até K ativos mais os
+pesos desses ativos. Os operadores trabalham nas duas partes
+juntas (um "slot" = um ativo e seu peso):
+- AmostragemCardinalidade: K ativos distintos + pesos Dirichlet
+- CruzamentoCardinalidade: cada slot do filho vem de um dos pais
+- MutacaoCardinalidade:    troca ativos por outros fora da carteira
+                           e perturba os pesos
+- ReparoCardinalidade:     índices inteiros e distintos, pesos
+                           normalizados e >= peso mínimo
+"""
+
+import numpy as np
+from pymoo.core.sampling import Sampling
+from pymoo.core.crossover import Crossover
+from pymoo.core.mutation import Mutation
+from pymoo.core.repair import Repair
+
+import operadores_simplex
+from operadores_simplex import _aleatorio
+
+
+# --- 1. FUNÇÕES AUXILIARES ---
+
+def _separar(X, K):
+    """Cromossomo (pop x 2K) -> (índices inteiros, pesos)."""
+    return np.rint(X[:, :K]).astype(np.intp), X[:, K:].copy()
+
+def _juntar(indices, pesos):
+    return np.hstack([indices.astype(np.float64), pesos])
+
+def sortear_subconjuntos(n_amostras, n_ativos, K, rng):
+    """K ativos distintos por linha (pop x K), sem laço por indivíduo."""
+    return np.argsort(rng.random((n_amostras, n_ativos)), axis=1)[:, :K]
+
+def remover_repetidos(indices, pesos, n_ativos, rng):
+    """
+    Se um ativo aparece em dois slots, soma os pesos no primeiro e
+    troca o ativo repetido por um sorteado, com peso 0 (slot "vazio").
+    O(pop·K²), vetorizado sobre a população.
+    """
+    linhas = np.arange(len(indices))
+    for j in range(1, indices.shape[1]):
+        iguais = indices[:, :j] == indices[:, j:j + 1]
+        repetidos = iguais.any(axis=1)
+        if not repetidos.any():
+            continue
+        r = linhas[repetidos]
+        primeiro = np.argmax(iguais[repetidos], axis=1)
+        pesos[r, primeiro] += pesos[r, j]
+        pesos[r, j] = 0.0
+        indices[r, j] = rng.integers(0, n_ativos, size=len(r))
+    return indices, pesos
+
+
+# --- 2. OPERADORES ---
+
+class AmostragemCardinalidade(Sampling):
+    """K ativos distintos sorteados + pesos Dirichlet (alfa variável, como na AmostragemSimplex)."""
+
+    def __init__(self, alfa_min=0.05, alfa_max=1.0):
+        super().__init__()
+        self.alfa_min = alfa_min
+        self.alfa_max = alfa_max
+
+    def _do(self, problem, n_samples, *args, random_state=None, **kwargs):
+        rng = _aleatorio(random_state)
+        K = problem.max_ativos
+        indices = sortear_subconjuntos(n_samples, problem.n_ativos, K, rng)
+        pesos = operadores_simplex.amostrar_dirichlet(n_samples, K, rng, self.alfa_min, self.alfa_max)
+        return _juntar(indices, pesos)
+
+class CruzamentoCardinalidade(Crossover):
+    """
+    Cruzamento uniforme por slot: cada par (ativo, peso) do filho 1
+    vem do pai 1 ou do pai 2 (com prob. 1/2); o filho 2 fica com o
+    complemento. Repetições são resolvidas pelo reparo.
+    """
+
+    def __init__(self, prob=0.9, **kwargs):
+        super().__init__(2, 2, prob=prob, **kwargs)
+
+    def _do(self, problem, X, *args, random_state=None, **kwargs):
+        rng = _aleatorio(random_state)
+        K = problem.max_ativos
+        _, n_cruzamentos, n_var = X.shape
+        do_pai_1 = rng.random((n_cruzamentos, K)) < 0.5
+        mascara = np.hstack([do_pai_1, do_pai_1])   # Índice e peso andam juntos
+
+        filhos = np.empty((2, n_cruzamentos, n_var))
+        filhos[0] = np.where(mascara, X[0], X[1])
+        filhos[1] = np.where(mascara, X[1], X[0])
+        return filhos
+
+class MutacaoCardinalidade(Mutation):
+    """
+    - Com prob. 'prob_troca' por slot, troca o ativo por um sorteado
+      (o peso do slot é mantido);
+    - soma ruído gaussiano ('sigma') aos pesos, limitados a [0, 1].
+    """
+
+    def __init__(self, prob_troca=None, sigma=0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.prob_troca = prob_troca
+        self.sigma = sigma
+
+    def _do(self, problem, X, *args, random_state=None, **kwargs):
+        rng = _aleatorio(random_state)
+        K = problem.max_ativos
+        indices, pesos = _separar(X, K)
+        prob_troca = self.prob_troca if self.prob_troca is not None else 1.0 / K
+
+        trocar = rng.random(indices.shape) < prob_troca
+        indices = np.where(trocar, rng.integers(0, problem.n_ativos, size=indices.shape), indices)
+        pesos = np.clip(pesos + rng.normal(0.0, self.sigma, size=pesos.shape), 0.0, 1.0)
+        return _juntar(indices, pesos)
+
+class ReparoCardinalidade(Repair):
+    """
+    Deixa todo indivíduo na forma "canônica": índices inteiros e
+    distintos, pesos normalizados e sem posições abaixo do peso
+    mínimo (a mesma regra de 'OtimizacaoPortfolio.decodificar').
+    """
+
+    def _do(self, problem, X, random_state=None, **kwargs):
+        rng = _aleatorio(random_state)
+        K = problem.max_ativos
+        indices, pesos = _separar(X, K)
+        indices = np.clip(indices, 0, problem.n_ativos - 1)
+        indices, pesos = remover_repetidos(indices, pesos, problem.n_ativos, rng)
+        _, pesos = problem.decodificar(_juntar(indices, pesos))
+        return _juntar(indices, pesos)
@@ -0,0 +1,137 @@
+"""
+================================================
+ARQUIVO DOS OPERADORES GENÉTICOS DO SIMPLEX
+================================================
+
+Operadores do NSGA-II específicos para portfólios.
+
+Com os operadores padrão do Pymoo, os pesos são sorteados
+e mutados livremente em [0, 1]^N, e quase todo candidato
+viola a RESTRICAO 1 (soma dos pesos = 1). Boa parte das
+gerações é gasta só para "chegar" no simplex.
+
+Os operadores abaixo mantêm todo indivíduo no simplex
+{w >= 0, soma(w) = 1} por construção:
+- AmostragemSimplex: população inicial via Dirichlet
+- CruzamentoSimplex: combinação (convexa/estendida) dos pais
+- MutacaoSimplex:    perturbação gaussiana + projeção
+- ReparoSimplex:     projeção euclidiana no simplex (vetorizada)
+"""
+
+import numpy as np
+from pymoo.core.sampling import Sampling
+from pymoo.core.crossover import Crossover
+from pymoo.core.mutation import Mutation
+from pymoo.core.repair import Repair
+
+
+# --- 1. PROJEÇÃO NO SIMPLEX ---
+
+def projetar_no_simplex(V):
+    """
+    Projeção euclidiana de cada linha de V no simplex
+    {w >= 0, soma(w) = 1} (algoritmo por ordenação, O(N log N)
+    por linha, vetorizado sobre todas as linhas).
+
+    Referência: Duchi et al. (2008), "Efficient Projections onto
+    the l1-Ball for Learning in High Dimensions".
+    """
+    V = np.atleast_2d(np.asarray(V, dtype=np.float64))
+    n = V.shape[1]
+    U = -np.sort(-V, axis=1)                       # Ordem decrescente
+    soma_acumulada = np.cumsum(U, axis=1) - 1.0
+    indices = np.arange(1, n + 1)
+    condicao = U - soma_acumulada / indices > 0
+    rho = n - np.argmax(condicao[:, ::-1], axis=1)   # Último índice verdadeiro (1-based)
+    theta = soma_acumulada[np.arange(V.shape[0]), rho - 1] / rho
+    return np.maximum(V - theta[:, None], 0.0)
+
+def amostrar_dirichlet(n_amostras, n_var, rng, alfa_min=0.05, alfa_max=1.0):
+    """
+    Sorteia 'n_amostras' carteiras no simplex (Dirichlet), com a
+    concentração 'alfa' log-uniforme entre 'alfa_min' e 'alfa_max'.
+    """
+    alfas = np.exp(rng.uniform(np.log(alfa_min), np.log(alfa_max), size=n_amostras))
+    G = rng.gamma(np.repeat(alfas[:, None], n_var, axis=1))
+    soma = G.sum(axis=1, keepdims=True)
+    # Caso raro de todos os gammas ~0: usa a carteira igualitária
+    return np.where(soma > 0, G / np.where(soma > 0, soma, 1.0), 1.0 / n_var)
+
+def _aleatorio(random_state):
+    """Gerador a usar: o do Pymoo (versões novas) ou o global do NumPy."""
+    return random_state if random_state is not None else np.random
+
+
+# --- 2. OPERADORES ---
+
+class AmostragemSimplex(Sampling):
+    """
+    Amostra a população inicial de uma Dirichlet.
+
+    A concentração 'alfa' varia por indivíduo (log-uniforme entre
+    'alfa_min' e 'alfa_max'): alfa pequeno gera carteiras
+    concentradas (perto dos extremos da fronteira), alfa ~1
+    gera carteiras bem diversificadas.
+    """
+
+    def __init__(self, alfa_min=0.05, alfa_max=1.0):
+        super().__init__()
+        self.alfa_min = alfa_min
+        self.alfa_max = alfa_max
+
+    def _do(self, problem, n_samples, *args, random_state=None, **kwargs):
+        return amostrar_dirichlet(n_samples, problem.n_var, _aleatorio(random_state),
+                                  self.alfa_min, self.alfa_max)
+
+class CruzamentoSimplex(Crossover):
+    """
+    Cruzamento por combinação dos pais:
+        filho_1 = a * p1 + (1 - a) * p2
+        filho_2 = (1 - a) * p1 + a * p2
+    com 'a' sorteado em [-extensao, 1 + extensao]. Para a em [0, 1]
+    o filho já está no simplex; fora disso é projetado de volta.
+    """
+
+    def __init__(self, extensao=0.25, prob=0.9, **kwargs):
+        super().__init__(2, 2, prob=prob, **kwargs)
+        self.extensao = extensao
+
+    def _do(self, problem, X, *args, random_state=None, **kwargs):
+        rng = _aleatorio(random_state)
+        _, n_cruzamentos, n_var = X.shape
+        p1, p2 = X[0], X[1]
+        a = rng.uniform(-self.extensao, 1.0 + self.extensao, size=(n_cruzamentos, 1))
+
+        filhos = np.empty((2, n_cruzamentos, n_var))
+        filhos[0] = projetar_no_simplex(a * p1 + (1.0 - a) * p2)
+        filhos[1] = projetar_no_simplex((1.0 - a) * p1 + a * p2)
+        return filhos
+
+class MutacaoSimplex(Mutation):
+    """
+    Soma um ruído gaussiano (desvio 'sigma') a uma fração
+    'prob_ativo' dos pesos e projeta de volta no simplex.
+    A projeção zera naturalmente os pesos pequenos, o que
+    também ajuda a encontrar carteiras esparsas.
+    """
+
+    def __init__(self, sigma=0.05, prob_ativo=None, **kwargs):
+        super().__init__(**kwargs)
+        self.sigma = sigma
+        self.prob_ativo = prob_ativo
+
+    def _do(self, problem, X, *args, random_state=None, **kwargs):
+        rng = _aleatorio(random_state)
+        prob_ativo = self.prob_ativo if self.prob_ativo is not None else min(1.0, 2.0 / problem.n_var)
+        mascara = rng.random(X.shape) < prob_ativo
+        ruido = rng.normal(0.0, self.sigma, size=X.shape) * mascara
+        return projetar_no_simplex(X + ruido)
+
+class ReparoSimplex(Repair):
+    """
+    Garante que todo indivíduo avaliado esteja no simplex
+    (rede de segurança para qualquer operador).
+    """
+
+    def _do(self, problem, X, **kwargs):
+        return projetar_no_simplex(X)
@@ -0,0 +1,186 @@
+"""
+================================================
+ARQUIVO DA OTIMIZAÇÃO PARALELA (MODELO DE ILHAS)
+================================================
+
+Executa várias instâncias independentes do NSGA-II ("ilhas"),
+cada uma com sua semente, em um pool de processos.
+
+Opcionalmente, a cada 'geracoes_por_migracao' gerações as
+ilhas trocam suas melhores soluções (topologia em anel:
+a ilha i recebe migrantes da ilha i-1).
+
+No final, todas as fronteiras são unidas e apenas as
+soluções NÃO-DOMINADAS são mantidas. O número de pontos
+que cada ilha contribui para a fronteira final serve como
+checagem de robustez do resultado.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pymoo.algorithms.moo.nsga2 import NSGA2
+from pymoo.optimize import minimize
+
+import operadores_simplex
+
+
+# --- 1. CONSTRUÇÃO DO ALGORITMO ---
+
+def criar_nsga2(pop_size, usar_operadores_simplex=True, populacao_inicial=None, cardinalidade=False):
+    """
+    Monta o NSGA-II do projeto.
+
+    'populacao_inicial' (matriz pop x N) substitui a amostragem
+    aleatória (warm start, ou continuação de uma ilha após a migração).
+    'cardinalidade': usa os operadores do cromossomo [K índices, K pesos]
+    (problema criado com 'max_ativos', ver 'operadores_cardinalidade.py').
+    """
+    if cardinalidade:
+        import operadores_cardinalidade
+        sampling = operadores_cardinalidade.AmostragemCardinalidade()
+        operadores = dict(
+            crossover=operadores_cardinalidade.CruzamentoCardinalidade(),
+            mutation=operadores_cardinalidade.MutacaoCardinalidade(),
+            repair=operadores_cardinalidade.ReparoCardinalidade(),
+        )
+    elif usar_operadores_simplex:
+        sampling = operadores_simplex.AmostragemSimplex()
+        operadores = dict(
+            crossover=operadores_simplex.CruzamentoSimplex(),
+            mutation=operadores_simplex.MutacaoSimplex(),
+            repair=operadores_simplex.ReparoSimplex(),
+        )
+    else:
+        from pymoo.operators.sampling.rnd import FloatRandomSampling
+        sampling = FloatRandomSampling()
+        operadores = {}
+
+    if populacao_inicial is not None:
+        sampling = populacao_inicial
+
+    return NSGA2(
+        pop_size=pop_size,
+        sampling=sampling,
+        eliminate_duplicates=True,
+        **operadores
+    )
+
+
+# --- 2. FRONTEIRA NÃO-DOMINADA ---
+
+def filtrar_nao_dominados(F, X):
+    """
+    Mantém apenas os pontos não-dominados de (F, X), para
+    2 objetivos (ambos minimizados). O(n log n): ordena pelo
+    risco e guarda quem melhora estritamente o -retorno.
+    Retorna (F, X, indices).
+    """
+    F = np.asarray(F)
+    if len(F) == 0:
+        return F, X, np.arange(0)
+    ordem = np.lexsort((F[:, 1], F[:, 0]))
+    melhor_ate_agora = np.minimum.accumulate(F[ordem, 1])
+    mantidos = np.ones(len(ordem), dtype=bool)
+    mantidos[1:] = F[ordem[1:], 1] < melhor_ate_agora[:-1]
+    indices = ordem[mantidos]
+    return F[indices], X[indices], indices
+
+
+# --- 3. EXECUÇÃO DE UMA ILHA (em um processo do pool) ---
+
+def _executar_ilha(argumentos):
+    """Roda o NSGA-II de uma ilha e retorna (pop_X, opt_F, opt_X)."""
+    problema, semente, n_geracoes, pop_size, usar_simplex, populacao_inicial = argumentos
+    cardinalidade = getattr(problema, 'max_ativos', None) is not None
+    algoritmo = criar_nsga2(pop_size, usar_simplex, populacao_inicial, cardinalidade)
+    res = minimize(problema, algoritmo, ('n_gen', n_geracoes), seed=semente, verbose=False)
+
+    pop_X = res.pop.get('X')
+    if res.F is None:
+        n_var = problema.n_var
+        return pop_X, np.empty((0, 2)), np.empty((0, n_var))
+    return pop_X, np.atleast_2d(res.F), np.atleast_2d(res.X)
+
+
+# --- 4. RESULTADO ---
+
+class ResultadoIlhas:
+    """
+    Fronteira unida de todas as ilhas, com os mesmos atributos
+    'F' e 'X' do resultado do Pymoo, mais:
+    - F_por_ilha: fronteira final de cada ilha
+    - contribuicao: nº de pontos da fronteira final vindos de cada ilha
+    """
+
+    def __init__(self, F, X, F_por_ilha, contribuicao):
+        self.F = F
+        self.X = X
+        self.F_por_ilha = F_por_ilha
+        self.contribuicao = contribuicao
+
+
+# --- 5. FUNÇÃO PRINCIPAL ---
+
+def otimizar_em_ilhas(problema, n_ilhas, n_geracoes, pop_size,
+                      semente_base=1, usar_operadores_simplex=True,
+                      geracoes_por_migracao=0, n_migrantes=5, n_processos=None,
+                      populacao_inicial=None):
+    """
+    Executa 'n_ilhas' NSGA-II em paralelo e une as fronteiras.
+
+    'populacao_inicial' (opcional, pop x N) é usada como ponto de
+    partida de todas as ilhas (ex: warm start do CSV anterior).
+
+    Se 'geracoes_por_migracao' > 0, a execução é dividida em
+    épocas; ao fim de cada uma, cada ilha troca os 'n_migrantes'
+    piores indivíduos por soluções da fronteira da ilha anterior.
+    """
+    if n_processos is None:
+        n_processos = min(n_ilhas, os.cpu_count() or 1)
+
+    if geracoes_por_migracao and geracoes_por_migracao < n_geracoes:
+        n_epocas = int(np.ceil(n_geracoes / geracoes_por_migracao))
+        geracoes_epoca = [geracoes_por_migracao] * (n_epocas - 1)
+        geracoes_epoca.append(n_geracoes - geracoes_por_migracao * (n_epocas - 1))
+    else:
+        geracoes_epoca = [n_geracoes]
+
+    rng = np.random.default_rng(semente_base)
+    populacoes = [populacao_inicial] * n_ilhas
+
+    with ProcessPoolExecutor(max_workers=n_processos) as pool:
+        for epoca, n_gen in enumerate(geracoes_epoca):
+            argumentos = [
+                (problema, semente_base + ilha + 1000 * epoca, n_gen, pop_size,
+                 usar_operadores_simplex, populacoes[ilha])
+                for ilha in range(n_ilhas)
+            ]
+            resultados = list(pool.map(_executar_ilha, argumentos))
+
+            ultima_epoca = epoca == len(geracoes_epoca) - 1
+            if ultima_epoca:
+                break
+
+            # --- Migração (anel): ilha i recebe elites da ilha i-1 ---
+            for ilha in range(n_ilhas):
+                pop_X = resultados[ilha][0].copy()
+                _, _, opt_X_vizinha = resultados[ilha - 1]
+                k = min(n_migrantes, len(opt_X_vizinha), len(pop_X))
+                if k > 0 and n_ilhas > 1:
+                    escolhidos = rng.choice(len(opt_X_vizinha), size=k, replace=False)
+                    # A população final do NSGA-II vem ordenada por
+                    # rank/crowding: os últimos são os piores.
+                    pop_X[-k:] = opt_X_vizinha[escolhidos]
+                populacoes[ilha] = pop_X
+
+    # --- União das fronteiras de todas as ilhas ---
+    F_por_ilha = [r[1] for r in resultados]
+    origem = np.concatenate([np.full(len(r[1]), i) for i, r in enumerate(resultados)])
+    F_total = np.vstack(F_por_ilha)
+    X_total = np.vstack([r[2] for r in resultados])
+
+    F, X, indices = filtrar_nao_dominados(F_total, X_total)
+    contribuicao = np.bincount(origem[indices], minlength=n_ilhas)
+    return ResultadoIlhas(F, X, F_por_ilha, contribuicao)
@@ -11,34 +11,182 @@ Seu trabalho é:
 2. Importar o modelo matemático de 'modelo_problema.py'.
 3. Configurar e EXECUTAR o algoritmo de otimização (NSGA-II).
 4. Salvar os resultados (a Fronteira de Pareto completa)
-   em um arquivo CSV para análise posterior.
+   em formato binário ('resultados_otimizacao/') e, opcionalmente,
+   em um arquivo CSV para análise no Excel.
+5. Salvar os inputs (μ, Σ, Selic...) em um artefato binário
+   ('inputs_otimizacao/'), reutilizado pelo 'plot.py'.
 """
 
 import pandas as pd
-from pymoo.algorithms.moo.nsga2 import NSGA2
+import numpy as np
 from pymoo.optimize import minimize
 
 # --- 1. IMPORTAR NOSSOS MÓDULOS ---
 import preparar_dados
 import modelo_problema
+import artefato_inputs
+import fronteira_exata
+import fronteira_reamostrada
+import modelo_risco
+import risco_cvar
+import otimizacao_paralela
+import populacao_inicial
+import universo_incremental
+import convergencia
+import resultados_binarios
+import config
+import rastreamento
 
 # --- 2. CONSTANTES DE EXECUÇÃO ---
 ARQUIVO_SAIDA_CSV = 'resultados_otimizacao.csv'
 
+# Os resultados sempre são gravados em formato binário (ver
+# 'resultados_binarios.py'), que é o que o 'plot.py' lê.
+# O CSV (';' e decimal ',') é só uma exportação para o Excel.
+PASTA_RESULTADOS = resultados_binarios.PASTA_RESULTADOS
+EXPORTAR_CSV = True
+
+# Motor de otimização:
+# - 'NSGA2': algoritmo genético (fronteira aproximada)
+# - 'CLA':   Critical Line Algorithm (fronteira exata, ver 'fronteira_exata.py')
+# - 'REAMOSTRADA': fronteira reamostrada de Michaud (média de CLAs sobre
+#                  amostras bootstrap, ver 'fronteira_reamostrada.py')
+MOTOR_OTIMIZACAO = 'NSGA2'
+
 # Parâmetros do Algoritmo Genético
 POPULACAO_SIZE = 150 # Nº de portfólios testados por geração
 NUM_GERACOES = 200   # Nº de gerações (iterações)
 
+# Critério de parada (ver 'convergencia.py'):
+# - 'GERACOES': exatamente NUM_GERACOES gerações (original)
+# - 'HV':       para quando o hipervolume estagna
+# - 'IGD':      para quando a fronteira para de se mover entre gerações
+# Nos critérios por convergência, NUM_GERACOES vira o limite máximo.
+CRITERIO_PARADA = 'GERACOES'
+TOLERANCIA_CONVERGENCIA = 1e-4  # Ganho relativo de HV mínimo
+TOLERANCIA_IGD = 1e-3           # IGD (fração da amplitude) entre gerações consecutivas
+PACIENCIA_CONVERGENCIA = 15     # Nº de gerações sem melhora antes de parar
+
+# Log estruturado por geração (JSON lines). None desativa.
+ARQUIVO_LOG_GERACOES = 'log_geracoes.jsonl'
+
+# Operadores que mantêm os pesos no simplex (soma = 1, w >= 0)
+# (ver 'operadores_simplex.py'). Se False, usa os operadores padrão do Pymoo.
+USAR_OPERADORES_SIMPLEX = True
+
+# Execução paralela em "ilhas" (ver 'otimizacao_paralela.py')
+# NUM_ILHAS = 1 mantém a execução única original.
+NUM_ILHAS = 1                # Nº de NSGA-II independentes (sementes 1, 2, ...)
+NUM_PROCESSOS = None         # None = nº de núcleos da máquina
+GERACOES_POR_MIGRACAO = 0    # 0 = ilhas isoladas (sem migração)
+NUM_MIGRANTES = 5            # Elites trocadas entre ilhas a cada migração
+
+# Modelo de risco usado na avaliação do NSGA-II (ver 'modelo_risco.py'):
+# - 'DENSO':    Σ completa (N x N)
+# - 'FATORIAL': K fatores (componentes principais) + risco específico
+# - 'RETORNOS': Σ fatorada direto da matriz de retornos (sem montar Σ)
+MODELO_RISCO = 'DENSO'
+N_FATORES_RISCO = 10        # K do modelo 'FATORIAL'
+PRECISAO_RISCO = 'float64'  # 'float32' reduz memória/tempo em universos grandes
+
+# Medida de risco do OBJETIVO 1 (ver 'risco_cvar.py'):
+# - 'VARIANCIA': w^T Σ w (original; usa o MODELO_RISCO acima)
+# - 'CVAR':      perda média nos (1 - NIVEL_CVAR) piores dias do histórico
+#                (com o motor 'CLA', a fronteira exata vem de um programa linear)
+# Os resultados salvos continuam com a variância em 'Risco_Anual' (plot.py).
+MEDIDA_RISCO = 'VARIANCIA'
+NIVEL_CVAR = 0.95
+
+# Restrição de cardinalidade (ver 'modelo_problema.py'):
+# no máximo MAX_ATIVOS ativos por carteira, cada um com peso >= PESO_MINIMO.
+# None = sem limite (original). Só vale para o NSGA-II (o CLA a ignora).
+MAX_ATIVOS = None
+PESO_MINIMO = 0.0
 
-# --- 3. BLOCO DE EXECUÇÃO PRINCIPAL ---
+# Warm start: começar o NSGA-II a partir das carteiras da última
+# execução (PASTA_RESULTADOS ou, na falta dela, o CSV; ver 'populacao_inicial.py').
+# Como μ e Σ mudam pouco de um dia para o outro, bastam poucas gerações.
+WARM_START = False
+NUM_GERACOES_WARM_START = 20  # Usado no lugar de NUM_GERACOES quando há warm start
+
+# Universo alterado em poucos ativos (ver 'universo_incremental.py'):
+# atualiza μ/Σ a partir do artefato de inputs do dia (baixando só os
+# ativos novos) e semeia o NSGA-II com a fronteira anterior, com
+# variantes que já dão estas frações de peso aos ativos novos.
+# O nº de gerações continua NUM_GERACOES (só cai para
+# NUM_GERACOES_WARM_START se WARM_START também estiver ligado).
+ATUALIZACAO_INCREMENTAL = False
+FRACOES_ATIVOS_NOVOS = (0.05, 0.15, 0.30)
+
+# Parâmetros do motor exato (CLA)
+NUM_PONTOS_FRONTEIRA = 150 # Nº de portfólios interpolados entre os cantos
+
+# Parâmetros do motor 'REAMOSTRADA' (NUM_PONTOS_FRONTEIRA postos por fronteira;
+# processos: NUM_PROCESSOS). As bandas de confiança vão para um CSV à parte.
+NUM_AMOSTRAS_BOOTSTRAP = fronteira_reamostrada.NUM_AMOSTRAS
+TAMANHO_BLOCO_BOOTSTRAP = fronteira_reamostrada.TAMANHO_BLOCO
+NIVEL_BANDAS = fronteira_reamostrada.NIVEL_CONFIANCA
+ARQUIVO_BANDAS_CSV = fronteira_reamostrada.ARQUIVO_BANDAS_CSV
+
+# Motores sem gerações (nem warm start ou codificação do NSGA-II)
+MOTORES_EXATOS = ('CLA', 'REAMOSTRADA')
+
+
+# --- 3. FUNÇÕES AUXILIARES ---
+
+def montar_dataframe_resultados(F, X, nomes_dos_ativos, cvar=None):
+    """
+    Converte a fronteira (F, X) no DataFrame salvo no CSV:
+    'Risco_Anual', 'Retorno_Anual' (e 'CVaR_Diario', se 'cvar'
+    for dado) e uma coluna 'w_<ativo>' por ativo, ordenado do
+    menor risco para o maior.
+    """
+    # F -> Contém os OBJETIVOS (Coluna 0: Risco, Coluna 1: -Retorno)
+    # X -> Contém as VARIÁVEIS (Os pesos 'w' de cada portfólio)
+    
+    # Obter objetivos e inverter o retorno para positivo
+    riscos = F[:, 0]
+    retornos = -F[:, 1]
+    
+    # Criar DataFrames
+    df_objetivos = pd.DataFrame({
+        'Risco_Anual': riscos,
+        'Retorno_Anual': retornos
+    })
+    if cvar is not None:
+        df_objetivos[resultados_binarios.COLUNA_CVAR] = cvar
+    
+    # Criar colunas de pesos com nomes (ex: 'w_PETR4.SA')
+    colunas_pesos = [f'w_{nome}' for nome in nomes_dos_ativos]
+    df_pesos = pd.DataFrame(X, columns=colunas_pesos)
+    
+    # Combinar tudo em um único DataFrame
+    df_resultados = pd.concat([df_objetivos, df_pesos], axis=1)
+    
+    # Ordenar do menor risco para o maior
+    return df_resultados.sort_values(by='Risco_Anual').reset_index(drop=True)
+
+
+# --- 4. BLOCO DE EXECUÇÃO PRINCIPAL ---
 if __name__ == '__main__':
     
     print("--- INICIANDO EXECUTOR DE OTIMIZAÇÃO ---")
+    # Rastro das etapas (tempo/memória), se ligado em 'rastreamento.py'
+    rastreamento.ativar_configurado()
     
     # --- PASSO 1: Obter Dados ---
     print("\n[PASSO 1/4] Carregando e preparando dados de entrada...")
     # Chama a função principal do nosso outro arquivo
-    inputs = preparar_dados.calcular_inputs_otimizacao()
+    atualizacao = None
+    if ATUALIZACAO_INCREMENTAL:
+        with rastreamento.etapa('otimizar.inputs_incremental'):
+            atualizacao = universo_incremental.atualizar_inputs(config.LISTA_COMPLETA_ATIVOS,
+                                                                config.ANOS_DE_DADOS)
+    if atualizacao is not None:
+        inputs, ativos_novos, ativos_removidos = atualizacao
+    else:
+        with rastreamento.etapa('otimizar.inputs'):
+            inputs = preparar_dados.calcular_inputs_otimizacao()
     
     if inputs is None:
         print("Erro fatal: Falha ao carregar os dados. Encerrando.")
@@ -48,72 +196,269 @@ if __name__ == '__main__':
         matriz_cov = inputs['matriz_cov']
         nomes_dos_ativos = inputs['nomes_dos_ativos']
         
+        # Salvar os inputs para os próximos scripts (ex: plot.py)
+        with rastreamento.etapa('otimizar.salvar_inputs'):
+            hash_inputs = artefato_inputs.salvar_inputs(
+                inputs,
+                artefato_inputs.PASTA_INPUTS,
+                config.LISTA_COMPLETA_ATIVOS,
+                config.ANOS_DE_DADOS
+            )
+        print(f"Inputs salvos em '{artefato_inputs.PASTA_INPUTS}/' (hash {hash_inputs[:12]}).")
+        
         # --- PASSO 2: Instanciar o Problema ---
         print("\n[PASSO 2/4] Instanciando o modelo matemático (Fórmulas)...")
         # Instancia a classe que definimos no 'modelo_problema.py'
-        problema = modelo_problema.OtimizacaoPortfolio(
-            retornos_medios,
-            matriz_cov
-        )
+        with rastreamento.etapa('otimizar.modelo', medida_risco=MEDIDA_RISCO, modelo_risco=MODELO_RISCO):
+            if MEDIDA_RISCO == 'CVAR':
+                risco = risco_cvar.RiscoCVaR.de_retornos(inputs['matriz_retornos_historicos'],
+                                                         NIVEL_CVAR,
+                                                         dias_ano=preparar_dados.DIAS_UTEIS_ANO,
+                                                         precisao=PRECISAO_RISCO)
+            elif MODELO_RISCO == 'FATORIAL':
+                risco = modelo_risco.RiscoFatorial.de_pca(matriz_cov, N_FATORES_RISCO, PRECISAO_RISCO)
+            elif MODELO_RISCO == 'RETORNOS':
+                risco = modelo_risco.RiscoFatorado.de_retornos(inputs['matriz_retornos_historicos'],
+                                                               preparar_dados.DIAS_UTEIS_ANO,
+                                                               PRECISAO_RISCO)
+            else:
+                risco = modelo_risco.RiscoDenso(matriz_cov, PRECISAO_RISCO)
+            problema = modelo_problema.OtimizacaoPortfolio(
+                retornos_medios,
+                risco,
+                max_ativos=MAX_ATIVOS,
+                peso_minimo=PESO_MINIMO
+            )
         
-        # --- PASSO 3: Configurar o Algoritmo ---
-        print("\n[PASSO 3/4] Configurando o algoritmo de otimização (NSGA-II)...")
-        algoritmo = NSGA2(
-            pop_size=POPULACAO_SIZE,
-            eliminate_duplicates=True
-        )
+        # Warm start (lido ANTES de os resultados serem sobrescritos no PASSO 5)
+        populacao_anterior = None
+        num_geracoes = NUM_GERACOES
+        # (Universo alterado incrementalmente: a população parte da fronteira
+        #  anterior sempre que houver resultados, mas com as gerações de sempre)
+        if (WARM_START or atualizacao is not None) and MOTOR_OTIMIZACAO not in MOTORES_EXATOS:
+            origem_anterior = PASTA_RESULTADOS
+            if resultados_binarios.ler_manifesto(PASTA_RESULTADOS) is None:
+                origem_anterior = ARQUIVO_SAIDA_CSV
+            with rastreamento.etapa('otimizar.warm_start'):
+                populacao_anterior = populacao_inicial.montar_populacao_inicial(
+                    origem_anterior,
+                    nomes_dos_ativos,
+                    POPULACAO_SIZE,
+                    fracoes_novos=FRACOES_ATIVOS_NOVOS if atualizacao is not None else ()
+                )
+            if populacao_anterior is not None:
+                if WARM_START:
+                    num_geracoes = NUM_GERACOES_WARM_START
+                if MAX_ATIVOS is not None:
+                    populacao_anterior = problema.codificar(populacao_anterior)
+            else:
+                print(f"  Warm start: '{origem_anterior}' não encontrado. Partindo do zero.")
         
-        # --- PASSO 4: Executar a Otimização ---
-        print(f"\n[PASSO 4/4] Executando a otimização... ({NUM_GERACOES} gerações)")
-        # Esta é a linha que faz o "trabalho pesado"
-        res = minimize(
-            problema,
-            algoritmo,
-            ('n_gen', NUM_GERACOES), # Critério de parada
-            seed=1,                 # Para resultados reprodutíveis
-            verbose=True            # Mostrar o progresso (gen: 1, 2, ...)
-        )
+        # Critério de parada de fato aplicado (vai para os metadados)
+        criterio_parada = None if MOTOR_OTIMIZACAO in MOTORES_EXATOS else CRITERIO_PARADA
+        if MOTOR_OTIMIZACAO == 'CLA' and MEDIDA_RISCO == 'CVAR':
+            # --- PASSO 3/4: Fronteira média-CVaR exata (programação linear) ---
+            print("\n[PASSO 3/4] Motor selecionado: fronteira média-CVaR exata (programa linear)...")
+            if MAX_ATIVOS is not None:
+                print("  AVISO: o programa linear não trata a restrição de cardinalidade (MAX_ATIVOS ignorado).")
+            print(f"\n[PASSO 4/4] Calculando a fronteira... ({NUM_PONTOS_FRONTEIRA} pontos)")
+            with rastreamento.etapa('otimizar.motor', motor='CLA-CVAR'):
+                res = risco_cvar.calcular_fronteira_cvar(
+                    inputs['matriz_retornos_historicos'].to_numpy(),
+                    np.asarray(retornos_medios),
+                    nivel=NIVEL_CVAR,
+                    n_pontos=NUM_PONTOS_FRONTEIRA
+                )
+        elif MOTOR_OTIMIZACAO == 'CLA':
+            # --- PASSO 3/4: Fronteira Exata (Critical Line Algorithm) ---
+            print("\n[PASSO 3/4] Motor selecionado: fronteira exata (CLA)...")
+            if MAX_ATIVOS is not None:
+                print("  AVISO: o CLA não trata a restrição de cardinalidade (MAX_ATIVOS ignorado).")
+            print(f"\n[PASSO 4/4] Calculando a fronteira... ({NUM_PONTOS_FRONTEIRA} pontos)")
+            with rastreamento.etapa('otimizar.motor', motor='CLA'):
+                res = fronteira_exata.calcular_fronteira_exata(
+                    np.asarray(retornos_medios),
+                    np.asarray(matriz_cov),
+                    n_pontos=NUM_PONTOS_FRONTEIRA
+                )
+            print(f"Portfólios de canto encontrados: {len(res.X_cantos)}")
+        elif MOTOR_OTIMIZACAO == 'REAMOSTRADA':
+            # --- PASSO 3/4: Fronteira reamostrada (Michaud) ---
+            print("\n[PASSO 3/4] Motor selecionado: fronteira reamostrada (bootstrap em blocos + CLA)...")
+            if MAX_ATIVOS is not None or MEDIDA_RISCO == 'CVAR':
+                print("  AVISO: a reamostragem usa a variância, sem cardinalidade (MAX_ATIVOS/CVaR ignorados).")
+            print(f"\n[PASSO 4/4] Resolvendo {NUM_AMOSTRAS_BOOTSTRAP} fronteiras... "
+                  f"({NUM_PONTOS_FRONTEIRA} postos cada)")
+            with rastreamento.etapa('otimizar.motor', motor='REAMOSTRADA',
+                                    amostras=NUM_AMOSTRAS_BOOTSTRAP) as info:
+                res = fronteira_reamostrada.calcular_fronteira_reamostrada(
+                    inputs['matriz_retornos_historicos'],
+                    retornos_medios,
+                    matriz_cov,
+                    n_amostras=NUM_AMOSTRAS_BOOTSTRAP,
+                    tamanho_bloco=TAMANHO_BLOCO_BOOTSTRAP,
+                    n_pontos=NUM_PONTOS_FRONTEIRA,
+                    nivel=NIVEL_BANDAS,
+                    metodo=preparar_dados.METODO_COVARIANCIA,
+                    n_processos=NUM_PROCESSOS,
+                    dias_ano=preparar_dados.DIAS_UTEIS_ANO
+                )
+                info.update(falhas=res.n_falhas)
+            print(f"Amostras válidas: {res.n_amostras} ({res.n_falhas} falhas do CLA)")
+            res.dataframe_bandas(nomes_dos_ativos).to_csv(ARQUIVO_BANDAS_CSV, sep=';', decimal=',')
+            print(f"Bandas de confiança ({NIVEL_BANDAS:.0%}) salvas em '{ARQUIVO_BANDAS_CSV}'.")
+        elif NUM_ILHAS > 1:
+            # --- PASSO 3/4: Várias ilhas NSGA-II em paralelo ---
+            print(f"\n[PASSO 3/4] Configurando {NUM_ILHAS} ilhas NSGA-II em paralelo...")
+            if CRITERIO_PARADA != 'GERACOES':
+                print(f"  AVISO: as ilhas rodam um nº fixo de gerações (CRITERIO_PARADA='{CRITERIO_PARADA}' ignorado).")
+                criterio_parada = 'GERACOES'
+            if ARQUIVO_LOG_GERACOES:
+                print("  AVISO: as ilhas não gravam o log por geração (ARQUIVO_LOG_GERACOES ignorado).")
+            print(f"\n[PASSO 4/4] Executando a otimização... ({num_geracoes} gerações por ilha)")
+            # (As avaliações rodam nos processos das ilhas: fora do rastro)
+            with rastreamento.etapa('otimizar.motor', motor='NSGA2', ilhas=NUM_ILHAS):
+                res = otimizacao_paralela.otimizar_em_ilhas(
+                    problema,
+                    n_ilhas=NUM_ILHAS,
+                    n_geracoes=num_geracoes,
+                    pop_size=POPULACAO_SIZE,
+                    semente_base=1,
+                    usar_operadores_simplex=USAR_OPERADORES_SIMPLEX,
+                    geracoes_por_migracao=GERACOES_POR_MIGRACAO,
+                    n_migrantes=NUM_MIGRANTES,
+                    n_processos=NUM_PROCESSOS,
+                    populacao_inicial=populacao_anterior
+                )
+            # Checagem de robustez: quanto cada ilha contribuiu para a fronteira final
+            for ilha, (F_ilha, n_pontos) in enumerate(zip(res.F_por_ilha, res.contribuicao)):
+                print(f"  Ilha {ilha + 1}: {len(F_ilha)} soluções, {n_pontos} na fronteira final")
+        else:
+            # --- PASSO 3: Configurar o Algoritmo ---
+            print("\n[PASSO 3/4] Configurando o algoritmo de otimização (NSGA-II)...")
+            # (Com USAR_OPERADORES_SIMPLEX, todo indivíduo já nasce
+            #  e continua com soma dos pesos = 1)
+            algoritmo = otimizacao_paralela.criar_nsga2(
+                POPULACAO_SIZE,
+                USAR_OPERADORES_SIMPLEX,
+                populacao_anterior,
+                cardinalidade=MAX_ATIVOS is not None
+            )
+            
+            # --- PASSO 4: Executar a Otimização ---
+            print(f"\n[PASSO 4/4] Executando a otimização... ({num_geracoes} gerações)")
+            if CRITERIO_PARADA in ('HV', 'IGD'):
+                criterio = convergencia.TerminacaoConvergencia(
+                    metrica=CRITERIO_PARADA.lower(),
+                    tolerancia=TOLERANCIA_CONVERGENCIA,
+                    paciencia=PACIENCIA_CONVERGENCIA,
+                    n_max_gen=num_geracoes,
+                    tolerancia_igd=TOLERANCIA_IGD
+                )
+            else:
+                criterio = ('n_gen', num_geracoes)
+            
+            registro = None
+            if ARQUIVO_LOG_GERACOES:
+                registro = convergencia.RegistroGeracoes(ARQUIVO_LOG_GERACOES, problema)
+            
+            # Esta é a linha que faz o "trabalho pesado"
+            with rastreamento.etapa('otimizar.motor', motor='NSGA2') as info:
+                res = minimize(
+                    problema,
+                    algoritmo,
+                    criterio,               # Critério de parada
+                    seed=1,                 # Para resultados reprodutíveis
+                    callback=registro,      # Log por geração (JSON lines)
+                    verbose=True            # Mostrar o progresso (gen: 1, 2, ...)
+                )
+                # (Ao terminar, o Pymoo já avançou o contador para a próxima geração)
+                geracoes_executadas = res.algorithm.n_gen - 1
+                info.update(geracoes=geracoes_executadas, avaliacoes=problema.n_avaliacoes,
+                            segundos_evaluate=round(problema.tempo_avaliacao, 4))
+            
+            if registro is not None:
+                registro.fechar()
+                print(f"Log por geração salvo em '{ARQUIVO_LOG_GERACOES}'.")
+            print(f"Gerações executadas: {geracoes_executadas} | "
+                  f"Portfólios avaliados: {problema.n_avaliacoes} "
+                  f"({problema.tempo_avaliacao:.2f}s no _evaluate)")
         
         print("\n--- Otimização Concluída ---")
         
         # --- PASSO 5: Salvar Resultados (Req. 4) ---
         if res.F is not None and res.X is not None:
             print(f"Otimização encontrou {len(res.F)} soluções ótimas.")
-            print(f"Processando e salvando resultados em '{ARQUIVO_SAIDA_CSV}'...")
-            
-            # res.F -> Contém os OBJETIVOS (Coluna 0: Risco, Coluna 1: -Retorno)
-            # res.X -> Contém as VARIÁVEIS (Os pesos 'w' de cada portfólio)
-            
-            # Obter objetivos e inverter o retorno para positivo
-            riscos = res.F[:, 0]
-            retornos = -res.F[:, 1]
             
-            # Obter os pesos
-            pesos_matrix = res.X
+            # Com cardinalidade, X é [K índices, K pesos]: volta para os N pesos
+            pesos_finais = np.atleast_2d(res.X)
+            if MOTOR_OTIMIZACAO not in MOTORES_EXATOS:
+                pesos_finais = problema.pesos_densos(pesos_finais)
             
-            # Criar DataFrames
-            df_objetivos = pd.DataFrame({
-                'Risco_Anual': riscos,
-                'Retorno_Anual': retornos
-            })
+            # Com o CVaR, a fronteira é salva com a variância (Σ) no lugar do
+            # CVaR, para o 'plot.py' e os demais scripts seguirem funcionando;
+            # o CVaR otimizado vai junto, na coluna extra 'CVaR_Diario'.
+            # (A reamostragem ignora o CVaR: a medida efetiva é a variância.)
+            medida_risco = 'VARIANCIA' if MOTOR_OTIMIZACAO == 'REAMOSTRADA' else MEDIDA_RISCO
+            objetivos_finais = np.atleast_2d(res.F)
+            cvar_finais = None
+            if medida_risco == 'CVAR':
+                cvar_finais = objetivos_finais[:, 0].copy()
+                print(f"CVaR ({NIVEL_CVAR:.0%}) diário da fronteira: "
+                      f"{cvar_finais.min():.2%} a {cvar_finais.max():.2%}")
             
-            # Criar colunas de pesos com nomes (ex: 'w_PETR4.SA')
-            colunas_pesos = [f'w_{nome}' for nome in nomes_dos_ativos]
-            df_pesos = pd.DataFrame(pesos_matrix, columns=colunas_pesos)
+            # Com um modelo de risco aproximado (FATORIAL: PCA com K fatores;
+            # 'float32'), os objetivos da busca também são aproximados: os
+            # salvos são recalculados com a Σ densa e μ em float64
+            risco_aproximado = (MOTOR_OTIMIZACAO not in MOTORES_EXATOS and
+                                (MODELO_RISCO != 'DENSO' or PRECISAO_RISCO != 'float64'))
+            if medida_risco == 'CVAR' or risco_aproximado:
+                variancias = np.einsum('ij,jk,ik->i', pesos_finais,
+                                       np.asarray(matriz_cov, dtype=np.float64), pesos_finais)
+                if risco_aproximado and medida_risco == 'VARIANCIA':
+                    erro = np.abs(objetivos_finais[:, 0] - variancias) / np.maximum(variancias, 1e-300)
+                    print(f"Risco recalculado com a Σ densa (erro máx. do modelo "
+                          f"'{MODELO_RISCO}'/{PRECISAO_RISCO}: {erro.max():.2%}).")
+                objetivos_finais = np.column_stack([
+                    variancias,
+                    -(pesos_finais @ np.asarray(retornos_medios, dtype=np.float64))
+                ])
             
-            # Combinar tudo em um único DataFrame
-            df_resultados = pd.concat([df_objetivos, df_pesos], axis=1)
+            # Formato binário (lido pelo 'plot.py')
+            metadados = {
+                'motor': MOTOR_OTIMIZACAO,
+                'num_geracoes': None if MOTOR_OTIMIZACAO in MOTORES_EXATOS else num_geracoes,
+                'populacao_size': POPULACAO_SIZE,
+                'num_ilhas': NUM_ILHAS,
+                'criterio_parada': criterio_parada,
+                'modelo_risco': MODELO_RISCO,
+                'medida_risco': medida_risco,
+                'nivel_cvar': NIVEL_CVAR if medida_risco == 'CVAR' else None,
+                'max_ativos': MAX_ATIVOS,
+                'peso_minimo': PESO_MINIMO,
+                'hash_inputs': hash_inputs,
+                'incremental': None if atualizacao is None else {'novos': ativos_novos,
+                                                                 'removidos': ativos_removidos},
+                'taxa_livre_de_risco': inputs['taxa_livre_de_risco'],
+            }
+            with rastreamento.etapa('otimizar.salvar_resultados', portfolios=len(pesos_finais)):
+                resultados_binarios.salvar_resultados(objetivos_finais, pesos_finais, nomes_dos_ativos,
+                                                      PASTA_RESULTADOS, metadados, cvar=cvar_finais)
+            print(f"Resultados salvos em '{PASTA_RESULTADOS}/' (formato binário).")
             
-            # Ordenar do menor risco para o maior
-            df_resultados = df_resultados.sort_values(by='Risco_Anual').reset_index(drop=True)
+            # Exportação para o Excel (formato ; para compatibilidade com Excel-BR)
+            if EXPORTAR_CSV:
+                print(f"Exportando resultados para '{ARQUIVO_SAIDA_CSV}'...")
+                try:
+                    with rastreamento.etapa('otimizar.csv'):
+                        df_resultados = montar_dataframe_resultados(objetivos_finais, pesos_finais,
+                                                                    nomes_dos_ativos, cvar_finais)
+                        df_resultados.to_csv(ARQUIVO_SAIDA_CSV, index=False, sep=';', decimal=',')
+                    print(f"Sucesso! Resultados salvos em '{ARQUIVO_SAIDA_CSV}'.")
+                except Exception as e:
+                    print(f"Erro ao salvar o arquivo CSV: {e}")
             
-            # Salvar em CSV (formato ; para compatibilidade com Excel-BR)
-            try:
-                df_resultados.to_csv(ARQUIVO_SAIDA_CSV, index=False, sep=';', decimal=',')
-                print(f"Sucesso! Resultados salvos em '{ARQUIVO_SAIDA_CSV}'.")
-                print("\nPróximo passo: execute 'visualizar.py' para ver os gráficos.")
-            except Exception as e:
-                print(f"Erro ao salvar o arquivo CSV: {e}")
+            print("\nPróximo passo: execute 'plot.py' para ver os gráficos.")
                 
         else:
             print("Otimização falhou e não encontrou soluções viáveis.")
\ No newline at end of file
@@ -7,26 +7,41 @@ Este script é o "painel de controle" final.
 Ele NÃO executa a otimização.
 
 Seu trabalho é:
-1. Ler o arquivo 'resultados_otimizacao.csv'.
+1. Ler os resultados da otimização (pasta binária
+   'resultados_otimizacao/' ou, na falta dela, o CSV).
 2. Calcular métricas adicionais (como o Índice de Sharpe).
 3. Apresentar 3 ANÁLISES SEPARADAS dos portfólios de destaque
-   (Mínimo Risco, Máximo Retorno, Melhor Custo-Benefício).
+   (Mínimo Risco, Máximo Retorno, Melhor Custo-Benefício),
+   calculados de forma exata a partir de μ, Σ e da Selic
+   (ver 'analise_fronteira.py').
 4. Plotar o gráfico da Fronteira de Pareto e salvá-lo (sem exibir).
 5. Plotar UM gráfico de pizza final para o portfólio de
    Melhor Custo-Benefício (Sharpe) e salvá-lo.
+
+Os gráficos são gerados por 'graficos.py': em paralelo e só
+quando os dados ou os parâmetros mudaram (cache por hash).
+
+Execute: python plot.py
+Modo em lote (gráficos de várias execuções/cenários salvos):
+    python plot.py --lote resultados_cenarios [outras_pastas ...]
 """
 
+import argparse
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import os # Para verificar se o arquivo existe
 
 # --- 1. IMPORTAR DADOS DE OUTROS ARQUIVOS ---
-import preparar_dados
+import artefato_inputs
+import resultados_binarios
+import analise_fronteira
+import graficos
 import config
+import rastreamento
 
 # --- 2. CONSTANTES DE ANÁLISE ---
 ARQUIVO_RESULTADOS_CSV = 'resultados_otimizacao.csv'
+PASTA_RESULTADOS = resultados_binarios.PASTA_RESULTADOS
 ARQUIVO_FRONTEIRA_PNG = 'fronteira_de_pareto.png'
 ARQUIVO_PIZZA_FINAL_PNG = 'distribuicao_carteira_otima_sharpe.png' # Nome do gráfico de pizza
 
@@ -55,85 +70,219 @@ def formatar_portifolio_para_print(series_portifolio, nomes_ativos, titulo=""):
             print(f"  Outros Ativos: {percentual_outros:.2%} | (R$ {valor_outros:,.2f})")
     print("-" * 40)
 
-# --- NOVO: Função de Gráfico de Pizza ---
-def plotar_distribuicao_pizza(series_portifolio, titulo, nome_arquivo):
+def calcular_custo_beneficio(df_resultados, taxa_livre_de_risco):
     """
-    (Sua Req. de Gráfico de Pizza Final)
-    Plota um gráfico de pizza da distribuição de capital para
-    o portfólio de Máximo Sharpe.
+    Acrescenta ao DataFrame de resultados a volatilidade
+    ('Risco_StDev') e o Índice de Sharpe ('Sharpe_Ratio').
     """
-    print(f"  Gerando gráfico de pizza para '{titulo}'...")
-    pesos_brutos = series_portifolio.filter(like='w_')
-    
-    # Para um gráfico de pizza, agrupamos fatias pequenas
-    threshold = 0.02 # Agrupar ativos com menos de 2%
-    
-    pesos_relevantes = pesos_brutos[pesos_brutos >= threshold]
-    
-    # Calcular a fatia "Outros"
-    outros = pesos_brutos[pesos_brutos < threshold].sum()
-    if outros > 0.001: # Só adiciona "Outros" se for relevante
-        pesos_relevantes['Outros Ativos'] = outros
-        
-    pesos_relevantes = pesos_relevantes.sort_values(ascending=False)
+    risco_stdev = np.sqrt(df_resultados['Risco_Anual'])
+    sharpe = (df_resultados['Retorno_Anual'] - taxa_livre_de_risco) / risco_stdev
     
-    # Preparar labels (remover 'w_')
-    labels = [ativo.replace('w_', '') for ativo in pesos_relevantes.index]
-    
-    plt.figure(figsize=(10, 8))
-    # 'autopct' formata os percentuais, 'startangle' gira o gráfico
-    plt.pie(pesos_relevantes.values, labels=labels, autopct='%1.1f%%', startangle=90, 
-            pctdistance=0.85) # Coloca os percentuais dentro das fatias
-    
-    # Adiciona um círculo no centro para fazer um "donut chart" (mais legível)
-    centre_circle = plt.Circle((0,0),0.70,fc='white')
-    fig = plt.gcf()
-    fig.gca().add_artist(centre_circle)
-    
-    plt.title(f"Distribuição de Capital: {titulo}", fontsize=16)
-    plt.axis('equal') # Garante que a pizza seja um círculo
-    plt.tight_layout()
-    plt.savefig(nome_arquivo, dpi=300)
-    print(f"  Gráfico de pizza salvo como '{nome_arquivo}'")
-    plt.close() # Fecha a figura para não ocupar memória
+    # (Concatena as colunas novas de uma vez: inserir uma a uma em um
+    #  DataFrame com centenas de colunas de pesos o fragmenta)
+    metricas = pd.DataFrame({'Risco_StDev': risco_stdev, 'Sharpe_Ratio': sharpe})
+    return pd.concat([df_resultados.drop(columns=metricas.columns, errors='ignore'), metricas], axis=1)
 
-# --- 4. BLOCO DE EXECUÇÃO PRINCIPAL ---
-if __name__ == '__main__':
-    
+def obter_portifolio(df_resultados, indice, pasta_resultados=None, manifesto=None):
+    """
+    Linha 'indice' do DataFrame de resultados, com os pesos ('w_').
+    Se o DataFrame só tiver os objetivos (lidos da pasta binária),
+    os pesos dessa carteira são lidos agora, e só eles (do mesmo
+    'manifesto' dos objetivos, se dado: a pasta pode ter sido
+    regravada nesse meio-tempo).
+    """
+    linha = df_resultados.loc[indice]
+    if pasta_resultados is None or linha.index.str.startswith('w_').any():
+        return linha
+    if manifesto is None:
+        manifesto = resultados_binarios.ler_manifesto(pasta_resultados)
+    pesos = resultados_binarios.carregar_pesos(pasta_resultados, [indice], manifesto=manifesto)[0]
+    nomes = manifesto['nomes_dos_ativos']
+    return pd.concat([linha, pd.Series(pesos, index=[f'w_{n}' for n in nomes])])
+
+def coluna_risco(df_resultados):
+    """Risco que foi otimizado: o CVaR (se salvo) ou a variância."""
+    if resultados_binarios.COLUNA_CVAR in df_resultados.columns:
+        return resultados_binarios.COLUNA_CVAR
+    return 'Risco_Anual'
+
+def modo_destaques(metadados):
+    """
+    De onde saem as carteiras de destaque, pelos metadados da execução:
+    - 'analitico': fronteira exata do CLA (média-variância sem cardinalidade);
+    - 'fronteira_salva': 'AnaliseFronteira.de_pontos' sobre os pesos salvos
+      (fronteira reamostrada, que não coincide com a exata);
+    - 'pontos': os próprios pontos salvos (com MAX_ATIVOS, misturar dois
+      pontos pode passar do limite de ativos; com o CVaR, a fronteira
+      salva não é a de média-variância).
+    """
+    if metadados.get('max_ativos') or metadados.get('medida_risco', 'VARIANCIA') != 'VARIANCIA':
+        return 'pontos'
+    if metadados.get('motor') == 'REAMOSTRADA':
+        return 'fronteira_salva'
+    return 'analitico'
+
+def montar_tarefas_graficos(df_resultados, portifolio_min_risco, portifolio_max_retorno,
+                            portifolio_max_sharpe, valor_total, pasta_saida=''):
+    """
+    Tarefas (ver 'graficos.py') dos dois gráficos de uma execução:
+    a Fronteira de Pareto e a pizza do portfólio de Máximo Sharpe.
+    """
+    destaques = {
+        'min_risco': (portifolio_min_risco['Risco_StDev'], portifolio_min_risco['Retorno_Anual']),
+        'max_retorno': (portifolio_max_retorno['Risco_StDev'], portifolio_max_retorno['Retorno_Anual']),
+        'max_sharpe': (portifolio_max_sharpe['Risco_StDev'], portifolio_max_sharpe['Retorno_Anual']),
+    }
+    return [
+        graficos.tarefa_fronteira(df_resultados['Risco_StDev'], df_resultados['Retorno_Anual'], destaques,
+                                  os.path.join(pasta_saida, ARQUIVO_FRONTEIRA_PNG), valor_total),
+        graficos.tarefa_pizza(portifolio_max_sharpe, "Melhor Custo-Benefício (Sharpe)",
+                              os.path.join(pasta_saida, ARQUIVO_PIZZA_FINAL_PNG)),
+    ]
+
+# --- NOVO: Modo em lote (várias execuções/cenários) ---
+def listar_pastas_resultados(caminhos):
+    """
+    Pastas binárias de resultados em 'caminhos': cada caminho pode ser
+    uma pasta de resultados ou uma pasta que as contém (ex.: a pasta
+    do 'cenarios.py', com uma subpasta por cenário).
+    """
+    pastas = []
+    for caminho in caminhos:
+        if resultados_binarios.ler_manifesto(caminho) is not None:
+            pastas.append(caminho)
+        elif os.path.isdir(caminho):
+            for nome in sorted(os.listdir(caminho)):
+                subpasta = os.path.join(caminho, nome)
+                if os.path.isdir(subpasta) and resultados_binarios.ler_manifesto(subpasta) is not None:
+                    pastas.append(subpasta)
+        else:
+            print(f"*** AVISO: '{caminho}' não é uma pasta de resultados. Ignorando.")
+    return pastas
+
+def tarefas_da_pasta(pasta, taxa_livre_de_risco=None):
+    """
+    Tarefas de gráfico de uma pasta binária de resultados; os PNGs
+    são salvos na própria pasta. A Selic vem dos metadados da pasta
+    ou de 'taxa_livre_de_risco'. Como a pasta não guarda μ e Σ, os
+    destaques são os melhores pontos salvos (sem a forma exata).
+    """
+    manifesto = resultados_binarios.ler_manifesto(pasta)
+    metadados = manifesto['metadados']
+    taxa = metadados.get('taxa_livre_de_risco', taxa_livre_de_risco)
+    if taxa is None:
+        print(f"*** AVISO: '{pasta}' não tem a taxa livre de risco nos metadados. Ignorando.")
+        return []
+
+    df = calcular_custo_beneficio(resultados_binarios.carregar_objetivos(pasta, manifesto), taxa)
+    valor_total = metadados.get('VALOR_TOTAL_INVESTIMENTO', config.VALOR_TOTAL_INVESTIMENTO)
+    return montar_tarefas_graficos(
+        df,
+        df.loc[df[coluna_risco(df)].idxmin()],
+        df.loc[df['Retorno_Anual'].idxmax()],
+        obter_portifolio(df, df['Sharpe_Ratio'].idxmax(), pasta, manifesto),
+        valor_total, pasta)
+
+def renderizar_lote(caminhos, n_processos=None, forcar=False):
+    """Gera (com cache) os gráficos de todas as pastas de resultados em 'caminhos'."""
+    pastas = listar_pastas_resultados(caminhos)
+    print(f"--- MODO EM LOTE: {len(pastas)} pasta(s) de resultados ---")
+
+    taxa_padrao = None
+    tarefas = []
+    for pasta in pastas:
+        if taxa_padrao is None and 'taxa_livre_de_risco' not in resultados_binarios.ler_manifesto(pasta)['metadados']:
+            # Execuções antigas sem a Selic nos metadados: usa a dos inputs atuais
+            inputs = artefato_inputs.carregar_ou_calcular_inputs()
+            taxa_padrao = inputs['taxa_livre_de_risco'] if inputs is not None else None
+        tarefas.extend(tarefas_da_pasta(pasta, taxa_padrao))
+    return graficos.renderizar_graficos(tarefas, n_processos, forcar)
+
+def analisar_resultados(gerar_graficos=True, n_processos=None, forcar=False):
+    """
+    Executa a análise completa (PASSOS 1 a 5 abaixo). Com
+    'gerar_graficos=False' só imprime as 3 análises, sem nem
+    importar o matplotlib.
+    Retorna (df_resultados, (mín. risco, máx. retorno, máx. Sharpe)) ou None.
+    """
     print("--- INICIANDO ANÁLISE E VISUALIZAÇÃO DOS RESULTADOS ---")
     
     # --- PASSO 1: Carregar a Taxa Livre de Risco ---
+    # (Lidos do artefato salvo pelo 'otimizar.py'; só recalcula se faltar)
     print("Carregando dados de input (para obter Taxa Selic)...")
-    inputs = preparar_dados.calcular_inputs_otimizacao()
+    with rastreamento.etapa('plot.inputs'):
+        inputs = artefato_inputs.carregar_ou_calcular_inputs()
     if inputs is None:
         print("Erro fatal: Não foi possível carregar os dados de input.")
-        exit()
+        return None
         
     taxa_livre_de_risco = inputs['taxa_livre_de_risco']
     nomes_ativos = inputs['nomes_dos_ativos']
     
-    # --- PASSO 2: Carregar o CSV com os resultados ---
-    print(f"Lendo o arquivo de resultados '{ARQUIVO_RESULTADOS_CSV}'...")
-    if not os.path.exists(ARQUIVO_RESULTADOS_CSV):
-        print(f"Erro: Arquivo '{ARQUIVO_RESULTADOS_CSV}' não encontrado.")
-        print("Por favor, execute o 'executar_otimizacao.py' primeiro.")
-        exit()
-        
-    try:
-        df_resultados = pd.read_csv(ARQUIVO_RESULTADOS_CSV, sep=';', decimal=',')
-    except Exception as e:
-        print(f"Erro ao ler o arquivo CSV: {e}")
-        exit()
+    # --- PASSO 2: Carregar os resultados ---
+    # Da pasta binária, lê só os objetivos: os pesos são lidos depois,
+    # apenas para as carteiras de destaque. O CSV fica como alternativa.
+    # (O manifesto é lido uma vez só: objetivos e pesos saem da mesma gravação)
+    pasta_resultados = None
+    manifesto = resultados_binarios.ler_manifesto(PASTA_RESULTADOS)
+    if manifesto is not None:
+        print(f"Lendo os resultados de '{PASTA_RESULTADOS}/' (formato binário)...")
+        pasta_resultados = PASTA_RESULTADOS
+        with rastreamento.etapa('plot.resultados', formato='binario'):
+            df_resultados = resultados_binarios.carregar_resultados(
+                PASTA_RESULTADOS, colunas=list(resultados_binarios.colunas_objetivos(PASTA_RESULTADOS, manifesto)),
+                manifesto=manifesto)
+    else:
+        print(f"Lendo o arquivo de resultados '{ARQUIVO_RESULTADOS_CSV}'...")
+        if not os.path.exists(ARQUIVO_RESULTADOS_CSV):
+            print(f"Erro: Arquivo '{ARQUIVO_RESULTADOS_CSV}' não encontrado.")
+            print("Por favor, execute o 'otimizar.py' primeiro.")
+            return None
+            
+        try:
+            with rastreamento.etapa('plot.resultados', formato='csv'):
+                df_resultados = pd.read_csv(ARQUIVO_RESULTADOS_CSV, sep=';', decimal=',')
+        except Exception as e:
+            print(f"Erro ao ler o arquivo CSV: {e}")
+            return None
         
     # --- PASSO 3: Calcular Custo-Benefício (Índice de Sharpe) ---
-    df_resultados['Risco_StDev'] = np.sqrt(df_resultados['Risco_Anual'])
-    df_resultados['Sharpe_Ratio'] = (df_resultados['Retorno_Anual'] - taxa_livre_de_risco) \
-                                    / df_resultados['Risco_StDev']
+    df_resultados = calcular_custo_beneficio(df_resultados, taxa_livre_de_risco)
                                     
     # --- PASSO 4: APRESENTAR AS 3 ANÁLISES SEPARADAS ---
+    # As carteiras de destaque são calculadas de forma exata (fronteira
+    # do CLA + forma fechada em cada segmento), sem depender de quantos
+    # pontos o otimizador gerou. Exceções (ver 'modo_destaques'): a
+    # fronteira reamostrada e a restrição de cardinalidade (MAX_ATIVOS),
+    # em que a fronteira exata não é a que foi otimizada.
+    if manifesto is not None:
+        modo = modo_destaques(manifesto['metadados'])
+    else:
+        # O CSV não traz os metadados: a medida de risco sai da coluna salva
+        medida = 'VARIANCIA' if coluna_risco(df_resultados) == 'Risco_Anual' else 'CVAR'
+        modo = modo_destaques({'medida_risco': medida})
+    usar_analitico = modo != 'pontos'
+    if modo == 'analitico':
+        with rastreamento.etapa('plot.fronteira_analitica'):
+            analise = analise_fronteira.obter_analise(inputs)
+        nomes_analise = nomes_ativos
+    elif modo == 'fronteira_salva':
+        # Mesma consulta do 'servico_fronteira': os destaques saem da
+        # fronteira salva (interpolando entre os seus pontos)
+        with rastreamento.etapa('plot.fronteira_salva'):
+            nomes_analise = manifesto['nomes_dos_ativos']
+            mu = inputs['retornos_medios'].loc[nomes_analise].to_numpy(dtype=np.float64)
+            cov = inputs['matriz_cov'].loc[nomes_analise, nomes_analise].to_numpy(dtype=np.float64)
+            pesos = resultados_binarios.carregar_pesos(pasta_resultados, manifesto=manifesto)
+            analise = analise_fronteira.AnaliseFronteira.de_pontos(pesos, mu, cov, taxa_livre_de_risco)
     
     # ANÁLISE 1: Portfólio de MÍNIMO RISCO (PMV)
-    portifolio_min_risco = df_resultados.loc[df_resultados['Risco_Anual'].idxmin()]
+    if usar_analitico:
+        portifolio_min_risco = analise.como_series(analise.minima_variancia(), nomes_analise)
+    else:
+        # (Fronteira média-CVaR: a de menor CVaR, que foi o risco otimizado)
+        portifolio_min_risco = obter_portifolio(df_resultados, df_resultados[coluna_risco(df_resultados)].idxmin(),
+                                                pasta_resultados, manifesto)
     
     print("\n====================================================================")
     print("               ANÁLISE 1: PORTFÓLIO DE MÍNIMO RISCO")
@@ -142,12 +291,18 @@ if __name__ == '__main__':
     print(f"  Retorno Esperado:   {portifolio_min_risco['Retorno_Anual']:.2%}")
     print(f"  Risco (Variância):  {portifolio_min_risco['Risco_Anual']:.4f}")
     print(f"  Volatilidade (Desvio Padrão): {portifolio_min_risco['Risco_StDev']:.2%}")
+    if resultados_binarios.COLUNA_CVAR in portifolio_min_risco.index:
+        print(f"  CVaR Diário:        {portifolio_min_risco[resultados_binarios.COLUNA_CVAR]:.2%}")
     print(f"  Índice Sharpe:      {portifolio_min_risco['Sharpe_Ratio']:.2f}")
     formatar_portifolio_para_print(portifolio_min_risco, nomes_ativos, "Mínimo Risco")
     # Gráfico de barras removido daqui
 
     # ANÁLISE 2: Portfólio de MÁXIMO RETORNO
-    portifolio_max_retorno = df_resultados.loc[df_resultados['Retorno_Anual'].idxmax()]
+    if usar_analitico:
+        portifolio_max_retorno = analise.como_series(analise.maximo_retorno(), nomes_analise)
+    else:
+        portifolio_max_retorno = obter_portifolio(df_resultados, df_resultados['Retorno_Anual'].idxmax(),
+                                                  pasta_resultados, manifesto)
 
     print("\n====================================================================")
     print("              ANÁLISE 2: PORTFÓLIO DE MÁXIMO RETORNO")
@@ -156,12 +311,18 @@ if __name__ == '__main__':
     print(f"  Retorno Esperado:   {portifolio_max_retorno['Retorno_Anual']:.2%}")
     print(f"  Risco (Variância):  {portifolio_max_retorno['Risco_Anual']:.4f}")
     print(f"  Volatilidade (Desvio Padrão): {portifolio_max_retorno['Risco_StDev']:.2%}")
+    if resultados_binarios.COLUNA_CVAR in portifolio_max_retorno.index:
+        print(f"  CVaR Diário:        {portifolio_max_retorno[resultados_binarios.COLUNA_CVAR]:.2%}")
     print(f"  Índice Sharpe:      {portifolio_max_retorno['Sharpe_Ratio']:.2f}")
     formatar_portifolio_para_print(portifolio_max_retorno, nomes_ativos, "Máximo Retorno")
     # Gráfico de barras removido daqui
 
     # ANÁLISE 3: Portfólio de MELHOR CUSTO-BENEFÍCIO (Sharpe Máx)
-    portifolio_max_sharpe = df_resultados.loc[df_resultados['Sharpe_Ratio'].idxmax()]
+    if usar_analitico:
+        portifolio_max_sharpe = analise.como_series(analise.tangente(), nomes_analise)
+    else:
+        portifolio_max_sharpe = obter_portifolio(df_resultados, df_resultados['Sharpe_Ratio'].idxmax(),
+                                                 pasta_resultados, manifesto)
 
     print("\n====================================================================")
     print("       ANÁLISE 3: PORTFÓLIO DE MELHOR CUSTO-BENEFÍCIO (SHARPE)")
@@ -170,49 +331,38 @@ if __name__ == '__main__':
     print(f"  Retorno Esperado:   {portifolio_max_sharpe['Retorno_Anual']:.2%}")
     print(f"  Risco (Variância):  {portifolio_max_sharpe['Risco_Anual']:.4f}")
     print(f"  Volatilidade (Desvio Padrão): {portifolio_max_sharpe['Risco_StDev']:.2%}")
+    if resultados_binarios.COLUNA_CVAR in portifolio_max_sharpe.index:
+        print(f"  CVaR Diário:        {portifolio_max_sharpe[resultados_binarios.COLUNA_CVAR]:.2%}")
     print(f"  Índice Sharpe:      {portifolio_max_sharpe['Sharpe_Ratio']:.2f} (O MAIOR)")
     formatar_portifolio_para_print(portifolio_max_sharpe, nomes_ativos, "Máximo Sharpe")
-    # --- NOVO: Chamada para o gráfico de pizza ---
-    plotar_distribuicao_pizza(portifolio_max_sharpe, "Melhor Custo-Benefício (Sharpe)", ARQUIVO_PIZZA_FINAL_PNG)
     print("====================================================================")
 
-    # --- PASSO 5: Plotar o Gráfico da Fronteira de Pareto ---
-    print("\nGerando gráfico da Fronteira de Pareto...")
-    
-    volatilidades = df_resultados['Risco_StDev']
-    retornos = df_resultados['Retorno_Anual']
-    
-    plt.figure(figsize=(12, 8))
-    plt.scatter(volatilidades, retornos, s=15, facecolors='none', edgecolors='blue', label='Portfólios Ótimos')
-    
-    plt.scatter(portifolio_min_risco['Risco_StDev'], portifolio_min_risco['Retorno_Anual'], 
-                c='red', s=70, label='Mínimo Risco (PMV)', zorder=5)
-    
-    plt.scatter(portifolio_max_retorno['Risco_StDev'], portifolio_max_retorno['Retorno_Anual'], 
-                c='green', s=70, label='Máximo Retorno', zorder=5)
-    
-    plt.scatter(portifolio_max_sharpe['Risco_StDev'], portifolio_max_sharpe['Retorno_Anual'], 
-                c='gold', s=150, label='Melhor Custo-Benefício (Sharpe)', marker='*', zorder=5, edgecolors='black')
-    
-    plt.title("Fronteira de Pareto: Otimização de Portfólio (NSGA-II)", fontsize=16)
-    plt.xlabel("Risco (Volatilidade Anualizada - Desvio Padrão)", fontsize=12)
-    plt.ylabel("Retorno Esperado (Anualizado)", fontsize=12)
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    
-    plt.text(0.98, 0.02, f"Valor Total Investido: R$ {config.VALOR_TOTAL_INVESTIMENTO:,.2f}",
-             transform=plt.gca().transAxes,
-             horizontalalignment='right',
-             verticalalignment='bottom',
-             fontsize=10,
-             bbox=dict(boxstyle='round,pad=0.3', fc='white', alpha=0.7))
-             
-    plt.savefig(ARQUIVO_FRONTEIRA_PNG, dpi=300) # Salva o gráfico principal!
-    print(f"Gráfico da Fronteira de Pareto salvo como '{ARQUIVO_FRONTEIRA_PNG}'")
-    
-    # --- ALTERAÇÃO: 'plt.show()' foi removido ---
-    # plt.show() 
+    # --- PASSO 5: Gráficos (Fronteira de Pareto + pizza do Máximo Sharpe) ---
+    # Gerados em paralelo e pulados se nada mudou desde a última vez
+    if gerar_graficos:
+        print("\nGerando os gráficos (Fronteira de Pareto e pizza do Máximo Sharpe)...")
+        with rastreamento.etapa('plot.graficos') as info:
+            tarefas = montar_tarefas_graficos(df_resultados, portifolio_min_risco, portifolio_max_retorno,
+                                              portifolio_max_sharpe, config.VALOR_TOTAL_INVESTIMENTO)
+            situacao = graficos.renderizar_graficos(tarefas, n_processos, forcar)
+            info['gerados'] = sum(1 for estado in situacao.values() if estado == 'gerado')
+        for arquivo, estado in situacao.items():
+            print(f"  '{arquivo}': {'gerado' if estado == 'gerado' else 'sem alteração (cache)'}")
     
     print("\n--- ANÁLISE E VISUALIZAÇÃO CONCLUÍDAS ---")
-    print("Dois arquivos PNG foram gerados na pasta do projeto.")
\ No newline at end of file
+    return df_resultados, (portifolio_min_risco, portifolio_max_retorno, portifolio_max_sharpe)
+
+# --- 4. BLOCO DE EXECUÇÃO PRINCIPAL ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Análise e gráficos dos resultados da otimização.")
+    parser.add_argument('--lote', nargs='+', metavar='PASTA',
+                        help="Gera só os gráficos de várias pastas de resultados (ex.: resultados_cenarios)")
+    parser.add_argument('--processos', type=int, default=None)
+    parser.add_argument('--forcar', action='store_true', help="Redesenha mesmo sem alterações (ignora o cache)")
+    args = parser.parse_args()
+    rastreamento.ativar_configurado()
+
+    if args.lote:
+        renderizar_lote(args.lote, args.processos, args.forcar)
+    else:
+        analisar_resultados(True, args.processos, args.forcar)
@@ -0,0 +1,156 @@
+"""
+================================================
+ARQUIVO DA POPULAÇÃO INICIAL (WARM START)
+================================================
+
+Como μ e Σ mudam pouco de um dia para o outro, a fronteira
+da execução anterior é um ótimo ponto de partida.
+
+Este arquivo monta a população inicial do NSGA-II a partir
+dos pesos da última execução (pasta binária 'resultados_otimizacao/',
+ver 'resultados_binarios.py', ou as colunas 'w_<ticker>' do
+'resultados_otimizacao.csv'):
+- ativos novos entram com peso 0 (e, se pedido, em variantes da
+  fronteira anterior com uma fração neles: ver 'elevar_fronteira');
+- ativos removidos saem e os pesos são reprojetados no simplex;
+- a população é completada com carteiras sorteadas (Dirichlet).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import operadores_simplex
+import resultados_binarios
+
+
+def _ler_pesos_anteriores(arquivo):
+    """
+    Lê (pesos, nomes) da pasta binária de resultados ou do CSV.
+    Retorna (None, None) se não houver nada para ler.
+    """
+    if os.path.isdir(arquivo):
+        manifesto = resultados_binarios.ler_manifesto(arquivo)
+        if manifesto is None:
+            return None, None
+        return resultados_binarios.carregar_pesos(arquivo, manifesto=manifesto), manifesto['nomes_dos_ativos']
+
+    if not os.path.exists(arquivo):
+        return None, None
+    try:
+        df = pd.read_csv(arquivo, sep=';', decimal=',')
+    except Exception as e:
+        print(f"*** AVISO: não foi possível ler '{arquivo}' para o warm start ({e}).")
+        return None, None
+
+    colunas_pesos = [c for c in df.columns if c.startswith('w_')]
+    if not colunas_pesos:
+        return None, None
+    return df[colunas_pesos].to_numpy(dtype=np.float64), [c[2:] for c in colunas_pesos]
+
+def _alinhar_pesos(pesos_antigos, nomes_antigos, nomes_dos_ativos):
+    """
+    Alinha os pesos antigos aos ativos atuais (novos -> 0, removidos
+    saem e as linhas são reprojetadas no simplex).
+    Retorna (pesos, ativos_novos); pesos = None se nada sobrar.
+    """
+    antigos = set(nomes_antigos)
+    novos = [n for n in nomes_dos_ativos if n not in antigos]
+    removidos = sorted(antigos - set(nomes_dos_ativos))
+    if novos:
+        print(f"  Warm start: ativos novos (peso inicial 0): {novos}")
+    if removidos:
+        print(f"  Warm start: ativos removidos: {removidos}")
+
+    # Reindexa pelas colunas atuais (ativos novos -> 0)
+    posicao = {nome: j for j, nome in enumerate(nomes_antigos)}
+    pesos = np.zeros((len(pesos_antigos), len(nomes_dos_ativos)))
+    for j, nome in enumerate(nomes_dos_ativos):
+        if nome in posicao:
+            pesos[:, j] = pesos_antigos[:, posicao[nome]]
+
+    # Remove linhas que ficaram vazias (só tinham ativos removidos)
+    pesos = pesos[pesos.sum(axis=1) > 0]
+    if len(pesos) == 0:
+        return None, novos
+    return operadores_simplex.projetar_no_simplex(pesos), novos
+
+def pesos_do_csv(arquivo_csv, nomes_dos_ativos):
+    """
+    Lê os pesos de um CSV de resultados (ou de uma pasta binária
+    de 'resultados_binarios') e os alinha aos ativos atuais.
+    Retorna a matriz (n_portfolios x N) ou None.
+    """
+    pesos_antigos, nomes_antigos = _ler_pesos_anteriores(arquivo_csv)
+    if pesos_antigos is None:
+        return None
+    return _alinhar_pesos(pesos_antigos, nomes_antigos, nomes_dos_ativos)[0]
+
+def elevar_fronteira(pesos, indices_novos, fracoes, n_carteiras):
+    """
+    "Eleva" a fronteira anterior para a nova dimensão: cada
+    carteira 'w' gera as variantes (1 - f)·w + f·e_j, para cada
+    ativo novo j e fração f. Assim a população já explora os
+    ativos novos (que, com peso 0 em todas as carteiras, o
+    cruzamento dificilmente alcançaria em poucas gerações).
+    Retorna até 'n_carteiras' variantes, espalhadas ao longo da fronteira.
+    """
+    if not len(indices_novos) or not len(fracoes) or n_carteiras <= 0:
+        return np.empty((0, pesos.shape[1]))
+    variantes = []
+    for j in indices_novos:
+        for f in fracoes:
+            variante = (1.0 - f) * pesos
+            variante[:, j] += f
+            variantes.append(variante)
+    # Ordem: carteira (ao longo da fronteira) -> ativo novo -> fração
+    variantes = np.stack(variantes, axis=1).reshape(-1, pesos.shape[1])
+    if len(variantes) > n_carteiras:
+        variantes = variantes[np.linspace(0, len(variantes) - 1, n_carteiras).round().astype(int)]
+    return variantes
+
+def montar_populacao_inicial(arquivo_csv, nomes_dos_ativos, pop_size, semente=1, fracoes_novos=()):
+    """
+    População (pop_size x N) com as carteiras da execução anterior,
+    completada com amostras novas. Retorna None se não houver CSV
+    (nem pasta binária) em 'arquivo_csv'.
+
+    Se o CSV tiver mais carteiras que 'pop_size', escolhe pontos
+    igualmente espaçados ao longo da fronteira (o CSV vem ordenado
+    por risco), para manter a cobertura.
+
+    Com 'fracoes_novos' (ex: (0.05, 0.15, 0.30)) e ativos novos no
+    universo, metade da população são variantes da fronteira
+    anterior com esses pesos nos ativos novos (ver 'elevar_fronteira').
+    """
+    pesos_antigos, nomes_antigos = _ler_pesos_anteriores(arquivo_csv)
+    if pesos_antigos is None:
+        return None
+    pesos, novos = _alinhar_pesos(pesos_antigos, nomes_antigos, nomes_dos_ativos)
+    if pesos is None:
+        return None
+
+    # Remove duplicatas mantendo a ordem (por risco) do CSV
+    _, primeiros = np.unique(pesos, axis=0, return_index=True)
+    pesos = pesos[np.sort(primeiros)]
+    vagas_anteriores = pop_size // 2 if (novos and fracoes_novos) else pop_size
+    if len(pesos) > vagas_anteriores:
+        indices = np.linspace(0, len(pesos) - 1, vagas_anteriores).round().astype(int)
+        pesos = pesos[np.unique(indices)]
+
+    indices_novos = [nomes_dos_ativos.index(n) for n in novos]
+    elevadas = elevar_fronteira(pesos, indices_novos, fracoes_novos, pop_size - len(pesos))
+    n_anteriores = len(pesos)
+    pesos = np.vstack([pesos, elevadas])
+
+    n_faltantes = pop_size - len(pesos)
+    if n_faltantes > 0:
+        rng = np.random.default_rng(semente)
+        amostras = operadores_simplex.amostrar_dirichlet(n_faltantes, len(nomes_dos_ativos), rng)
+        pesos = np.vstack([pesos, amostras])
+
+    texto_elevadas = f" + {len(elevadas)} com os ativos novos" if len(elevadas) else ""
+    print(f"  Warm start: {n_anteriores} carteiras da execução anterior{texto_elevadas} "
+          f"+ {max(n_faltantes, 0)} novas.")
+    return pesos
@@ -1,11 +1,16 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import datetime
-from bcb import sgs
+# (yfinance e bcb são importados só na hora do download, dentro do
+#  'FornecedorYahooBCB': quem só lê o cache/artefato não paga o import)
 
 # --- 1. IMPORTAR CONFIGURAÇÕES DO USUÁRIO ---
 import config
+import cache_dados
+import estimador_momentos
+import aquisicao_dados
+import base_retornos
+import rastreamento
 
 # --- 2. PARÂMETROS DE IMPLEMENTAÇÃO ---
 # (Configurações internas do modelo, não do usuário)
@@ -23,25 +28,129 @@ SELIC_FALLBACK = 0.09 # 9% a.a.
 # Dias úteis (pregões) em um ano
 DIAS_UTEIS_ANO = 252
 
+# Cache local dos downloads (ver 'cache_dados.py')
+# Com o cache ligado, só as datas que faltam são baixadas.
+USAR_CACHE = True
+PASTA_CACHE = cache_dados.PASTA_CACHE_PADRAO
 
-# --- 3. FUNÇÕES DE COLETA DE DADOS ---
+# Modo offline: usa apenas o que já está no cache, sem acessar a internet
+MODO_OFFLINE = False
 
-def baixar_taxa_livre_de_risco(data_inicio_str, data_fim_str):
+# Download concorrente (ver 'aquisicao_dados.py'): calendário, Selic e
+# lotes de tickers ao mesmo tempo, com repetição por ticker.
+# False = uma chamada por vez, como originalmente.
+DOWNLOAD_CONCORRENTE = True
+
+# Estimador de Σ (ver 'estimador_momentos.py'):
+# 'amostral' (original), 'ledoit_wolf' ou 'oas' (shrinkage, melhor
+# condicionada quando o nº de ativos se aproxima do nº de dias)
+METODO_COVARIANCIA = 'amostral'
+
+# Meia-vida (em pregões) para μ e Σ exponencialmente ponderados.
+# None = pesos iguais na janela inteira (original).
+MEIA_VIDA_EWMA = None
+
+# Base de retornos em disco (ver 'base_retornos.py'): com mais tickers
+# que o limiar, os preços são baixados em blocos de TICKERS_POR_BLOCO,
+# gravados em uma matriz com memory-map (DTYPE_BASE_RETORNOS) e μ/Σ
+# são calculados bloco a bloco. None = sempre em memória (original).
+LIMIAR_BASE_RETORNOS = 300
+TICKERS_POR_BLOCO = 100
+DTYPE_BASE_RETORNOS = base_retornos.DTYPE_PADRAO
+PASTA_BASE_RETORNOS = base_retornos.PASTA_BASE_RETORNOS
+
+
+# --- 3. FORNECEDOR DE DADOS (yfinance / BCB) ---
+
+class FornecedorYahooBCB:
+    """
+    Fornecedor padrão: baixa preços do yfinance e a Selic do BCB.
+
+    Qualquer objeto com estes dois métodos pode substituí-lo
+    (ex: uma fonte local falsa em testes, ver 'aquisicao_dados.py').
+    """
+
+    # Uma requisição por ticker: o 'aquisicao_dados.FornecedorConcorrente'
+    # faz várias em paralelo e repete só as que falharem
+    TAMANHO_LOTE = 1
+
+    def __init__(self, por_ticker=False):
+        # por_ticker=True: um 'yf.Ticker(...).history' por ticker (quando
+        # envolvido pelo 'FornecedorConcorrente'); False: um único
+        # 'yf.download' com todos os tickers (o download sequencial)
+        self.por_ticker = por_ticker
+
+    def baixar_precos(self, tickers, inicio, fim):
+        """Preços de fechamento (DataFrame datas x tickers)."""
+        import yfinance as yf
+        
+        if not self.por_ticker:
+            dados_precos = yf.download(tickers=list(tickers), start=inicio, end=fim,
+                                       auto_adjust=True, progress=False)['Close']
+            if isinstance(dados_precos, pd.Series):
+                dados_precos = dados_precos.to_frame(name=tickers[0])
+            return dados_precos
+
+        # 'yf.download' guarda estado global e não pode rodar em várias
+        # threads ao mesmo tempo; 'yf.Ticker(...).history' pode.
+        # O 'history' costuma indicar falha devolvendo um quadro vazio (e
+        # não com exceção): levanta o erro para o 'FornecedorConcorrente'
+        # repetir a chamada e, se não adiantar, registrar a falha.
+        series = {}
+        for ticker in tickers:
+            historico = yf.Ticker(ticker).history(start=inicio, end=fim, auto_adjust=True)
+            if historico.empty:
+                raise ValueError(f"yfinance não retornou preços de '{ticker}' ({inicio} a {fim})")
+            fechamento = historico['Close']
+            fechamento.index = fechamento.index.tz_localize(None).normalize()
+            series[ticker] = fechamento
+        return pd.DataFrame(series)
+
+    def baixar_selic(self, inicio, fim):
+        """Série da Selic (em %) indexada por data."""
+        from bcb import sgs
+        
+        selic_df = sgs.get({'selic': SELIC_CODIGO},
+                           start=inicio,
+                           end=fim)
+        return selic_df['selic']
+
+def obter_fonte_dados(fornecedor=None):
+    """
+    Retorna a fonte de dados usada pelas funções de coleta:
+    o fornecedor (padrão: yfinance/BCB), com download concorrente
+    se 'DOWNLOAD_CONCORRENTE' e envolvido pelo cache em disco se
+    'USAR_CACHE' estiverem ligados.
+    """
+    if fornecedor is None:
+        fornecedor = FornecedorYahooBCB(por_ticker=DOWNLOAD_CONCORRENTE)
+    if DOWNLOAD_CONCORRENTE:
+        fornecedor = aquisicao_dados.FornecedorConcorrente(fornecedor)
+    if not USAR_CACHE:
+        return fornecedor
+    return cache_dados.FonteComCache(fornecedor, pasta=PASTA_CACHE, offline=MODO_OFFLINE)
+
+
+# --- 4. FUNÇÕES DE COLETA DE DADOS ---
+
+@rastreamento.rastrear('dados.selic')
+def baixar_taxa_livre_de_risco(data_inicio_str, data_fim_str, fonte=None):
     """
     (Sua Req. 1)
     Tenta baixar a série histórica da Selic do BCB.
     Se falhar, retorna o valor de fallback.
     Retorna a *última* taxa disponível como um float.
     """
+    if fonte is None:
+        fonte = obter_fonte_dados()
+
     print(f"Tentando baixar Taxa Selic (Cód: {SELIC_CODIGO}) do BCB...")
     try:
-        selic_df = sgs.get({'selic': SELIC_CODIGO}, 
-                           start=data_inicio_str, 
-                           end=data_fim_str)
+        selic = fonte.baixar_selic(data_inicio_str, data_fim_str)
         
         # Limpa e pega o último valor válido
-        selic_df = selic_df.dropna()
-        ultimo_valor = selic_df['selic'].iloc[-1]
+        selic = selic.dropna()
+        ultimo_valor = selic.iloc[-1]
         
         # Converte de % para decimal
         taxa_real = ultimo_valor / 100.0
@@ -54,19 +163,18 @@ def baixar_taxa_livre_de_risco(data_inicio_str, data_fim_str):
         print(f"*** Usando a taxa de fallback definida: {SELIC_FALLBACK:.2%}")
         return SELIC_FALLBACK
 
-def baixar_dados_precos(tickers, inicio, fim):
+@rastreamento.rastrear('dados.precos')
+def baixar_dados_precos(tickers, inicio, fim, fonte=None):
     """
     Baixa os preços de fechamento (que agora já vêm ajustados
     por padrão pelo yfinance)
     """
+    if fonte is None:
+        fonte = obter_fonte_dados()
+
     print(f"Baixando dados de preços para {len(tickers)} ativos...")
     try:
-        dados_precos = yf.download(tickers=tickers, 
-                                   start=inicio, 
-                                   end=fim)['Close']
-        
-        if len(tickers) == 1:
-            dados_precos = dados_precos.to_frame(name=tickers[0])
+        dados_precos = fonte.baixar_precos(tickers, inicio, fim)
             
         print("Download de preços concluído.")
         return dados_precos
@@ -75,23 +183,33 @@ def baixar_dados_precos(tickers, inicio, fim):
         print(f"Erro ao baixar dados do yfinance: {e}")
         return None
 
-def calcular_retornos_diarios(tickers, benchmark, inicio, fim):
+def calcular_retornos_diarios(tickers, benchmark, inicio, fim, fonte=None):
     """
     1. Baixa os dados de benchmark (Ibov) para usar como calendário mestre.
-    2. Baixa os dados de preços dos ativos.
+    2. Baixa os dados de preços dos ativos (ao mesmo tempo que o 1).
     3. Alinha todos os dados aos dias de pregão do Ibov.
     4. Calcula os retornos diários.
     """
+    if fonte is None:
+        fonte = obter_fonte_dados()
     
-    print("Obtendo calendário de pregões (Ibovespa)...")
-    try:
-        calendario_pregoes = yf.download(benchmark, start=inicio, end=fim).index
-    except Exception as e:
-        print(f"Erro fatal: Não foi possível baixar o benchmark {benchmark}. {e}")
-        return None
+    @rastreamento.rastrear('dados.calendario')
+    def baixar_calendario():
+        print("Obtendo calendário de pregões (Ibovespa)...")
+        try:
+            calendario = fonte.baixar_precos([benchmark], inicio, fim)[benchmark].dropna().index
+            if calendario.empty:
+                raise ValueError("série do benchmark vazia")
+            return calendario
+        except Exception as e:
+            print(f"Erro fatal: Não foi possível baixar o benchmark {benchmark}. {e}")
+            return None
 
-    precos = baixar_dados_precos(tickers, inicio, fim)
-    if precos is None:
+    # Calendário e preços são baixados ao mesmo tempo
+    calendario_pregoes, precos = executar_downloads(
+        baixar_calendario,
+        lambda: baixar_dados_precos(tickers, inicio, fim, fonte=fonte))
+    if calendario_pregoes is None or precos is None:
         return None
         
     # Remove qualquer ativo que falhou totalmente no download (colunas só com NaN)
@@ -102,56 +220,139 @@ def calcular_retornos_diarios(tickers, benchmark, inicio, fim):
         
     print(f"Ativos baixados com sucesso: {list(precos.columns)}")
 
-    precos_alinhados = precos.reindex(calendario_pregoes, method='ffill')
-    precos_alinhados = precos_alinhados.dropna()
-    
-    retornos_diarios = precos_alinhados.pct_change()
-    retornos_diarios = retornos_diarios.dropna()
+    retornos_diarios = alinhar_retornos(precos, calendario_pregoes)
     
     print("Retornos diários alinhados.")
     
     return retornos_diarios
 
+@rastreamento.rastrear('dados.base_retornos')
+def calcular_base_retornos(tickers, benchmark, inicio, fim, fonte=None,
+                           pasta=PASTA_BASE_RETORNOS, dtype=DTYPE_BASE_RETORNOS):
+    """
+    Mesmo resultado de 'calcular_retornos_diarios', mas gravado na
+    base em disco: os preços são baixados em blocos de tickers e
+    cada bloco é alinhado e gravado antes do próximo (só um bloco
+    de preços fica na memória). Retorna a 'BaseRetornos' ou None.
+    """
+    if fonte is None:
+        fonte = obter_fonte_dados()
 
-# --- 4. FUNÇÃO PRINCIPAL DE ORQUESTRAÇÃO ---
+    print("Obtendo calendário de pregões (Ibovespa)...")
+    try:
+        calendario = fonte.baixar_precos([benchmark], inicio, fim)[benchmark].dropna().index
+        if calendario.empty:
+            raise ValueError("série do benchmark vazia")
+    except Exception as e:
+        print(f"Erro fatal: Não foi possível baixar o benchmark {benchmark}. {e}")
+        return None
 
-def calcular_inputs_otimizacao():
+    escritor = base_retornos.EscritorBaseRetornos(pasta, calendario, tickers, dtype)
+    for i in range(0, len(tickers), TICKERS_POR_BLOCO):
+        bloco = tickers[i:i + TICKERS_POR_BLOCO]
+        precos = baixar_dados_precos(bloco, inicio, fim, fonte=fonte)
+        if precos is not None:
+            escritor.gravar_precos(precos)
+    try:
+        base = escritor.finalizar()
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return None
+
+    print(f"Base de retornos gravada em '{pasta}/': {base.shape[0]} dias x {base.shape[1]} ativos "
+          f"({base.dtype.name}).")
+    return base
+
+@rastreamento.rastrear('dados.alinhamento')
+def alinhar_retornos(precos, calendario_pregoes):
+    """
+    Alinha os preços aos dias de pregão do benchmark (repetindo o
+    último preço nos dias sem negociação, ex: cripto/feriados) e
+    calcula os retornos diários.
+    """
+    precos_alinhados = precos.reindex(calendario_pregoes, method='ffill')
+    precos_alinhados = precos_alinhados.dropna()
+    
+    retornos_diarios = precos_alinhados.pct_change()
+    return retornos_diarios.dropna()
+
+
+def executar_downloads(*funcoes):
+    """
+    Executa as funções de download ao mesmo tempo (se
+    'DOWNLOAD_CONCORRENTE') ou uma depois da outra.
+    """
+    if DOWNLOAD_CONCORRENTE:
+        return aquisicao_dados.executar_concorrente(*funcoes)
+    return [f() for f in funcoes]
+
+
+# --- 5. FUNÇÃO PRINCIPAL DE ORQUESTRAÇÃO ---
+
+def calcular_periodo(anos_de_dados, data_fim=None):
+    """
+    Período (início, fim) dos últimos 'anos_de_dados' anos, como
+    strings 'YYYY-MM-DD' para as APIs.
+    """
+    if data_fim is None:
+        data_fim = datetime.date.today()
+    # .timedelta(days=...) é mais preciso que (anos*365)
+    data_inicio = data_fim - datetime.timedelta(days=int(anos_de_dados * 365.25))
+    return data_inicio.isoformat(), data_fim.isoformat()
+
+def calcular_inputs_otimizacao(fornecedor=None):
     """
     Função principal que orquestra o download e o cálculo
     dos inputs para o modelo de otimização, usando o 'config.py'.
+
+    'fornecedor' permite trocar a origem dos dados (padrão:
+    yfinance/BCB, com o cache local em disco).
     """
+    fonte = obter_fonte_dados(fornecedor)
     
     # --- 1. Calcular Datas (Req. "Últimos 5 Anos") ---
     print("Calculando período de análise...")
-    data_fim = datetime.date.today()
-    # .timedelta(days=...) é mais preciso que (anos*365)
-    data_inicio = data_fim - datetime.timedelta(days=int(config.ANOS_DE_DADOS * 365.25))
-    
-    # Converter para string (formato YYYY-MM-DD) para as APIs
-    data_fim_str = data_fim.isoformat()
-    data_inicio_str = data_inicio.isoformat()
+    data_inicio_str, data_fim_str = calcular_periodo(config.ANOS_DE_DADOS)
     
     print(f"Período definido: {data_inicio_str} a {data_fim_str}")
     
-    # --- 2. Obter Taxa Livre de Risco (Req. 1) ---
-    taxa_livre_de_risco = baixar_taxa_livre_de_risco(data_inicio_str, data_fim_str)
-    
-    # --- 3. Obter Retornos dos Ativos (Req. 2) ---
-    retornos = calcular_retornos_diarios(
-        config.LISTA_COMPLETA_ATIVOS, 
-        BENCHMARK_MERCADO, 
-        data_inicio_str, 
-        data_fim_str
+    # --- 2 e 3. Taxa Livre de Risco (Req. 1) e Retornos dos Ativos (Req. 2) ---
+    # (Os downloads da Selic, do calendário e dos preços correm juntos)
+    # Universos grandes vão para a base em disco, em blocos de tickers.
+    usar_base = (LIMIAR_BASE_RETORNOS is not None
+                 and len(config.LISTA_COMPLETA_ATIVOS) > LIMIAR_BASE_RETORNOS)
+    funcao_retornos = calcular_base_retornos if usar_base else calcular_retornos_diarios
+    taxa_livre_de_risco, retornos = executar_downloads(
+        lambda: baixar_taxa_livre_de_risco(data_inicio_str, data_fim_str, fonte=fonte),
+        lambda: funcao_retornos(
+            config.LISTA_COMPLETA_ATIVOS, 
+            BENCHMARK_MERCADO, 
+            data_inicio_str, 
+            data_fim_str,
+            fonte=fonte
+        )
     )
     
-    if retornos is None or retornos.empty:
+    if retornos is None or 0 in retornos.shape:
         print("Erro fatal: Não foi possível calcular os retornos dos ativos.")
         return None
         
     # --- 4. Calcular Inputs para Otimização (μ e Σ) ---
     print("Calculando μ (Retornos Médios) e Σ (Matriz de Covariância)...")
-    retornos_medios_anuais = retornos.mean() * DIAS_UTEIS_ANO
-    matriz_cov_anual = retornos.cov() * DIAS_UTEIS_ANO
+    with rastreamento.etapa('dados.mu_sigma', metodo=METODO_COVARIANCIA, dias=retornos.shape[0],
+                            ativos=retornos.shape[1]):
+        if usar_base:
+            # Bloco a bloco sobre o arquivo; o DataFrame é só uma "view" dele
+            retornos_medios_anuais, matriz_cov_anual = retornos.media_covariancia(
+                METODO_COVARIANCIA, MEIA_VIDA_EWMA, DIAS_UTEIS_ANO)
+            retornos = retornos.como_dataframe()
+        else:
+            retornos_medios_anuais, matriz_cov_anual = estimador_momentos.estimar_mu_sigma(
+                retornos,
+                metodo=METODO_COVARIANCIA,
+                meia_vida=MEIA_VIDA_EWMA,
+                dias_ano=DIAS_UTEIS_ANO
+            )
     
     nomes_dos_ativos = list(retornos.columns)
     
@@ -0,0 +1,108 @@
+"""
+================================================
+ARQUIVO DA PUBLICAÇÃO ATÔMICA DE PASTAS BINÁRIAS
+================================================
+
+O 'artefato_inputs.py' e o 'resultados_binarios.py' gravam
+várias matrizes (.npy) e um manifesto que as descreve (nomes
+dos ativos, formato, hash...). Os leitores abrem as matrizes
+com memory-map e, às vezes, bem depois de ler o manifesto
+(ex: o 'plot.py' lê os pesos de uma carteira só no fim, e o
+'servico_fronteira.py' recarrega a pasta enquanto responde).
+
+Trocar os arquivos um a um no lugar deixa uma janela em que o
+leitor vê o manifesto antigo com matrizes novas (linhas com o
+rótulo errado, ponteiros CSR que não batem com os valores).
+
+Por isso cada gravação vai para uma subpasta NOVA ("geração"),
+nunca alterada depois de pronta, e só então o manifesto (com o
+nome da geração) é trocado com 'os.replace', de uma vez:
+
+    pasta/
+      manifesto.json          -> {'geracao': 'geracao_...', ...}
+      geracao_20250101.../    -> as matrizes desta gravação
+      geracao_20241231.../    -> a anterior (leitores atrasados)
+
+As gerações mais antigas que as MANTER_GERACOES últimas são
+apagadas depois da publicação.
+"""
+
+import os
+import json
+import shutil
+import datetime
+
+# --- 1. PARÂMETROS ---
+
+ARQUIVO_MANIFESTO = 'manifesto.json'
+
+PREFIXO_GERACAO = 'geracao_'
+
+# Gerações mantidas (a atual + as anteriores, para quem ainda leu o manifesto velho)
+MANTER_GERACOES = 2
+
+
+# --- 2. GRAVAÇÃO ---
+
+def nova_geracao(pasta):
+    """Cria a subpasta de uma nova gravação. Retorna (nome, caminho)."""
+    agora = datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')
+    nome = f"{PREFIXO_GERACAO}{agora}_{os.getpid()}"
+    caminho = os.path.join(pasta, nome)
+    os.makedirs(caminho)
+    return nome, caminho
+
+def publicar(pasta, manifesto, geracao):
+    """
+    Publica a geração: grava o manifesto (com 'geracao') em um
+    temporário e o troca de uma vez. Depois, apaga as gerações
+    antigas e as matrizes soltas do formato anterior.
+    """
+    manifesto = dict(manifesto, geracao=geracao)
+    caminho_temp = os.path.join(pasta, ARQUIVO_MANIFESTO + '.tmp')
+    with open(caminho_temp, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(caminho_temp, os.path.join(pasta, ARQUIVO_MANIFESTO))
+    limpar_geracoes(pasta, geracao)
+    return manifesto
+
+def limpar_geracoes(pasta, geracao_atual, manter=MANTER_GERACOES):
+    """
+    Apaga as gerações além das 'manter' mais recentes (nunca a atual)
+    e os .npy soltos na raiz (do formato antigo, sem gerações).
+    Falhas são ignoradas (ex: no Windows, um arquivo ainda mapeado).
+    """
+    geracoes = sorted(n for n in os.listdir(pasta)
+                      if n.startswith(PREFIXO_GERACAO) and os.path.isdir(os.path.join(pasta, n)))
+    antigas = [n for n in geracoes if n != geracao_atual][:max(len(geracoes) - manter, 0)]
+    for nome in antigas:
+        shutil.rmtree(os.path.join(pasta, nome), ignore_errors=True)
+    for nome in os.listdir(pasta):
+        if nome.endswith('.npy'):
+            try:
+                os.remove(os.path.join(pasta, nome))
+            except OSError:
+                pass
+
+
+# --- 3. LEITURA ---
+
+def ler_manifesto(pasta, versao):
+    """
+    Manifesto (dict) da pasta, ou None se não existir, for de outra
+    versão ou a geração que ele aponta já não existir.
+    """
+    caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get('versao') != versao or not manifesto.get('geracao'):
+        return None
+    if not os.path.isdir(os.path.join(pasta, manifesto['geracao'])):
+        return None
+    return manifesto
+
+def caminho_matriz(pasta, manifesto, nome):
+    """Caminho de uma matriz ('nome.npy') da geração do manifesto."""
+    return os.path.join(pasta, manifesto['geracao'], nome)
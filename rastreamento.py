@@ -0,0 +1,250 @@
+"""
+================================================
+ARQUIVO DO RASTREAMENTO DAS ETAPAS (TEMPO, MEMÓRIA E PERFIL)
+================================================
+
+Quando uma execução fica lenta, não dá para saber pelos prints
+se o tempo foi para o download, o alinhamento ao calendário,
+μ/Σ, as gerações do NSGA-II, a escrita dos resultados ou os
+gráficos. Este arquivo instrumenta as etapas do pipeline:
+
+1. 'etapa(nome)' (bloco 'with') ou '@rastrear(nome)' (decorador):
+   mede o tempo e a memória residente (RSS) no início e no fim
+   da etapa, e o pico de RSS do processo até ali;
+2. 'evento(...)': eventos curtos já medidos por quem chama (ex:
+   cada chamada do '_evaluate', com o nº de carteiras);
+3. Perfil opcional (cProfile) das etapas escolhidas: um arquivo
+   '.prof' por etapa em PASTA_PERFIS (abrir com 'pstats' ou
+   'snakeviz');
+4. Ao final, o rastro é gravado no formato "Chrome Trace Event"
+   (JSON): abrir em chrome://tracing ou https://ui.perfetto.dev.
+   Cada thread aparece em uma linha (ex: downloads concorrentes).
+
+Desligado (padrão), cada etapa custa só uma checagem de variável.
+Liga com 'ativar(arquivo)', com a opção '--rastro' do 'cli.py',
+ou com ARQUIVO_RASTRO abaixo (vale para 'python otimizar.py' e
+'python plot.py' executados diretamente).
+
+Nomes das etapas: '<script>.<etapa>' (ex: 'dados.precos',
+'otimizar.motor', 'plot.graficos'); os perfis aceitam o nome
+exato ou um prefixo ('dados' = todas as etapas 'dados.*').
+"""
+
+import atexit
+import cProfile
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# 'resource' só existe em sistemas Unix (no Windows, o pico fica 0.0)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# --- 1. PARÂMETROS ---
+
+ARQUIVO_RASTRO = None        # Ex: 'rastro_pipeline.json' (None = desligado)
+ETAPAS_PERFIL = ()           # Ex: ('otimizar.motor',) ou ('todas',)
+PASTA_PERFIS = 'perfis'
+
+# Rastreador ativo (None = rastreamento desligado)
+_RASTREADOR = None
+
+
+# --- 2. MEMÓRIA ---
+
+def memoria_residente_mb():
+    """RSS atual do processo (Linux: /proc/self/statm; senão, o pico)."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError, AttributeError):
+        # (AttributeError: sem 'os.sysconf', ex: Windows)
+        return pico_memoria_mb()
+
+def pico_memoria_mb():
+    """Pico de RSS do processo até agora (0.0 se 'resource' não existir)."""
+    if resource is None:
+        return 0.0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # (Linux informa em KB; macOS em bytes)
+    return pico / 2**20 if sys.platform == 'darwin' else pico / 1024
+
+
+# --- 3. RASTREADOR ---
+
+class Rastreador:
+    """
+    Acumula os eventos (formato Chrome Trace) de um processo.
+    Pode ser usado de várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, arquivo, etapas_perfil=(), pasta_perfis=PASTA_PERFIS):
+        self.arquivo = arquivo
+        self.etapas_perfil = tuple(etapas_perfil)
+        self.pasta_perfis = pasta_perfis
+        self.eventos = []
+        self.pid = os.getpid()
+        self._inicio = time.perf_counter()
+        self._trava = threading.Lock()
+        self._perfil_ativo = False   # Um cProfile por vez (etapas aninhadas ficam no de fora)
+
+    def _microssegundos(self, instante):
+        """perf_counter -> microssegundos desde o início do rastro."""
+        return (instante - self._inicio) * 1e6
+
+    def _registrar(self, evento):
+        evento.setdefault('pid', self.pid)
+        evento.setdefault('tid', threading.get_ident())
+        with self._trava:
+            self.eventos.append(evento)
+
+    def _reservar_perfil(self, nome):
+        """True se a etapa deve ter cProfile (e reserva o perfil para ela)."""
+        if not any(e == 'todas' or nome == e or nome.startswith(e + '.') for e in self.etapas_perfil):
+            return False
+        with self._trava:
+            if self._perfil_ativo:
+                return False
+            self._perfil_ativo = True
+            return True
+
+    @contextlib.contextmanager
+    def etapa(self, nome, categoria, argumentos):
+        """Bloco medido; 'argumentos' (dict) pode ser completado dentro do bloco."""
+        perfil = cProfile.Profile() if self._reservar_perfil(nome) else None
+        rss_inicio = memoria_residente_mb()
+        inicio = time.perf_counter()
+        if perfil is not None:
+            perfil.enable()
+        try:
+            yield argumentos
+        finally:
+            if perfil is not None:
+                perfil.disable()
+                self._perfil_ativo = False
+                os.makedirs(self.pasta_perfis, exist_ok=True)
+                caminho = os.path.join(self.pasta_perfis, f'{nome}.prof')
+                perfil.dump_stats(caminho)
+                argumentos['perfil'] = caminho
+            fim = time.perf_counter()
+            rss_fim = memoria_residente_mb()
+            argumentos.update(rss_inicio_mb=round(rss_inicio, 1), rss_fim_mb=round(rss_fim, 1),
+                              pico_rss_mb=round(pico_memoria_mb(), 1))
+            self.evento(nome, inicio, fim, categoria, **argumentos)
+            self.contador('memoria', rss_mb=round(rss_fim, 1), instante=fim)
+
+    def evento(self, nome, inicio, fim, categoria='etapa', **argumentos):
+        """Evento completo ('X') entre dois instantes de perf_counter."""
+        self._registrar({'name': nome, 'cat': categoria, 'ph': 'X',
+                         'ts': self._microssegundos(inicio),
+                         'dur': (fim - inicio) * 1e6, 'args': argumentos})
+
+    def contador(self, nome, instante=None, **valores):
+        """Contador ('C'): aparece como um gráfico no visualizador."""
+        instante = time.perf_counter() if instante is None else instante
+        self._registrar({'name': nome, 'ph': 'C', 'ts': self._microssegundos(instante), 'args': valores})
+
+    def resumo(self):
+        """Tabela das etapas: nº de vezes, tempo total e maior RSS ao final."""
+        por_nome = {}
+        for evento in self.eventos:
+            if evento['ph'] != 'X':
+                continue
+            n, total, rss = por_nome.get(evento['name'], (0, 0.0, 0.0))
+            por_nome[evento['name']] = (n + 1, total + evento['dur'] / 1e6,
+                                        max(rss, evento['args'].get('rss_fim_mb', 0.0)))
+        linhas = ["\n--- RASTRO DAS ETAPAS ---",
+                  f"  {'Etapa':<28} {'Vezes':>6} {'Tempo (s)':>10} {'RSS (MB)':>9}"]
+        for nome, (n, total, rss) in sorted(por_nome.items(), key=lambda item: -item[1][1]):
+            texto_rss = f"{rss:.1f}" if rss else "-"
+            linhas.append(f"  {nome:<28} {n:>6} {total:>10.3f} {texto_rss:>9}")
+        linhas.append(f"  Pico de RSS do processo: {pico_memoria_mb():.1f} MB")
+        return "\n".join(linhas)
+
+    def salvar(self):
+        """Grava o rastro (JSON, formato Chrome Trace). Retorna o caminho."""
+        with self._trava:
+            eventos = list(self.eventos)
+        nomes_threads = {t.ident: t.name for t in threading.enumerate()}
+        metadados = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                      'args': {'name': nomes_threads.get(tid, f'thread-{tid}')}}
+                     for tid in {e['tid'] for e in eventos}]
+        pasta = os.path.dirname(self.arquivo)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(self.arquivo, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadados + eventos, 'displayTimeUnit': 'ms',
+                       'otherData': {'comando': ' '.join(sys.argv),
+                                     'pico_rss_mb': round(pico_memoria_mb(), 1)}},
+                      f, ensure_ascii=False, default=str)
+        return self.arquivo
+
+
+# --- 4. INTERFACE DO MÓDULO ---
+
+def ativar(arquivo=None, etapas_perfil=(), pasta_perfis=PASTA_PERFIS):
+    """
+    Liga o rastreamento neste processo. O rastro é gravado (e o
+    resumo impresso) ao final do processo, ou antes com 'finalizar()'.
+    """
+    global _RASTREADOR
+    if _RASTREADOR is None:
+        atexit.register(finalizar)
+    _RASTREADOR = Rastreador(arquivo or 'rastro_pipeline.json', etapas_perfil, pasta_perfis)
+    return _RASTREADOR
+
+def ativar_configurado():
+    """Liga com ARQUIVO_RASTRO / ETAPAS_PERFIL, se definidos e se ainda estiver desligado."""
+    if _RASTREADOR is None and ARQUIVO_RASTRO:
+        ativar(ARQUIVO_RASTRO, ETAPAS_PERFIL, PASTA_PERFIS)
+
+def ativo():
+    return _RASTREADOR is not None
+
+def finalizar():
+    """Grava o rastro, imprime o resumo e desliga o rastreamento."""
+    global _RASTREADOR
+    rastreador, _RASTREADOR = _RASTREADOR, None
+    if rastreador is None or not rastreador.eventos:
+        return None
+    print(rastreador.resumo())
+    caminho = rastreador.salvar()
+    print(f"  Rastro salvo em '{caminho}' (abrir em chrome://tracing ou ui.perfetto.dev).")
+    return caminho
+
+def etapa(nome, categoria='etapa', **argumentos):
+    """
+    Bloco 'with' medido. Devolve um dict em que o bloco pode
+    anotar contagens (ex: info['tickers'] = 40), que vão no evento.
+    """
+    if _RASTREADOR is None:
+        return contextlib.nullcontext(argumentos)
+    return _RASTREADOR.etapa(nome, categoria, argumentos)
+
+def rastrear(nome, categoria='etapa'):
+    """Decorador: a função inteira vira uma etapa."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if _RASTREADOR is None:
+                return funcao(*args, **kwargs)
+            with _RASTREADOR.etapa(nome, categoria, {}):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+def evento(nome, inicio, fim, categoria='etapa', **argumentos):
+    """Evento curto, já medido (instantes de time.perf_counter)."""
+    if _RASTREADOR is not None:
+        _RASTREADOR.evento(nome, inicio, fim, categoria, **argumentos)
+
+def contador(nome, **valores):
+    if _RASTREADOR is not None:
+        _RASTREADOR.contador(nome, **valores)
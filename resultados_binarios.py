@@ -0,0 +1,218 @@
+"""
+================================================
+ARQUIVO DOS RESULTADOS EM FORMATO BINÁRIO (COLUNAR)
+================================================
+
+O 'resultados_otimizacao.csv' (';' e decimal ',') é ótimo para
+abrir no Excel, mas ruim como formato de trabalho: com milhares
+de carteiras e centenas de ativos, escrever e reler o texto é a
+parte mais lenta da análise, e os floats perdem precisão.
+
+Este arquivo grava a fronteira em uma pasta com uma matriz
+binária por "coluna", no mesmo estilo do 'artefato_inputs.py':
+
+- manifesto.json: versão, ativos, nº de carteiras, formato dos
+  pesos, colunas de objetivos, metadados da execução (motor,
+  gerações, hash dos inputs...) e a geração (subpasta) das matrizes
+- risco.npy / retorno.npy: os objetivos (ordenados por risco)
+- cvar.npy: o CVaR diário de cada carteira, só nas execuções com
+  MEDIDA_RISCO = 'CVAR' (o risco salvo é a variância, ver 'otimizar.py')
+- pesos: densos ('pesos.npy', n_portfolios x N) ou esparsos
+  (CSR: 'pesos_valores.npy', 'pesos_colunas.npy', 'pesos_ponteiros.npy'),
+  o que for menor. Fronteiras com poucos ativos por carteira
+  (ex: a do CLA) ficam bem menores no formato esparso.
+
+A leitura usa memory-map: dá para carregar SÓ os objetivos,
+ou só algumas carteiras, sem tocar no resto do arquivo. Como a
+leitura dos pesos pode vir bem depois da do manifesto, cada
+gravação vai para uma subpasta nova e o manifesto é trocado de
+uma vez (ver 'publicacao_pasta.py'); as funções de leitura
+aceitam o 'manifesto' já lido, para tudo sair da mesma geração.
+O CSV continua disponível como exportação ('exportar_csv').
+"""
+
+import os
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import publicacao_pasta
+
+# --- 1. PARÂMETROS ---
+
+# Pasta padrão (ao lado de 'resultados_otimizacao.csv')
+PASTA_RESULTADOS = 'resultados_otimizacao'
+
+# Versão do formato. Pastas de outra versão são ignoradas.
+# (2: matrizes em uma subpasta por gravação, ver 'publicacao_pasta.py')
+VERSAO_FORMATO = 2
+
+# Abaixo desta fração de pesos não-nulos, grava os pesos como esparsos
+LIMITE_DENSIDADE_ESPARSA = 0.3
+
+ARQUIVO_MANIFESTO = publicacao_pasta.ARQUIVO_MANIFESTO
+
+COLUNAS_OBJETIVOS = ('Risco_Anual', 'Retorno_Anual')
+
+# Coluna extra das fronteiras média-CVaR (o objetivo que foi otimizado)
+COLUNA_CVAR = 'CVaR_Diario'
+
+
+# --- 2. GRAVAÇÃO ---
+
+def salvar_resultados(F, X, nomes_dos_ativos, pasta=PASTA_RESULTADOS,
+                      metadados=None, formato_pesos='auto', cvar=None):
+    """
+    Grava a fronteira (F = [Risco, -Retorno], X = pesos) na pasta,
+    ordenada do menor risco para o maior (como o CSV).
+
+    'formato_pesos': 'denso', 'esparso' ou 'auto' (pela densidade).
+    'cvar': CVaR diário de cada carteira (fronteiras média-CVaR) ou None.
+    Retorna o caminho da pasta.
+    """
+    F = np.asarray(F, dtype=np.float64)
+    X = np.asarray(X, dtype=np.float64)
+    ordem = np.argsort(F[:, 0], kind='stable')
+    F, X = F[ordem], X[ordem]
+
+    if formato_pesos == 'auto':
+        densidade = np.count_nonzero(X) / max(X.size, 1)
+        formato_pesos = 'esparso' if densidade < LIMITE_DENSIDADE_ESPARSA else 'denso'
+    if formato_pesos not in ('denso', 'esparso'):
+        raise ValueError(f"Formato de pesos desconhecido: {formato_pesos}")
+
+    os.makedirs(pasta, exist_ok=True)
+    geracao, pasta_geracao = publicacao_pasta.nova_geracao(pasta)
+    np.save(os.path.join(pasta_geracao, 'risco.npy'), F[:, 0])
+    np.save(os.path.join(pasta_geracao, 'retorno.npy'), -F[:, 1])
+    colunas = COLUNAS_OBJETIVOS
+    if cvar is not None:
+        np.save(os.path.join(pasta_geracao, 'cvar.npy'), np.asarray(cvar, dtype=np.float64)[ordem])
+        colunas += (COLUNA_CVAR,)
+
+    if formato_pesos == 'esparso':
+        linhas, colunas_pesos = np.nonzero(X)
+        ponteiros = np.zeros(len(X) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(linhas, minlength=len(X)), out=ponteiros[1:])
+        np.save(os.path.join(pasta_geracao, 'pesos_valores.npy'), X[linhas, colunas_pesos])
+        np.save(os.path.join(pasta_geracao, 'pesos_colunas.npy'), colunas_pesos.astype(np.int32))
+        np.save(os.path.join(pasta_geracao, 'pesos_ponteiros.npy'), ponteiros)
+    else:
+        np.save(os.path.join(pasta_geracao, 'pesos.npy'), X)
+
+    manifesto = {
+        'versao': VERSAO_FORMATO,
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'nomes_dos_ativos': list(nomes_dos_ativos),
+        'n_portfolios': int(len(F)),
+        'formato_pesos': formato_pesos,
+        'colunas_objetivos': list(colunas),
+        'metadados': metadados or {},
+    }
+    # O manifesto é gravado por último: ele "publica" a geração
+    publicacao_pasta.publicar(pasta, manifesto, geracao)
+    return pasta
+
+
+# --- 3. LEITURA ---
+
+def ler_manifesto(pasta=PASTA_RESULTADOS):
+    """Retorna o manifesto (dict) ou None se não existir / for de outra versão."""
+    return publicacao_pasta.ler_manifesto(pasta, VERSAO_FORMATO)
+
+def colunas_objetivos(pasta=PASTA_RESULTADOS, manifesto=None):
+    """Colunas de objetivos da pasta: as de sempre e, se houver, a do CVaR."""
+    if manifesto is None:
+        manifesto = ler_manifesto(pasta)
+    return tuple(manifesto['colunas_objetivos'])
+
+def carregar_objetivos(pasta=PASTA_RESULTADOS, manifesto=None):
+    """
+    DataFrame com 'Risco_Anual' e 'Retorno_Anual' (e 'CVaR_Diario',
+    se a fronteira for média-CVaR), sem ler os pesos.
+    """
+    if manifesto is None:
+        manifesto = ler_manifesto(pasta)
+    arquivos = {'Risco_Anual': 'risco.npy', 'Retorno_Anual': 'retorno.npy', COLUNA_CVAR: 'cvar.npy'}
+    return pd.DataFrame({
+        coluna: np.load(publicacao_pasta.caminho_matriz(pasta, manifesto, arquivos[coluna]), mmap_mode='r')
+        for coluna in colunas_objetivos(pasta, manifesto)
+    })
+
+def carregar_pesos(pasta=PASTA_RESULTADOS, indices=None, ativos=None, manifesto=None):
+    """
+    Matriz de pesos (len(indices) x len(ativos)).
+    'indices': carteiras (linhas) desejadas; None = todas.
+    'ativos':  nomes dos ativos desejados; None = todos.
+    Só as linhas pedidas são lidas do disco. Passe o 'manifesto' já
+    lido para ler da mesma gravação que os objetivos.
+    """
+    if manifesto is None:
+        manifesto = ler_manifesto(pasta)
+    def caminho(nome):
+        return publicacao_pasta.caminho_matriz(pasta, manifesto, nome)
+    nomes = manifesto['nomes_dos_ativos']
+    n_portfolios = manifesto['n_portfolios']
+    linhas = np.arange(n_portfolios) if indices is None else np.asarray(indices, dtype=np.int64)
+    colunas = None if ativos is None else np.array([nomes.index(a) for a in ativos], dtype=np.int64)
+
+    if manifesto['formato_pesos'] == 'denso':
+        pesos = np.load(caminho('pesos.npy'), mmap_mode='r')
+        selecionados = np.asarray(pesos[linhas])
+        return selecionados if colunas is None else selecionados[:, colunas]
+
+    # CSR: cada linha i ocupa valores[ponteiros[i]:ponteiros[i+1]]
+    valores = np.load(caminho('pesos_valores.npy'), mmap_mode='r')
+    indices_colunas = np.load(caminho('pesos_colunas.npy'), mmap_mode='r')
+    ponteiros = np.load(caminho('pesos_ponteiros.npy'))
+
+    inicio, fim = ponteiros[linhas], ponteiros[linhas + 1]
+    tamanhos = fim - inicio
+    posicoes = np.repeat(inicio - np.cumsum(tamanhos) + tamanhos, tamanhos) + np.arange(tamanhos.sum())
+    pesos = np.zeros((len(linhas), len(nomes)))
+    pesos[np.repeat(np.arange(len(linhas)), tamanhos), indices_colunas[posicoes]] = valores[posicoes]
+    return pesos if colunas is None else pesos[:, colunas]
+
+def carregar_resultados(pasta=PASTA_RESULTADOS, indices=None, colunas=None, manifesto=None):
+    """
+    DataFrame no mesmo formato do CSV ('Risco_Anual', 'Retorno_Anual',
+    'w_<ativo>'...), mantendo como índice a posição da carteira.
+
+    'indices': carteiras desejadas (None = todas).
+    'colunas': colunas desejadas (None = todas). Se só houver
+    colunas de objetivos, os pesos nem são abertos.
+    Retorna None se a pasta não existir.
+    """
+    if manifesto is None:
+        manifesto = ler_manifesto(pasta)
+    if manifesto is None:
+        return None
+
+    linhas = np.arange(manifesto['n_portfolios']) if indices is None else np.asarray(indices, dtype=np.int64)
+    nomes = manifesto['nomes_dos_ativos']
+    if colunas is None:
+        colunas = list(colunas_objetivos(pasta, manifesto)) + [f'w_{n}' for n in nomes]
+
+    objetivos = [c for c in colunas if c in colunas_objetivos(pasta, manifesto)]
+    ativos = [c[2:] for c in colunas if c.startswith('w_')]
+
+    partes = []
+    if objetivos:
+        partes.append(carregar_objetivos(pasta, manifesto).iloc[linhas][objetivos].set_axis(linhas))
+    if ativos:
+        pesos = carregar_pesos(pasta, linhas, ativos, manifesto)
+        partes.append(pd.DataFrame(pesos, index=linhas, columns=[f'w_{a}' for a in ativos]))
+    df = pd.concat(partes, axis=1) if partes else pd.DataFrame(index=linhas)
+    return df[[c for c in colunas if c in df.columns]]
+
+
+# --- 4. EXPORTAÇÃO ---
+
+def exportar_csv(arquivo_csv, pasta=PASTA_RESULTADOS):
+    """Exporta os resultados para o CSV do Excel-BR (';' e decimal ',')."""
+    df = carregar_resultados(pasta)
+    if df is None:
+        return None
+    df.to_csv(arquivo_csv, index=False, sep=';', decimal=',')
+    return arquivo_csv
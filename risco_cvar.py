@@ -0,0 +1,243 @@
+"""
+================================================
+ARQUIVO DO RISCO POR CVaR (EXPECTED SHORTFALL)
+================================================
+
+A variância (w^T Σ w) trata perdas e ganhos da mesma forma e
+subestima o risco de ativos com caudas pesadas (ex: BTC-USD,
+SOL-USD). Alternativa: o CVaR (Conditional Value at Risk, ou
+Expected Shortfall) no nível α: a PERDA MÉDIA nos (1-α)·T
+piores cenários.
+
+Os cenários são uma matriz T x N de retornos diários:
+- históricos ('matriz_retornos_historicos' do 'preparar_dados');
+- ou simulados a partir de μ e Σ (normal ou t de Student).
+
+1. RiscoCVaR (modelo de risco do 'modelo_problema.py'):
+   perdas = -(X · Cᵀ) (população x cenários), calculadas em BLOCOS
+   de carteiras para a memória ficar limitada a LIMITE_MEMORIA_MB
+   (20 anos x milhares de ativos x populações grandes); o quantil
+   vem de uma ordenação parcial (np.partition, O(T)), não de um
+   sort completo;
+2. calcular_fronteira_cvar: fronteira média-CVaR EXATA, por
+   programação linear (Rockafellar & Uryasev, 2000), para
+   comparar com o NSGA-II.
+
+O CVaR está na escala dos cenários (perda DIÁRIA, em fração
+do capital); valores positivos são perdas.
+"""
+
+import numpy as np
+
+import modelo_risco
+
+# --- 1. PARÂMETROS ---
+
+NIVEL_CVAR = 0.95           # α: média dos 5% piores cenários
+LIMITE_MEMORIA_MB = 256     # Memória máxima de cada bloco de perdas
+DIAS_UTEIS_ANO = 252
+
+
+# --- 2. CVaR DE UMA MATRIZ DE PERDAS ---
+
+def cvar_de_perdas(perdas, nivel=NIVEL_CVAR):
+    """
+    CVaR de cada linha de 'perdas' (carteiras x cenários).
+
+    Com m = (1-α)·T cenários na cauda (m pode ser fracionário):
+        CVaR = (soma das ⌊m⌋ maiores perdas + (m - ⌊m⌋)·a (⌊m⌋+1)-ésima) / m
+    que é exatamente o ótimo do programa linear de Rockafellar-Uryasev.
+    Usa np.partition (O(T) por linha) em vez de ordenar.
+    """
+    perdas = np.atleast_2d(perdas)
+    T = perdas.shape[1]
+    m = (1.0 - nivel) * T
+    k = int(np.floor(m + 1e-9))
+    if k >= T:
+        return perdas.mean(axis=1, dtype=np.float64)
+
+    # Posição T-k-1: a (k+1)-ésima maior perda; à direita dela, as k maiores
+    parcial = np.partition(perdas, T - k - 1, axis=1)
+    cauda = parcial[:, T - k:].sum(axis=1, dtype=np.float64)
+    proxima = parcial[:, T - k - 1].astype(np.float64)
+    return (cauda + (m - k) * proxima) / m
+
+
+# --- 3. MODELO DE RISCO ---
+
+class RiscoCVaR(modelo_risco.ModeloRisco):
+    """
+    CVaR histórico/simulado como medida de risco ('risco(x)').
+
+    - cenarios: retornos diários (T x N)
+    - nivel: α (ex: 0.95)
+    - limite_memoria_mb: tamanho máximo de cada bloco (carteiras x T)
+
+    'variancia(x)' continua disponível (variância anualizada dos
+    cenários), para relatórios em média-variância.
+    """
+
+    def __init__(self, cenarios, nivel=NIVEL_CVAR, limite_memoria_mb=LIMITE_MEMORIA_MB,
+                 dias_ano=DIAS_UTEIS_ANO, precisao='float64'):
+        super().__init__(precisao)
+        cenarios = np.asarray(cenarios, dtype=np.float64)
+        if not 0.0 <= nivel < 1.0:
+            raise ValueError("O nível do CVaR deve estar em [0, 1).")
+        self.nivel = nivel
+        self.limite_memoria_mb = limite_memoria_mb
+        self.dias_ano = dias_ano
+        # Guardado transposto (N x T): X (pop x N) @ C_T sai direto em pop x T
+        self.cenarios_T = np.ascontiguousarray(cenarios.T, dtype=self.dtype)
+        self._media = cenarios.mean(axis=0)
+
+    @classmethod
+    def de_retornos(cls, matriz_retornos, nivel=NIVEL_CVAR, **kwargs):
+        """CVaR histórico: os cenários são os próprios retornos diários (T x N)."""
+        return cls(np.asarray(matriz_retornos, dtype=np.float64), nivel, **kwargs)
+
+    @classmethod
+    def simulado(cls, retornos_medios, matriz_cov, n_cenarios=10_000, nivel=NIVEL_CVAR,
+                 graus_liberdade=None, semente=0, dias_ano=DIAS_UTEIS_ANO, **kwargs):
+        """
+        CVaR simulado: cenários diários sorteados com μ/dias_ano e
+        Σ/dias_ano (anuais na entrada). Normal, ou t de Student com
+        'graus_liberdade' (> 2, mesma Σ, caudas mais pesadas).
+        """
+        rng = np.random.default_rng(semente)
+        mu = np.asarray(retornos_medios, dtype=np.float64) / dias_ano
+        cov = np.asarray(matriz_cov, dtype=np.float64) / dias_ano
+        # Raiz de Σ por autovalores (aceita Σ semidefinida)
+        autovalores, autovetores = np.linalg.eigh(cov)
+        raiz = autovetores * np.sqrt(np.maximum(autovalores, 0.0))
+        choques = rng.standard_normal((n_cenarios, len(mu))) @ raiz.T
+        if graus_liberdade is not None:
+            escala = np.sqrt((graus_liberdade - 2.0) / rng.chisquare(graus_liberdade, size=(n_cenarios, 1)))
+            choques *= escala
+        return cls(mu + choques, nivel, dias_ano=dias_ano, **kwargs)
+
+    @property
+    def n_ativos(self):
+        return self.cenarios_T.shape[0]
+
+    @property
+    def n_cenarios(self):
+        return self.cenarios_T.shape[1]
+
+    def _linhas_por_bloco(self, colunas_extras):
+        """Nº de carteiras por bloco para (T + extras) valores por carteira caberem no limite."""
+        bytes_por_linha = 8 * (self.n_cenarios + colunas_extras)
+        return max(1, int(self.limite_memoria_mb * 2**20 // bytes_por_linha))
+
+    def perdas(self, x):
+        """Perdas (pop x T) de cada carteira em cada cenário (sem blocos)."""
+        return -(self._converter(x) @ self.cenarios_T)
+
+    def risco(self, x):
+        """CVaR de cada linha 'w' de x, em blocos de carteiras."""
+        x = np.atleast_2d(x)
+        resultado = np.empty(len(x))
+        bloco = self._linhas_por_bloco(self.n_ativos)
+        for inicio in range(0, len(x), bloco):
+            fim = inicio + bloco
+            resultado[inicio:fim] = cvar_de_perdas(self.perdas(x[inicio:fim]), self.nivel)
+        return resultado
+
+    def risco_subconjunto(self, indices, pesos):
+        """CVaR das carteiras esparsas (só as linhas dos K ativos de cada uma)."""
+        resultado = np.empty(len(indices))
+        # Cada carteira do bloco usa K x T valores dos cenários
+        bloco = self._linhas_por_bloco(indices.shape[1] * self.n_cenarios)
+        w = self._converter(pesos)
+        for inicio in range(0, len(indices), bloco):
+            fim = inicio + bloco
+            perdas = -np.einsum('pk,pkt->pt', w[inicio:fim], self.cenarios_T[indices[inicio:fim]])
+            resultado[inicio:fim] = cvar_de_perdas(perdas, self.nivel)
+        return resultado
+
+    def variancia(self, x):
+        """Variância anualizada dos cenários (w^T Σ_cenários w · dias_ano)."""
+        x = np.atleast_2d(x)
+        resultado = np.empty(len(x))
+        bloco = self._linhas_por_bloco(self.n_ativos)
+        media = self._converter(self._media)
+        for inicio in range(0, len(x), bloco):
+            fim = inicio + bloco
+            xb = self._converter(x[inicio:fim])
+            centrado = xb @ self.cenarios_T - (xb @ media)[:, None]
+            resultado[inicio:fim] = np.sum(centrado * centrado, axis=1, dtype=np.float64)
+        return resultado * self.dias_ano / (self.n_cenarios - 1)
+
+    def matriz_densa(self):
+        return np.cov(self.cenarios_T.astype(np.float64)) * self.dias_ano
+
+
+# --- 4. FRONTEIRA MÉDIA-CVaR EXATA (PROGRAMAÇÃO LINEAR) ---
+
+class ResultadoFronteiraCVaR:
+    """
+    Fronteira média-CVaR exata, no formato do 'res' do Pymoo:
+    - F: objetivos (Coluna 0: CVaR, Coluna 1: -Retorno)
+    - X: pesos de cada portfólio
+    - var: VaR (ζ ótimo) de cada portfólio
+    """
+
+    def __init__(self, X, F, var):
+        self.X = X
+        self.F = F
+        self.var = var
+
+def calcular_fronteira_cvar(cenarios, retornos_medios, nivel=NIVEL_CVAR, n_pontos=50,
+                            limite_inferior=0.0, limite_superior=1.0):
+    """
+    Fronteira média-CVaR por programação linear (Rockafellar-Uryasev):
+
+        min  ζ + 1/((1-α)·T) · Σ_t u_t
+        s.a. u_t >= -r_t·w - ζ,  u_t >= 0     (perda além do VaR)
+             Σ w = 1,  μ·w >= alvo,  limites em w
+
+    'retornos_medios' (μ anual, N) define o eixo de retorno, como no
+    NSGA-II. Resolve o mínimo CVaR e depois 'n_pontos' alvos de
+    retorno igualmente espaçados até o máximo possível (HiGHS).
+    """
+    # (scipy só é importado aqui: o NSGA-II com CVaR não precisa dele)
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    C = np.asarray(cenarios, dtype=np.float64)
+    mu = np.asarray(retornos_medios, dtype=np.float64)
+    T, N = C.shape
+    m = (1.0 - nivel) * T
+
+    # Variáveis: [w (N), ζ (1), u (T)]
+    custo = np.concatenate([np.zeros(N), [1.0], np.full(T, 1.0 / m)])
+    A_cauda = sparse.hstack([sparse.csr_matrix(-C), -np.ones((T, 1)), -sparse.eye(T)], format='csr')
+    A_eq = np.concatenate([np.ones(N), [0.0], np.zeros(T)])[None, :]
+    limites = [(limite_inferior, limite_superior)] * N + [(None, None)] + [(0.0, None)] * T
+    linha_retorno = sparse.csr_matrix(np.concatenate([-mu, [0.0], np.zeros(T)])[None, :])
+
+    def resolver(alvo):
+        if alvo is None:
+            A_ub, b_ub = A_cauda, np.zeros(T)
+        else:
+            A_ub, b_ub = sparse.vstack([A_cauda, linha_retorno], format='csr'), np.append(np.zeros(T), -alvo)
+        res = linprog(custo, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=[1.0], bounds=limites, method='highs')
+        if res.status != 0:
+            raise ValueError(f"Programa linear do CVaR sem solução ({res.message}).")
+        return res.x[:N], res.x[N], res.fun
+
+    # Extremos: mínimo CVaR e máximo retorno possível (respeitando os limites)
+    w_min, _, _ = resolver(None)
+    maximo = linprog(-mu, A_eq=np.ones((1, N)), b_eq=[1.0],
+                     bounds=[(limite_inferior, limite_superior)] * N, method='highs')
+    alvos = np.linspace(w_min @ mu, -maximo.fun, n_pontos)
+
+    X, cvars, vars_ = [], [], []
+    for i, alvo in enumerate(alvos):
+        # 1º ponto: a própria carteira de mínimo CVaR (sem restrição de retorno)
+        w, zeta, valor = resolver(None if i == 0 else alvo)
+        X.append(w)
+        vars_.append(zeta)
+        cvars.append(valor)
+    X = np.array(X)
+    F = np.column_stack([cvars, -X @ mu])
+    return ResultadoFronteiraCVaR(X, F, np.array(vars_))
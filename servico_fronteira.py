@@ -0,0 +1,340 @@
+"""
+================================================
+ARQUIVO DO SERVIÇO DE CONSULTAS À FRONTEIRA (RESIDENTE)
+================================================
+
+O 'plot.py' relê os inputs e os resultados a cada execução.
+Para quem consulta a fronteira muitas vezes (ex: uma planilha,
+um painel, outro programa), este serviço carrega μ, Σ, rf e a
+fronteira salva UMA vez e responde por HTTP (JSON):
+
+    GET /saude                      estado do índice carregado
+    GET /retorno?alvo=0.15          menor risco para o retorno-alvo
+    GET /volatilidade?alvo=0.20     maior retorno para a volatilidade-alvo
+    GET /max_sharpe[?rf=0.105]      carteira de máximo Sharpe
+    GET /min_risco                  carteira de mínimo risco
+    GET /max_retorno                carteira de máximo retorno
+    GET /carteira?indice=3          i-ésimo ponto eficiente (composição)
+    GET /recarregar                 força a releitura das pastas
+
+1. O índice é um 'AnaliseFronteira.de_pontos' sobre os pontos
+   eficientes salvos, em ordem de retorno: cada consulta é uma
+   busca binária (O(log n)) + interpolação dos pesos entre os dois
+   pontos vizinhos. Com cardinalidade (MAX_ATIVOS) não há
+   interpolação: devolve o ponto salvo mais próximo que atende
+   o alvo. Sem resultados salvos, usa os cantos do CLA;
+2. Recarga sem parada: os manifestos das pastas são verificados
+   a cada INTERVALO_RECARGA segundos; havendo mudança, o índice
+   novo é montado em uma thread e trocado de uma vez (as consultas
+   em andamento terminam com o índice antigo). Se a leitura falhar
+   (ex: otimização gravando no meio), o índice antigo continua;
+3. Servidor HTTP/1.1 mínimo em asyncio (conexões keep-alive),
+   em TCP ou em socket Unix (--socket).
+
+Uso:
+    python servico_fronteira.py [--porta 8765] [--socket /tmp/fronteira.sock]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import artefato_inputs
+import resultados_binarios
+import analise_fronteira
+
+# --- 1. PARÂMETROS ---
+
+HOST_PADRAO = '127.0.0.1'
+PORTA_PADRAO = 8765
+INTERVALO_RECARGA = 2.0   # Segundos entre as verificações dos manifestos
+PESO_MINIMO = 1e-6        # Pesos menores não aparecem na resposta
+
+
+# --- 2. ÍNDICE DA FRONTEIRA ---
+
+def assinatura_pastas(pasta_resultados, pasta_inputs):
+    """Data de modificação dos dois manifestos (muda a cada gravação)."""
+    assinatura = []
+    for pasta, arquivo in ((pasta_resultados, resultados_binarios.ARQUIVO_MANIFESTO),
+                           (pasta_inputs, artefato_inputs.ARQUIVO_MANIFESTO)):
+        try:
+            assinatura.append(os.stat(os.path.join(pasta, arquivo)).st_mtime_ns)
+        except OSError:
+            assinatura.append(None)
+    return tuple(assinatura)
+
+class IndiceFronteira:
+    """
+    Tudo o que as consultas usam, montado de uma vez (imutável
+    depois de pronto: trocar o índice é só trocar a referência).
+    """
+
+    def __init__(self, analise, nomes_dos_ativos, origem, assinatura):
+        self.analise = analise
+        self.nomes = list(nomes_dos_ativos)
+        self.origem = origem                 # 'resultados' ou 'cla'
+        self.assinatura = assinatura
+        self.carregado_em = datetime.datetime.now().isoformat(timespec='seconds')
+
+    def carteira(self, pesos, taxa_livre_de_risco=None):
+        """Métricas e composição (pesos > PESO_MINIMO, do maior ao menor) de uma carteira."""
+        analise = self.analise
+        rf = analise.taxa_livre_de_risco if taxa_livre_de_risco is None else taxa_livre_de_risco
+        variancia = max(float(pesos @ analise.cov @ pesos), 0.0)
+        retorno = float(pesos @ analise.mu)
+        volatilidade = variancia ** 0.5
+        relevantes = np.flatnonzero(pesos > PESO_MINIMO)
+        relevantes = relevantes[np.argsort(-pesos[relevantes], kind='stable')]
+        return {
+            'retorno': retorno,
+            'volatilidade': volatilidade,
+            'variancia': variancia,
+            'sharpe': (retorno - rf) / volatilidade if volatilidade > 0 else None,
+            'pesos': {self.nomes[i]: float(pesos[i]) for i in relevantes},
+        }
+
+    def resumo(self):
+        analise = self.analise
+        return {
+            'origem': self.origem,
+            'n_pontos': analise.n_cantos,
+            'n_ativos': len(self.nomes),
+            'interpolar': analise.interpolar,
+            'taxa_livre_de_risco': analise.taxa_livre_de_risco,
+            'retorno': [float(analise.retornos_cantos[0]), float(analise.retornos_cantos[-1])],
+            'volatilidade': [float(np.sqrt(analise.variancias_cantos[0])),
+                             float(np.sqrt(analise.variancias_cantos[-1]))],
+            'carregado_em': self.carregado_em,
+        }
+
+def carregar_indice(pasta_resultados=resultados_binarios.PASTA_RESULTADOS,
+                    pasta_inputs=artefato_inputs.PASTA_INPUTS):
+    """
+    Monta o índice a partir dos artefatos em disco (nunca baixa dados).
+    μ e Σ são alinhados aos ativos da fronteira salva (pelo nome).
+    """
+    assinatura = assinatura_pastas(pasta_resultados, pasta_inputs)
+    inputs = artefato_inputs.carregar_inputs(pasta_inputs)
+    if inputs is None:
+        raise FileNotFoundError(f"Artefato de inputs não encontrado em '{pasta_inputs}/'.")
+    rf = inputs['taxa_livre_de_risco']
+
+    manifesto = resultados_binarios.ler_manifesto(pasta_resultados)
+    if manifesto is None:
+        # Sem fronteira salva: usa a fronteira exata (cantos do CLA)
+        analise = analise_fronteira.obter_analise(inputs)
+        return IndiceFronteira(analise, inputs['nomes_dos_ativos'], 'cla', assinatura)
+
+    nomes = manifesto['nomes_dos_ativos']
+    faltando = [n for n in nomes if n not in inputs['retornos_medios'].index]
+    if faltando:
+        raise ValueError(f"Ativos da fronteira sem μ/Σ no artefato de inputs: {faltando}")
+    mu = inputs['retornos_medios'].loc[nomes].to_numpy(dtype=np.float64)
+    cov = inputs['matriz_cov'].loc[nomes, nomes].to_numpy(dtype=np.float64)
+
+    pesos = resultados_binarios.carregar_pesos(pasta_resultados, manifesto=manifesto)
+    # Com cardinalidade, misturar dois pontos pode passar de MAX_ATIVOS
+    interpolar = not manifesto['metadados'].get('max_ativos')
+    analise = analise_fronteira.AnaliseFronteira.de_pontos(pesos, mu, cov, rf, interpolar)
+    return IndiceFronteira(analise, nomes, 'resultados', assinatura)
+
+
+# --- 3. SERVIÇO ---
+
+def _numero(parametros, nome, obrigatorio=True, tipo=float):
+    """
+    Valor do parâmetro 'nome' convertido por 'tipo' (float ou int).
+    'nan'/'inf' são recusados (as comparações com NaN passam todas e
+    a consulta devolveria uma carteira qualquer), assim como '1.7'
+    quando se pede um inteiro.
+    """
+    valores = parametros.get(nome)
+    if not valores:
+        if obrigatorio:
+            raise ValueError(f"Parâmetro '{nome}' obrigatório.")
+        return None
+    try:
+        valor = tipo(valores[0])
+    except ValueError:
+        raise ValueError(f"Parâmetro '{nome}' inválido: {valores[0]!r}") from None
+    if not math.isfinite(valor):
+        raise ValueError(f"Parâmetro '{nome}' inválido: {valores[0]!r}")
+    return valor
+
+class ServicoFronteira:
+    """
+    Consultas sobre o índice atual + recarga em segundo plano.
+    'consultar' é síncrona e não depende do HTTP (dá para usar
+    direto de outro programa ou de um benchmark).
+    """
+
+    def __init__(self, pasta_resultados=resultados_binarios.PASTA_RESULTADOS,
+                 pasta_inputs=artefato_inputs.PASTA_INPUTS, intervalo_recarga=INTERVALO_RECARGA):
+        self.pasta_resultados = pasta_resultados
+        self.pasta_inputs = pasta_inputs
+        self.intervalo_recarga = intervalo_recarga
+        self.indice = carregar_indice(pasta_resultados, pasta_inputs)
+        self.n_consultas = 0
+        self.n_recargas = 0
+        self._trava_recarga = None   # asyncio.Lock, criado dentro do loop
+
+    # --- Consultas ---
+
+    def consultar(self, rota, parametros):
+        """Retorna (status HTTP, dict da resposta)."""
+        self.n_consultas += 1
+        indice = self.indice   # Uma só leitura: a consulta inteira usa o mesmo índice
+        analise = indice.analise
+        try:
+            if rota == '/saude':
+                return 200, dict(indice.resumo(), consultas=self.n_consultas, recargas=self.n_recargas)
+            if rota == '/retorno':
+                return 200, indice.carteira(analise.por_retorno(_numero(parametros, 'alvo')))
+            if rota == '/volatilidade':
+                return 200, indice.carteira(analise.por_volatilidade(_numero(parametros, 'alvo')))
+            if rota == '/max_sharpe':
+                rf = _numero(parametros, 'rf', obrigatorio=False)
+                return 200, indice.carteira(analise.tangente(rf), rf)
+            if rota == '/min_risco':
+                return 200, indice.carteira(analise.minima_variancia())
+            if rota == '/max_retorno':
+                return 200, indice.carteira(analise.maximo_retorno())
+            if rota == '/carteira':
+                i = _numero(parametros, 'indice', tipo=int)
+                if not 0 <= i < analise.n_cantos:
+                    raise ValueError(f"Índice fora do intervalo [0, {analise.n_cantos - 1}].")
+                return 200, dict(indice.carteira(analise.cantos[i]), indice=i)
+        except ValueError as e:
+            return 400, {'erro': str(e)}
+        return 404, {'erro': f"Rota desconhecida: {rota}"}
+
+    # --- Recarga ---
+
+    async def recarregar(self, forcar=False):
+        """
+        Remonta o índice (em uma thread, sem travar as consultas) se os
+        manifestos mudaram. Retorna True se o índice foi trocado.
+        """
+        if self._trava_recarga is None:
+            self._trava_recarga = asyncio.Lock()
+        async with self._trava_recarga:
+            assinatura = assinatura_pastas(self.pasta_resultados, self.pasta_inputs)
+            if not forcar and assinatura == self.indice.assinatura:
+                return False
+            inicio = time.perf_counter()
+            try:
+                novo = await asyncio.to_thread(carregar_indice, self.pasta_resultados, self.pasta_inputs)
+            except Exception as e:
+                print(f"*** AVISO: recarga falhou ({e}). Mantendo o índice anterior.")
+                return False
+            self.indice = novo
+            self.n_recargas += 1
+            print(f"Índice recarregado: {novo.analise.n_cantos} pontos "
+                  f"({time.perf_counter() - inicio:.2f}s).")
+            return True
+
+    async def _vigiar(self):
+        while True:
+            await asyncio.sleep(self.intervalo_recarga)
+            await self.recarregar()
+
+    # --- HTTP ---
+
+    async def _responder(self, metodo, alvo):
+        partes = urlsplit(alvo)
+        if metodo != 'GET':
+            return 405, {'erro': "Só o método GET é aceito."}
+        if partes.path == '/recarregar':
+            trocou = await self.recarregar(forcar=True)
+            return 200, dict(self.indice.resumo(), recarregado=trocou)
+        return self.consultar(partes.path, parse_qs(partes.query))
+
+    async def _atender(self, leitor, escritor):
+        """Uma conexão: várias requisições em sequência (keep-alive)."""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha.strip():
+                    break
+                metodo, alvo, versao = linha.decode('latin-1').split()
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if not linha.strip():
+                        break
+                    chave, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[chave.strip().lower()] = valor.strip()
+                tamanho = int(cabecalhos.get('content-length') or 0)
+                if tamanho:
+                    await leitor.readexactly(tamanho)   # (Corpo ignorado)
+
+                status, resposta = await self._responder(metodo, alvo)
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                corpo = json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+                escritor.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Erro'}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(corpo)}\r\n"
+                    f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode('latin-1') + corpo)
+                await escritor.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass   # Cliente desconectou ou mandou uma requisição malformada
+        finally:
+            escritor.close()
+
+    async def servir(self, host=HOST_PADRAO, porta=PORTA_PADRAO, socket_unix=None, pronto=None):
+        """
+        Atende até ser cancelado. 'pronto' (asyncio.Event, opcional)
+        é sinalizado com o servidor já escutando.
+        """
+        if socket_unix:
+            servidor = await asyncio.start_unix_server(self._atender, path=socket_unix)
+            endereco = socket_unix
+        else:
+            servidor = await asyncio.start_server(self._atender, host, porta)
+            endereco = "http://%s:%d" % servidor.sockets[0].getsockname()[:2]
+        vigia = asyncio.create_task(self._vigiar()) if self.intervalo_recarga else None
+        print(f"Servindo a fronteira ({self.indice.analise.n_cantos} pontos, "
+              f"origem: {self.indice.origem}) em {endereco}")
+        if pronto is not None:
+            pronto.set()
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            if vigia is not None:
+                vigia.cancel()
+
+
+# --- 4. BLOCO DE EXECUÇÃO PRINCIPAL ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço residente de consultas à fronteira eficiente.")
+    parser.add_argument('--host', default=HOST_PADRAO)
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--socket', default=None, help="Caminho de um socket Unix (no lugar de host/porta)")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_RECARGA,
+                        help="Segundos entre as verificações de recarga (0 = sem recarga automática)")
+    parser.add_argument('--resultados', default=resultados_binarios.PASTA_RESULTADOS)
+    parser.add_argument('--inputs', default=artefato_inputs.PASTA_INPUTS)
+    args = parser.parse_args(argv)
+
+    servico = ServicoFronteira(args.resultados, args.inputs, args.intervalo)
+    try:
+        asyncio.run(servico.servir(args.host, args.porta, args.socket))
+    except KeyboardInterrupt:
+        print("\nServiço encerrado.")
+    return 0
+
+if __name__ == '__main__':
+    main()
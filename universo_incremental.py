@@ -0,0 +1,252 @@
+"""
+================================================
+ARQUIVO DA ATUALIZAÇÃO INCREMENTAL DO UNIVERSO (N ± 1)
+================================================
+
+Incluir um FII ou tirar um BDR deslistado do
+'config.LISTA_COMPLETA_ATIVOS' faz o artefato de inputs
+('artefato_inputs.py') ficar desatualizado, e a execução
+seguinte refaz tudo: downloads, μ e Σ completos e o NSGA-II
+"a frio".
+
+Quando o universo muda em poucos ativos (até MAX_ALTERACOES)
+e o artefato ainda é do dia, este arquivo atualiza os inputs
+a partir dele:
+1. Ativos removidos: saem de μ, da linha/coluna de Σ e da
+   matriz de retornos (a janela de datas é mantida). Se um deles
+   era o de histórico mais curto (o que definia o início da
+   janela), o recálculo completo teria uma janela mais longa:
+   retorna None e segue pelo caminho completo;
+2. Ativos novos: só eles são baixados (o calendário do
+   benchmark vem do cache), alinhados à MESMA janela de datas
+   e acrescentados a μ e a Σ com uma linha/coluna nova,
+   em O(T·N) (com a covariância amostral, o resultado é o de
+   um recálculo completo; com shrinkage/EWMA, μ e Σ são
+   reestimados dos retornos já em memória, sem downloads);
+3. A Selic é a do artefato.
+
+Se um ativo novo não tiver histórico cobrindo a janela (o
+recálculo completo encurtaria a janela de todos), retorna None
+e o 'otimizar.py' segue pelo caminho completo.
+
+O warm start com a fronteira anterior "elevada" para a nova
+dimensão fica em 'populacao_inicial.py'.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import artefato_inputs
+import estimador_momentos
+import preparar_dados
+
+# --- 1. PARÂMETROS ---
+
+# Nº máximo de ativos incluídos + removidos para usar o caminho incremental
+MAX_ALTERACOES = 3
+
+# Linhas da matriz de retornos processadas por vez (Σ R^T r, em float64)
+LINHAS_POR_BLOCO = 4096
+
+
+# --- 2. DIFERENÇA ENTRE UNIVERSOS ---
+
+def comparar_universo(manifesto, tickers_pedidos):
+    """
+    (novos, removidos) entre os tickers pedidos no artefato e os
+    atuais, na ordem de 'tickers_pedidos'. Os removidos são só os
+    que estão de fato nos inputs (ativos que falharam no download
+    não estão). Retorna None se o manifesto não tiver os pedidos.
+    """
+    if manifesto is None or manifesto.get('tickers_pedidos') is None:
+        return None
+    pedidos_antes = set(manifesto['tickers_pedidos'])
+    pedidos_agora = set(tickers_pedidos)
+    novos = [t for t in tickers_pedidos if t not in pedidos_antes]
+    removidos = [n for n in manifesto['nomes_dos_ativos'] if n not in pedidos_agora]
+    return novos, removidos
+
+
+# --- 3. RETORNOS DOS ATIVOS NOVOS ---
+
+def retornos_ativos_novos(novos, indice_retornos, inicio, fim, fonte):
+    """
+    Baixa só os ativos novos e calcula seus retornos diários nas
+    datas de 'indice_retornos' (a janela atual), com o mesmo
+    alinhamento do 'preparar_dados.alinhar_retornos'.
+
+    Retorna (DataFrame datas x novos, lista dos que não têm dados)
+    ou (None, ...) se algum ativo não cobrir a janela inteira.
+    """
+    calendario = fonte.baixar_precos([preparar_dados.BENCHMARK_MERCADO], inicio, fim)
+    calendario = calendario[preparar_dados.BENCHMARK_MERCADO].dropna().index
+    precos = preparar_dados.baixar_dados_precos(novos, inicio, fim, fonte=fonte)
+    if precos is None:
+        return None, list(novos)
+    precos = precos.dropna(axis='columns', how='all')
+    sem_dados = [t for t in novos if t not in precos.columns]
+
+    # Pregão anterior ao 1º retorno: base do 1º retorno da janela
+    posicao = calendario.searchsorted(indice_retornos[0])
+    if posicao == 0 or not indice_retornos.isin(calendario).all():
+        print("  Incremental: o calendário do benchmark não cobre a janela do artefato.")
+        return None, sem_dados
+    datas = calendario[posicao - 1:calendario.searchsorted(indice_retornos[-1], side='right')]
+
+    precos_alinhados = precos.reindex(calendario, method='ffill').loc[datas]
+    retornos = precos_alinhados.pct_change().iloc[1:]
+    curtos = [t for t in retornos.columns if retornos[t].isnull().any()]
+    if curtos or not retornos.index.equals(indice_retornos):
+        print(f"  Incremental: histórico não cobre a janela atual ({curtos}).")
+        return None, sem_dados
+    return retornos, sem_dados
+
+
+def removido_limita_janela(removidos, indice_retornos, inicio, fim, fonte):
+    """
+    True se algum ativo removido só tem preço a partir da base do 1º
+    retorno da janela (ou seja, pode ter sido ele que encurtou a janela
+    de todos). Os preços vêm do cache; sem dados, assume que sim.
+    """
+    calendario = fonte.baixar_precos([preparar_dados.BENCHMARK_MERCADO], inicio, fim)
+    calendario = calendario[preparar_dados.BENCHMARK_MERCADO].dropna().index
+    posicao = calendario.searchsorted(indice_retornos[0])
+    if posicao <= 1:
+        # A janela já começa no 1º pregão do período: não há como alongá-la
+        return False
+    precos = preparar_dados.baixar_dados_precos(removidos, inicio, fim, fonte=fonte)
+    if precos is None:
+        return True
+    # Preço no pregão anterior à base: quem não tem, começou na base
+    anterior = precos.reindex(calendario, method='ffill').iloc[posicao - 2]
+    return bool(anterior.reindex(removidos).isnull().any())
+
+
+# --- 4. ATUALIZAÇÃO DE μ E Σ ---
+
+def _coluna_covariancia(matriz_retornos, media_diaria, retornos_novos):
+    """
+    Covariância amostral (diária) entre os ativos atuais e os novos:
+    Σ_t R_t^T (r_t - r̄) / (T - 1), bloco a bloco (O(T·N·k)).
+    """
+    r_c = retornos_novos - retornos_novos.mean(axis=0)
+    cruzada = np.zeros((matriz_retornos.shape[1], r_c.shape[1]))
+    for inicio in range(0, len(matriz_retornos), LINHAS_POR_BLOCO):
+        bloco = np.asarray(matriz_retornos[inicio:inicio + LINHAS_POR_BLOCO], dtype=np.float64)
+        cruzada += (bloco - media_diaria).T @ r_c[inicio:inicio + LINHAS_POR_BLOCO]
+    n = len(retornos_novos)
+    return cruzada / (n - 1), (r_c.T @ r_c) / (n - 1)
+
+def atualizar_momentos(mu, cov, retornos, removidos, retornos_novos,
+                       metodo='amostral', meia_vida=None, dias_ano=preparar_dados.DIAS_UTEIS_ANO):
+    """
+    μ (Series) e Σ (DataFrame) do universo alterado. 'retornos' é a
+    matriz de retornos JÁ sem os removidos e SEM os novos.
+
+    - Covariância amostral: remover é tirar a linha/coluna, e cada
+      ativo novo acrescenta uma linha/coluna (O(T·N));
+    - Shrinkage (a intensidade depende de Σ inteira) e EWMA:
+      reestima a partir dos retornos em memória.
+    """
+    if metodo != 'amostral' or meia_vida:
+        if retornos_novos is not None:
+            retornos = pd.concat([retornos, retornos_novos], axis=1)
+        return estimador_momentos.estimar_mu_sigma(retornos, metodo, meia_vida, dias_ano)
+
+    mu = mu.drop(removidos)
+    cov = cov.drop(index=removidos, columns=removidos)
+    if retornos_novos is None or retornos_novos.empty:
+        return mu, cov
+
+    r = retornos_novos.to_numpy(dtype=np.float64)
+    cruzada, propria = _coluna_covariancia(retornos.to_numpy(), mu.to_numpy() / dias_ano, r)
+    n_antigos = len(mu)
+    nomes = list(mu.index) + list(retornos_novos.columns)
+    cov_nova = np.empty((len(nomes), len(nomes)))
+    cov_nova[:n_antigos, :n_antigos] = cov.to_numpy()
+    cov_nova[:n_antigos, n_antigos:] = cruzada * dias_ano
+    cov_nova[n_antigos:, :n_antigos] = cov_nova[:n_antigos, n_antigos:].T
+    cov_nova[n_antigos:, n_antigos:] = propria * dias_ano
+    mu_novo = np.concatenate([mu.to_numpy(), r.mean(axis=0) * dias_ano])
+    return (pd.Series(mu_novo, index=nomes),
+            pd.DataFrame(cov_nova, index=nomes, columns=nomes, copy=False))
+
+
+# --- 5. FUNÇÃO PRINCIPAL ---
+
+def atualizar_inputs(tickers_pedidos, anos_de_dados, pasta=artefato_inputs.PASTA_INPUTS,
+                     fornecedor=None):
+    """
+    Inputs (mesmo formato de 'preparar_dados.calcular_inputs_otimizacao')
+    do universo 'tickers_pedidos', a partir do artefato em 'pasta'.
+
+    Retorna (inputs, novos, removidos), ou None quando o caminho
+    incremental não se aplica (sem artefato atual, sem mudança,
+    mudanças demais, ativo novo com histórico curto ou ativo
+    removido que definia o início da janela).
+    """
+    manifesto = artefato_inputs.ler_manifesto(pasta)
+    if not artefato_inputs.artefato_atual(manifesto, anos_de_dados=anos_de_dados):
+        return None
+    diferenca = comparar_universo(manifesto, tickers_pedidos)
+    if diferenca is None:
+        return None
+    novos, removidos = diferenca
+    if not novos and not removidos:
+        return None
+    if len(novos) + len(removidos) > MAX_ALTERACOES:
+        print(f"  Incremental: {len(novos) + len(removidos)} alterações no universo "
+              f"(máximo {MAX_ALTERACOES}). Recalculando tudo.")
+        return None
+
+    anteriores = artefato_inputs.carregar_inputs(pasta)
+    if anteriores is None:
+        return None
+    print(f"Universo alterado: +{novos} -{removidos}. Atualizando o artefato '{pasta}'...")
+
+    # Cópias (o artefato está em memory-map e será sobrescrito)
+    matriz = anteriores['matriz_retornos_historicos']
+    mantidos = [n for n in anteriores['nomes_dos_ativos'] if n not in removidos]
+    retornos = pd.DataFrame(matriz[mantidos].to_numpy(copy=True), index=matriz.index.copy(),
+                            columns=mantidos)
+
+    # Mesmo período da execução que gerou o artefato (já no cache)
+    gerado_em = datetime.datetime.fromisoformat(manifesto['gerado_em']).date()
+    inicio, fim = preparar_dados.calcular_periodo(anos_de_dados, gerado_em)
+    fonte = preparar_dados.obter_fonte_dados(fornecedor)
+    if removidos and removido_limita_janela(removidos, retornos.index, inicio, fim, fonte):
+        print(f"  Incremental: um ativo removido ({removidos}) definia o início da janela. "
+              f"Recalculando tudo.")
+        return None
+
+    retornos_novos = None
+    if novos:
+        retornos_novos, sem_dados = retornos_ativos_novos(novos, retornos.index, inicio, fim, fonte)
+        if retornos_novos is None:
+            return None
+        if sem_dados:
+            print(f"  Incremental: sem dados para {sem_dados} (ficam de fora, como no recálculo completo).")
+        retornos_novos = retornos_novos.astype(retornos.dtypes.iloc[0])
+
+    mu, cov = atualizar_momentos(
+        anteriores['retornos_medios'].copy(), anteriores['matriz_cov'].copy(), retornos, removidos,
+        retornos_novos, preparar_dados.METODO_COVARIANCIA, preparar_dados.MEIA_VIDA_EWMA,
+        preparar_dados.DIAS_UTEIS_ANO)
+    if retornos_novos is not None:
+        retornos = pd.concat([retornos, retornos_novos], axis=1)
+
+    # Ordem dos ativos: a do config (como no recálculo completo)
+    nomes = [t for t in tickers_pedidos if t in mu.index]
+    inputs = {
+        'retornos_medios': mu[nomes],
+        'matriz_cov': cov.loc[nomes, nomes],
+        'matriz_retornos_historicos': retornos[nomes],
+        'taxa_livre_de_risco': anteriores['taxa_livre_de_risco'],
+        'nomes_dos_ativos': nomes,
+        'n_ativos': len(nomes),
+    }
+    adicionados = [t for t in novos if t in nomes]
+    print(f"Inputs atualizados: {len(nomes)} ativos (+{len(adicionados)} -{len(removidos)}).")
+    return inputs, adicionados, removidos